@@ -1,7 +1,5 @@
 # general imports
 import sys
-import threading
-import time
 # import PyQt5 elements
 from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtWidgets import QApplication
@@ -13,22 +11,10 @@ from backgroundWindow import BackgroundWindow
 from fittingWindow import FittingWindow
 from mapWindow import MapWindow
 from pixelInformationWindow import PixelInformationWindow
+from redrawScheduler import RedrawScheduler
 from spectrumWindow import SpectrumWindow
 
 
-class StoppableThread(threading.Thread):
-
-    def __init__(self, name, target):
-        super(StoppableThread, self).__init__(name=name, target=target)
-        self._stop_event = threading.Event()
-
-    def stop(self):
-        self._stop_event.set()
-
-    def stopped(self):
-        return self._stop_event.is_set()
-
-
 class Py2DSpectroscopy(QApplication):
 
     """
@@ -46,9 +32,12 @@ class Py2DSpectroscopy(QApplication):
     fit_changed = pyqtSignal(int)            # int: map id
     focus_changed = pyqtSignal(int)          # int: map id
     geometry_changed = pyqtSignal(int)       # int: map id
+    history_changed = pyqtSignal(int)        # int: map id
     interval_changed = pyqtSignal(int)       # int: map id
     selected_data_changed = pyqtSignal(int)  # int: map id
     spectrum_changed = pyqtSignal(int)       # int: map id
+    # events which concern a part of a map only are emitted as region changes instead of their own signal
+    region_changed = pyqtSignal(int, str, object)  # int: map id, str: event, object: bounding box of the pixels
 
     def __init__(self):
 
@@ -58,8 +47,8 @@ class Py2DSpectroscopy(QApplication):
         # connect exit method
         self.aboutToQuit.connect(self.exit_app)
 
-        # list for all loaded maps
-        self.maps = MapList()
+        # list for all loaded maps, the events of the maps are emitted as signals of the app
+        self.maps = MapList(self)
 
         # dictionary for all windows
         self.windows = {
@@ -71,9 +60,6 @@ class Py2DSpectroscopy(QApplication):
             "spectrumWindow": SpectrumWindow()
         }
 
-        # thread for live plotting
-        self._live_plotting_thread = None
-
         # connect to map list signals
         self.map_added.connect(self.windows['backgroundWindow'].add_widget)
         self.map_added.connect(self.windows['fittingWindow'].add_widget)
@@ -90,50 +76,47 @@ class Py2DSpectroscopy(QApplication):
         self.selected_map_changed.connect(self.windows['pixelInformationWindow'].change_widget)
         self.selected_map_changed.connect(self.windows['spectrumWindow'].change_widget)
 
-        # connect to map signals
-        self.fit_changed.connect(self.windows['mapWindow'].update_data)
-        self.fit_changed.connect(self.windows['mapWindow'].update_data_selection_combo_box)
-        self.fit_changed.connect(self.windows['pixelInformationWindow'].update_data)
-        self.fit_changed.connect(self.windows['spectrumWindow'].update_data)
+        # the redraws of the views after the events of the maps are coalesced by the scheduler
+        self.redraw_scheduler = RedrawScheduler(self)
+        map_window = self.windows['mapWindow']
+        pixel_information_window = self.windows['pixelInformationWindow']
+        spectrum_window = self.windows['spectrumWindow']
 
-        self.focus_changed.connect(self.windows['mapWindow'].update_crosshair)
-        self.focus_changed.connect(self.windows['pixelInformationWindow'].update_data)
-        self.focus_changed.connect(self.windows['spectrumWindow'].update_data)
+        self.redraw_scheduler.add_view('fit_changed', map_window, map_window.update_data)
+        self.redraw_scheduler.add_view('fit_changed', map_window, map_window.update_data_selection_combo_box)
+        self.redraw_scheduler.add_view('fit_changed', pixel_information_window, pixel_information_window.update_data,
+                                       focused=True)
+        self.redraw_scheduler.add_view('fit_changed', spectrum_window, spectrum_window.update_data, focused=True)
 
-        self.geometry_changed.connect(self.windows['mapWindow'].update_data)
-        self.geometry_changed.connect(self.windows['mapWindow'].update_crosshair)
+        self.redraw_scheduler.add_view('focus_changed', map_window, map_window.update_crosshair)
+        self.redraw_scheduler.add_view('focus_changed', pixel_information_window, pixel_information_window.update_data)
+        self.redraw_scheduler.add_view('focus_changed', spectrum_window, spectrum_window.update_data)
 
-        self.interval_changed.connect(self.windows['mapWindow'].update_data)
-        self.interval_changed.connect(self.windows['pixelInformationWindow'].update_data)
-        self.interval_changed.connect(self.windows['spectrumWindow'].update_data)
+        self.redraw_scheduler.add_view('geometry_changed', map_window, map_window.update_data)
+        self.redraw_scheduler.add_view('geometry_changed', map_window, map_window.update_crosshair)
 
-        self.selected_data_changed.connect(self.windows['mapWindow'].update_data)
+        self.redraw_scheduler.add_view('interval_changed', map_window, map_window.update_data)
+        self.redraw_scheduler.add_view('interval_changed', pixel_information_window,
+                                       pixel_information_window.update_data)
+        self.redraw_scheduler.add_view('interval_changed', spectrum_window, spectrum_window.update_data)
 
-        self.spectrum_changed.connect(self.windows['mapWindow'].update_data)
-        self.spectrum_changed.connect(self.windows['pixelInformationWindow'].update_data)
-        self.spectrum_changed.connect(self.windows['spectrumWindow'].update_data)
+        self.redraw_scheduler.add_view('selected_data_changed', map_window, map_window.update_data)
 
-        # show the map window
-        self.windows['mapWindow'].show()
-
-    def live_plotting(self):
-
-        while not threading.current_thread().stopped():
-            time.sleep(0.5)
-            self.windows['mapWindow'].update_data(self.maps.get_selected_map().get_id())
-        self.windows['mapWindow'].update_data(self.maps.get_selected_map().get_id())
+        self.redraw_scheduler.add_view('spectrum_changed', map_window, map_window.update_data)
+        self.redraw_scheduler.add_view('spectrum_changed', pixel_information_window,
+                                       pixel_information_window.update_data, focused=True)
+        self.redraw_scheduler.add_view('spectrum_changed', spectrum_window, spectrum_window.update_data, focused=True)
 
-    def start_live_plotting(self):
+        # the edit menu names the steps of the history of the selected map
+        self.history_changed.connect(map_window.update_history_actions)
 
-        self._live_plotting_thread = StoppableThread(name='live_plotting', target=self.live_plotting)
-        self._live_plotting_thread.start()
-
-    def stop_live_plotting(self):
+        # show the map window
+        self.windows['mapWindow'].show()
 
-        self._live_plotting_thread.stop()
+    def exit_app(self):
 
-    @staticmethod
-    def exit_app():
+        # remove the on-disk stores of lazily loaded maps
+        self.maps.reset()
 
         print('Thanks for using me!')
 
@@ -0,0 +1,38 @@
+# import PyQt5 elements
+from PyQt5.QtWidgets import QGridLayout, QProgressBar, QPushButton, QSizePolicy, QWidget
+
+
+class UiLoadingTabWidget(object):
+
+    """
+    UiLoadingTabWidget
+    Widget for the placeholder tab that shows the preview, progress bar and cancel button of a map being loaded.
+    """
+
+    def __init__(self, loading_tab_widget):
+
+        # set object name
+        loading_tab_widget.setObjectName("loadingTab")
+
+        # create grid layout
+        self.gridLayout = QGridLayout(loading_tab_widget)
+        self.gridLayout.setObjectName("gridLayout")
+
+        # create plot widget
+        self.plot_widget = QWidget(loading_tab_widget)
+        self.plot_widget.setObjectName("plotWidget")
+        self.plot_widget.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Minimum)
+        self.gridLayout.addWidget(self.plot_widget, 0, 0, 1, 2)
+
+        # create progress bar
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setObjectName("progressBar")
+        self.progress_bar.setRange(0, 0)
+        self.gridLayout.addWidget(self.progress_bar, 1, 0, 1, 1)
+
+        # create cancel button
+        self.cancel_button = QPushButton()
+        self.cancel_button.setObjectName("cancelButton")
+        self.cancel_button.setText("Cancel")
+        self.cancel_button.setSizePolicy(QSizePolicy.Maximum, QSizePolicy.Fixed)
+        self.gridLayout.addWidget(self.cancel_button, 1, 1, 1, 1)
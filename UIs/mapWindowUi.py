@@ -1,5 +1,6 @@
 # import PyQt5 elements
-from PyQt5.QtWidgets import QAction, QTabWidget, QWidget, QGridLayout
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtWidgets import QAction, QLabel, QTabWidget, QWidget, QGridLayout
 
 
 class UiMapWindow(object):
@@ -36,6 +37,11 @@ class UiMapWindow(object):
         # set central widget
         map_window.setCentralWidget(self.central_widget)
 
+        # status bar with the memory used by the maps
+        self.memory_label = QLabel(map_window)
+        self.memory_label.setObjectName("memory_label")
+        map_window.statusBar().addPermanentWidget(self.memory_label)
+
         # menu
         self.menu_bar = map_window.menuBar()
 
@@ -59,6 +65,34 @@ class UiMapWindow(object):
         self.action_2d_map.setEnabled(True)
         self.open_menu.addAction(self.action_2d_map)
 
+        # follow scan action
+        self.action_follow_scan = QAction(map_window)
+        self.action_follow_scan.setObjectName("action_follow_scan")
+        self.action_follow_scan.setText("Follow QtLab Scan")
+        self.action_follow_scan.setEnabled(True)
+        self.open_menu.addAction(self.action_follow_scan)
+
+        # separator
+        self.open_menu.addSeparator()
+
+        # single precision action
+        self.action_single_precision = QAction(map_window)
+        self.action_single_precision.setObjectName("action_single_precision")
+        self.action_single_precision.setText("Single Precision")
+        self.action_single_precision.setCheckable(True)
+        self.action_single_precision.setChecked(False)
+        self.action_single_precision.setEnabled(True)
+        self.open_menu.addAction(self.action_single_precision)
+
+        # on-demand spectra action
+        self.action_on_demand_spectra = QAction(map_window)
+        self.action_on_demand_spectra.setObjectName("action_on_demand_spectra")
+        self.action_on_demand_spectra.setText("Load Spectra on Demand")
+        self.action_on_demand_spectra.setCheckable(True)
+        self.action_on_demand_spectra.setChecked(False)
+        self.action_on_demand_spectra.setEnabled(True)
+        self.open_menu.addAction(self.action_on_demand_spectra)
+
         # save action
         self.action_save = QAction(map_window)
         self.action_save.setObjectName("action_save")
@@ -73,6 +107,13 @@ class UiMapWindow(object):
         self.action_export.setEnabled(False)
         self.file_menu.addAction(self.action_export)
 
+        # import fits action
+        self.action_import_fits = QAction(map_window)
+        self.action_import_fits.setObjectName("action_import_fits")
+        self.action_import_fits.setText("Import Fit Results")
+        self.action_import_fits.setEnabled(False)
+        self.file_menu.addAction(self.action_import_fits)
+
         # add separator
         self.file_menu.addSeparator()
 
@@ -83,6 +124,25 @@ class UiMapWindow(object):
         self.action_exit.setEnabled(False)
         self.file_menu.addAction(self.action_exit)
 
+        # edit menu
+        self.edit_menu = self.menu_bar.addMenu('Edit')
+
+        # undo action
+        self.action_undo = QAction(map_window)
+        self.action_undo.setObjectName("action_undo")
+        self.action_undo.setText("Undo")
+        self.action_undo.setShortcut(QKeySequence.Undo)
+        self.action_undo.setEnabled(False)
+        self.edit_menu.addAction(self.action_undo)
+
+        # redo action
+        self.action_redo = QAction(map_window)
+        self.action_redo.setObjectName("action_redo")
+        self.action_redo.setText("Redo")
+        self.action_redo.setShortcut(QKeySequence.Redo)
+        self.action_redo.setEnabled(False)
+        self.edit_menu.addAction(self.action_redo)
+
         # view menu
         self.view_menu = self.menu_bar.addMenu('View')
 
@@ -165,6 +225,13 @@ class UiMapWindow(object):
         self.action_anticlockwise.setEnabled(False)
         self.rotate_menu.addAction(self.action_anticlockwise)
 
+        # compact map action
+        self.action_compact = QAction(map_window)
+        self.action_compact.setObjectName("action_compact")
+        self.action_compact.setText("Compact map")
+        self.action_compact.setEnabled(False)
+        self.tools_menu.addAction(self.action_compact)
+
         # about menu
         self.help_menu = self.menu_bar.addMenu('Help')
 
@@ -146,326 +146,69 @@ class BackgroundWidget(QWidget):
                 spectrum[:, 1] = spectrum[:, 1]-background[:, 1]
 
             # update spectrum
-            self._map.set_spectrum(spectrum, emit=True)
+            with self._map.history_step('Remove Background'):
+                self._map.set_spectrum(spectrum, emit=True)
                 
         # remove background on whole map
         else:
 
-            # check the dimension of the map
-            if self._map.get_dimension() == 1:
+            # get map size, the spectra are processed in chunks of rows which are updated at once
+            size = self._map.get_size()
+            n_rows = max(1, self._map.chunk_bytes // max(1, 8*int(numpy.prod(size[1:]))*self._map.get_resolution()))
 
-                # get map size
-                nx = self._map.get_size()[0]
-
-                # create progressbar dialog
-                progress_dialog = QProgressDialog('', '', 0, nx, self._app.windows['backgroundWindow'])
-                progress_dialog.setWindowTitle('Removing Background')
-                progress_dialog.setWindowModality(Qt.WindowModal)
-                progress_dialog_cancel_button = QPushButton('Stop')
-                progress_dialog.setCancelButton(progress_dialog_cancel_button)
-                progress_dialog.show()
+            # get the background which is the same for all pixels
+            if self.ui.background_from_pixel_radio_button.isChecked():
+                background = numpy.copy(self._map.get_spectrum(pixel=[self.ui.x_spin_box.value(),
+                                                                      self.ui.y_spin_box.value()])[:, 1])
+            elif self.ui.background_from_file_radio_button.isChecked():
+                background = numpy.loadtxt(self.ui.file_path_line_edit.text())[:, 1]
 
-                # start live plotting
-                self._app.start_live_plotting()
+            # create progressbar dialog
+            progress_dialog = QProgressDialog('', '', 0, size[0], self._app.windows['backgroundWindow'])
+            progress_dialog.setWindowTitle('Removing Background')
+            progress_dialog.setWindowModality(Qt.WindowModal)
+            progress_dialog_cancel_button = QPushButton('Stop')
+            progress_dialog.setCancelButton(progress_dialog_cancel_button)
+            progress_dialog.show()
 
-                # remove background on each pixel
-                if self.ui.minimum_counts_radio_button.isChecked():
+            # the changes of all chunks are undone at once, a stopped removal undoes the processed rows
+            with self._map.history_step('Remove Background'):
+                for i_row in range(0, size[0], n_rows):
 
-                    for ix in range(nx):
+                    # check if process was cancelled
+                    if progress_dialog.wasCanceled():
+                        break
 
-                        # check if process was cancelled
-                        if progress_dialog.wasCanceled():
-                            break
+                    # load the spectra of the rows
+                    rows = numpy.zeros(size, dtype=bool)
+                    rows[i_row:i_row+n_rows] = True
+                    counts = self._map.get_counts(rows)
 
-                        # load spectrum
-                        spectrum = self._map.get_spectrum(pixel=[ix])
+                    if self.ui.minimum_counts_radio_button.isChecked():
 
                         # remove minimum as a background
-                        spectrum[:, 1] = spectrum[:, 1]-numpy.min(spectrum[:, 1])
-
-                        if ix == self._map.get_focus()[0]:
-
-                            # update spectrum
-                            self._map.set_spectrum(spectrum, pixel=[ix], emit=True)
-
-                        else:
-
-                            # update spectrum
-                            self._map.set_spectrum(spectrum, pixel=[ix], emit=False)
+                        counts -= numpy.min(counts, axis=-1, keepdims=True)
 
-                        # process events
-                        self._app.processEvents()
-
-                        # update progress bar
-                        progress_dialog.setValue(ix + 1)
-
-                elif self.ui.interval_average_radio_button.isChecked():
-
-                    for ix in range(nx):
-
-                        # check if process was cancelled
-                        if progress_dialog.wasCanceled():
-                            break
-
-                        # load spectrum
-                        spectrum = self._map.get_spectrum(pixel=[ix])
+                    elif self.ui.interval_average_radio_button.isChecked():
 
                         # remove interval average as a background
-                        spectrum[:, 1] = spectrum[:, 1]-numpy.mean(
-                            spectrum[self.ui.lower_boundary_slider.value():self.ui.upper_boundary_slider.value(), 1])
-
-                        if ix == self._map.get_focus()[0]:
-
-                            # update spectrum
-                            self._map.set_spectrum(spectrum, pixel=[ix], emit=True)
-
-                        else:
-
-                            # update spectrum
-                            self._map.set_spectrum(spectrum, pixel=[ix], emit=False)
-
-                        # process events
-                        self._app.processEvents()
-
-                        # update progress bar
-                        progress_dialog.setValue(ix + 1)
-
-                elif self.ui.background_from_pixel_radio_button.isChecked():
-
-                    background = numpy.copy(self._map.get_spectrum(pixel=[self.ui.x_spin_box.value()])[:, 1])
-
-                    for ix in range(nx):
-
-                        # check if process was cancelled
-                        if progress_dialog.wasCanceled():
-                            break
-
-                        # load spectrum
-                        spectrum = self._map.get_spectrum(pixel=[ix])
-
-                        # remove spectrum at specific pixel as a background
-                        spectrum[:, 1] = spectrum[:, 1] - background
-
-                        if ix == self._map.get_focus()[0]:
-
-                            # update spectrum
-                            self._map.set_spectrum(spectrum, pixel=[ix], emit=True)
-
-                        else:
-
-                            # update spectrum
-                            self._map.set_spectrum(spectrum, pixel=[ix], emit=False)
-
-                        # process events
-                        self._app.processEvents()
-
-                        # update progress bar
-                        progress_dialog.setValue(ix + 1)
-
-                elif self.ui.background_from_file_radio_button.isChecked():
-
-                    background = numpy.loadtxt(self.ui.file_path_line_edit.text())
-
-                    for ix in range(nx):
-
-                        # check if process was cancelled
-                        if progress_dialog.wasCanceled():
-                            break
-
-                        # load spectrum
-                        spectrum = self._map.get_spectrum(pixel=[ix])
-
-                        # remove spectrum from file as a background
-                        spectrum[:, 1] = spectrum[:, 1]-background[:, 1]
-
-                        if ix == self._map.get_focus()[0]:
-
-                            # update spectrum
-                            self._map.set_spectrum(spectrum, pixel=[ix], emit=True)
-
-                        else:
-
-                            # update spectrum
-                            self._map.set_spectrum(spectrum, pixel=[ix], emit=False)
-
-                        # process events
-                        self._app.processEvents()
-
-                        # update progress bar
-                        progress_dialog.setValue(ix + 1)
-
-                # stop live plotting
-                self._app.stop_live_plotting()
-
-            elif self._map.get_dimension() == 2:
-
-                # get map size
-                nx, ny = self._map.get_size()
-
-                # create progressbar dialog
-                progress_dialog = QProgressDialog('', '', 0, nx * ny, self._app.windows['backgroundWindow'])
-                progress_dialog.setWindowTitle('Removing Background')
-                progress_dialog.setWindowModality(Qt.WindowModal)
-                progress_dialog_cancel_button = QPushButton('Stop')
-                progress_dialog.setCancelButton(progress_dialog_cancel_button)
-                progress_dialog.show()
-
-                # start live plotting
-                self._app.start_live_plotting()
-
-                # remove background on each pixel
-                if self.ui.minimum_counts_radio_button.isChecked():
-
-                    for ix in range(nx):
-
-                        for iy in range(ny):
-
-                            # check if process was cancelled
-                            if progress_dialog.wasCanceled():
-                                break
-
-                            # load spectrum
-                            spectrum = self._map.get_spectrum(pixel=[ix, iy])
-
-                            # remove minimum as a background
-                            spectrum[:, 1] = spectrum[:, 1]-numpy.min(spectrum[:, 1])
-
-                            if ix == self._map.get_focus()[0] and iy == self._map.get_focus()[1]:
-
-                                # update spectrum
-                                self._map.set_spectrum(spectrum, pixel=[ix, iy], emit=True)
-
-                            else:
-
-                                # update spectrum
-                                self._map.set_spectrum(spectrum, pixel=[ix, iy], emit=False)
-
-                            # process events
-                            self._app.processEvents()
-
-                            # update progress bar
-                            progress_dialog.setValue(ix * ny + iy + 1)
-
-                        # check if process was cancelled
-                        if progress_dialog.wasCanceled():
-                            break
-
-                elif self.ui.interval_average_radio_button.isChecked():
-
-                    for ix in range(nx):
-
-                        for iy in range(ny):
-
-                            # check if process was cancelled
-                            if progress_dialog.wasCanceled():
-                                break
-
-                            # load spectrum
-                            spectrum = self._map.get_spectrum(pixel=[ix, iy])
-
-                            # remove interval average as a background
-                            spectrum[:, 1] = spectrum[:, 1]-numpy.mean(
-                                spectrum[self.ui.lower_boundary_slider.value():self.ui.upper_boundary_slider.value(), 1])
-
-                            if ix == self._map.get_focus()[0] and iy == self._map.get_focus()[1]:
-
-                                # update spectrum
-                                self._map.set_spectrum(spectrum, pixel=[ix, iy], emit=True)
-
-                            else:
-
-                                # update spectrum
-                                self._map.set_spectrum(spectrum, pixel=[ix, iy], emit=False)
-
-                            # process events
-                            self._app.processEvents()
-
-                            # update progress bar
-                            progress_dialog.setValue(ix * ny + iy + 1)
-
-                        # check if process was cancelled
-                        if progress_dialog.wasCanceled():
-                            break
-
-                elif self.ui.background_from_pixel_radio_button.isChecked():
-
-                    background = numpy.copy(self._map.get_spectrum(pixel=[self.ui.x_spin_box.value(),
-                                                                          self.ui.y_spin_box.value()])[:, 1])
-
-                    for ix in range(nx):
-
-                        for iy in range(ny):
-
-                            # check if process was cancelled
-                            if progress_dialog.wasCanceled():
-                                break
-
-                            # load spectrum
-                            spectrum = self._map.get_spectrum(pixel=[ix, iy])
-
-                            # remove spectrum at specific pixel as a background
-                            spectrum[:, 1] = spectrum[:, 1] - background
-
-                            if ix == self._map.get_focus()[0] and iy == self._map.get_focus()[1]:
-
-                                # update spectrum
-                                self._map.set_spectrum(spectrum, pixel=[ix, iy], emit=True)
-
-                            else:
-
-                                # update spectrum
-                                self._map.set_spectrum(spectrum, pixel=[ix, iy], emit=False)
-
-                            # process events
-                            self._app.processEvents()
-
-                            # update progress bar
-                            progress_dialog.setValue(ix * ny + iy + 1)
-
-                        # check if process was cancelled
-                        if progress_dialog.wasCanceled():
-                            break
-
-                elif self.ui.background_from_file_radio_button.isChecked():
-
-                    background = numpy.loadtxt(self.ui.file_path_line_edit.text())
-
-                    for ix in range(nx):
-
-                        for iy in range(ny):
-
-                            # check if process was cancelled
-                            if progress_dialog.wasCanceled():
-                                break
-
-                            # load spectrum
-                            spectrum = self._map.get_spectrum(pixel=[ix, iy])
-
-                            # remove spectrum from file as a background
-                            spectrum[:, 1] = spectrum[:, 1]-background[:, 1]
-
-                            if ix == self._map.get_focus()[0] and iy == self._map.get_focus()[1]:
-
-                                # update spectrum
-                                self._map.set_spectrum(spectrum, pixel=[ix, iy], emit=True)
-
-                            else:
+                        counts -= numpy.mean(
+                            counts[:, self.ui.lower_boundary_slider.value():self.ui.upper_boundary_slider.value()],
+                            axis=-1, keepdims=True)
 
-                                # update spectrum
-                                self._map.set_spectrum(spectrum, pixel=[ix, iy], emit=False)
+                    else:
 
-                            # process events
-                            self._app.processEvents()
+                        # remove spectrum at specific pixel or from file as a background
+                        counts -= background
 
-                            # update progress bar
-                            progress_dialog.setValue(ix * ny + iy + 1)
+                    # update the spectra of all pixels of the rows at once
+                    self._map.set_spectra(rows, counts)
 
-                        # check if process was cancelled
-                        if progress_dialog.wasCanceled():
-                            break
+                    # process events
+                    self._app.processEvents()
 
-                # stop live plotting
-                self._app.stop_live_plotting()
+                    # update progress bar
+                    progress_dialog.setValue(min(i_row+n_rows, size[0]))
 
     def cb_boundary_slider_moved(self):
 
@@ -0,0 +1,112 @@
+# general imports
+import importlib
+import numpy
+from os import path
+
+
+class LoadingCancelled(Exception):
+
+    """
+    LoadingCancelled
+    Raised by a map loader if the user cancelled the loading of a map.
+    """
+
+
+def compact_energies(energies):
+
+    # collapse per-pixel energy axes into a single axis if all pixels share the same energies
+    energies_flat = energies.reshape((-1, energies.shape[-1]))
+    if numpy.all(energies_flat == energies_flat[0]):
+        return numpy.array(energies_flat[0])
+
+    # return the per-pixel energy axes if they differ
+    return energies
+
+
+def create_spectra(shape, dtype, store_name=None):
+
+    # keep the spectra in memory if no on-disk store is given
+    if store_name is None:
+        return numpy.zeros(shape, dtype=dtype)
+
+    # otherwise create a memory-mapped .npy file, only the parts of the spectra which are accessed are held in memory
+    return numpy.lib.format.open_memmap(store_name, mode='w+', dtype=dtype, shape=shape)
+
+
+def sniff_qtlab_1d(file_name):
+
+    # QtLab maps consist of a .dat table and one .asc spectrum per pixel in the same directory
+    return file_name[-4:] == '.dat' and path.isfile(path.dirname(file_name) + '/spectrum_0.asc')
+
+
+def sniff_qtlab_2d(file_name):
+
+    # QtLab maps consist of a .dat table and one .asc spectrum per pixel in the same directory
+    return file_name[-4:] == '.dat' and path.isfile(path.dirname(file_name) + '/spectrum_0_0.asc')
+
+
+def sniff_qcodes(file_name):
+
+    # QCoDeS maps are pickled pandas data frames
+    if file_name[-4:] != '.pck':
+        return False
+    with open(file_name, 'rb') as file_data:
+        return file_data.read(1) == b'\x80'
+
+
+def sniff_horiba(file_name):
+
+    # the first line of Horiba maps which is not a comment lists the energies separated by tabs
+    if file_name[-4:] != '.txt':
+        return False
+    with open(file_name) as file_data:
+        for i_line, line in enumerate(file_data):
+            if line[0] != '#' and line.strip() != '':
+                return '\t' in line
+            if i_line > 100:
+                break
+    return False
+
+
+def sniff_vuckovic(file_name):
+
+    # Vuckovic maps are plain tables of intensities
+    return file_name[-5:] == '.dat2'
+
+
+# registered map loaders, each entry gives the dimension, the sniff function and the module and class of the loader
+loaders = []
+
+
+def register(dimension, sniff, module_name, class_name):
+
+    # the loader module is only imported once a file of this format is loaded,
+    # the loader class is created with the file name, the dtype and the store name and provides load_data(progress),
+    # progress is None or a callable progress(value, maximum, preview=None) which returns False if the loading is to be
+    # cancelled, preview optionally gives the integrated counts of the map with NaN for pixels which are not read yet
+    loaders.append((dimension, sniff, module_name, class_name))
+
+
+def find_loader(file_name, dimension):
+
+    # formats which are registered later are checked first so that they can take over files of built-in formats
+    for loader_dimension, sniff, module_name, class_name in reversed(loaders):
+        if loader_dimension == dimension and sniff(file_name):
+            return getattr(importlib.import_module(module_name), class_name)
+
+    raise ValueError('The file format of ' + path.basename(file_name) + ' is not supported.')
+
+
+# .dat files are acquired in the PGI9 (FZJ) lab using QTLab
+register(1, sniff_qtlab_1d, 'datatypes.maps1d.qtlab', 'QtLab1D')
+register(2, sniff_qtlab_2d, 'datatypes.maps2d.qtlab', 'QtLab2D')
+
+# .pck files are pandas data frames saved by QCoDeS
+register(1, sniff_qcodes, 'datatypes.maps1d.qcodes', 'QCoDeS1D')
+register(2, sniff_qcodes, 'datatypes.maps2d.qcodes', 'QCoDeS2D')
+
+# .txt files are acquired by the Horiba machine in the Heinz Group at Stanford
+register(2, sniff_horiba, 'datatypes.maps2d.horiba', 'Horiba2D')
+
+# .dat2 files are acquired in the J. Vuckovic group at Stanford
+register(2, sniff_vuckovic, 'datatypes.maps2d.vuckovic', 'Vuckovic2D')
@@ -0,0 +1,120 @@
+# general imports
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import json
+import numpy
+import os
+# datatype imports
+from datatypes import LoadingCancelled
+
+# number of spectrum files which are read at the same time
+max_workers = 16
+
+# version of the .npy cache, caches with another version are rebuilt
+cache_version = 1
+
+
+def read_spectrum(file_name):
+
+    # load the spectrum and convert the wavelengths into energies
+    spectrum = numpy.loadtxt(file_name)
+    spectrum[:, 0] = 1e-9 * 1239.841842144513 / spectrum[:, 0]
+
+    return numpy.flipud(spectrum)
+
+
+def read_spectra(file_names, pixels, energies, spectra, progress=None):
+
+    # spectra whose energies differ from the given energy axis
+    differing_energies = {}
+
+    # preview of the integrated counts which is reported with the progress, pixels which are not read yet are NaN
+    preview = numpy.full(spectra.shape[:-1], numpy.nan)
+
+    # read a spectrum file and write its counts to its pixel in the spectra array
+    def read_pixel(i_file):
+        spectrum = read_spectrum(file_names[i_file])
+        spectra[pixels[i_file]] = spectrum[:, 1]
+        preview[pixels[i_file]] = numpy.sum(spectrum[:, 1])
+        if not numpy.array_equal(spectrum[:, 0], energies):
+            differing_energies[pixels[i_file]] = spectrum[:, 0]
+
+    # read the spectrum files in a thread pool since the time is dominated by file access
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = []
+    try:
+
+        # submit all files and wait for them while reporting the progress
+        futures = [executor.submit(read_pixel, i_file) for i_file in range(len(file_names))]
+        for n_done, future in enumerate(as_completed(futures), 1):
+            future.result()
+
+            # the progress callback returns False if the loading was cancelled
+            if progress is not None and progress(n_done, len(file_names), preview) is False:
+                raise LoadingCancelled()
+
+    finally:
+
+        # drop all files which have not been read yet
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+    # only use per-pixel energy axes if the spectrum files have different ones
+    if len(differing_energies) > 0:
+        energies = numpy.tile(energies, spectra.shape[:-1] + (1,))
+        for pixel, pixel_energies in differing_energies.items():
+            energies[pixel] = pixel_energies
+
+    return energies
+
+
+def create_manifest(file_names, shape, dtype):
+
+    # summarize the number, sizes and modification times of the files the cache is built from
+    size = 0
+    mtime = 0
+    for file_name in file_names:
+        file_stat = os.stat(file_name)
+        size += file_stat.st_size
+        mtime = max(mtime, file_stat.st_mtime)
+
+    return {'version': cache_version, 'shape': list(shape), 'dtype': str(numpy.dtype(dtype)), 'files': len(file_names),
+            'size': size, 'mtime': mtime}
+
+
+def load_cache(cache_name, manifest):
+
+    # check if the cache and its manifest exist
+    energies_name = cache_name[:-4] + '_energies.npy'
+    manifest_name = cache_name[:-4] + '.json'
+    if not os.path.isfile(cache_name) or not os.path.isfile(energies_name) or not os.path.isfile(manifest_name):
+        return None
+
+    # check if the cache was built from the same files
+    with open(manifest_name) as manifest_file:
+        try:
+            cached_manifest = json.load(manifest_file)
+        except ValueError:
+            return None
+    if cached_manifest != manifest:
+        return None
+
+    # map the cache copy-on-write, changes to the spectra are kept in memory and never written to the cache
+    return numpy.load(energies_name, mmap_mode='c'), numpy.load(cache_name, mmap_mode='c')
+
+
+def save_cache(cache_name, energies, spectra, manifest):
+
+    # write the cache before its manifest so that an interrupted write is never taken as valid
+    energies_name = cache_name[:-4] + '_energies.npy'
+    manifest_name = cache_name[:-4] + '.json'
+    try:
+        if os.path.isfile(manifest_name):
+            os.remove(manifest_name)
+        numpy.save(cache_name, spectra)
+        numpy.save(energies_name, energies)
+        with open(manifest_name, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+    except OSError:
+        # the data directory might be read-only, the map is simply not cached then
+        pass
@@ -0,0 +1,206 @@
+# general imports
+from concurrent.futures import ThreadPoolExecutor
+import numpy
+import zlib
+# datatype imports
+from datatypes.project import compression_level, max_workers
+
+# number of bytes of an array which are compressed into one block
+block_bytes = 4 * 1024 ** 2
+
+
+def compress_block(values):
+
+    # the bytes of the values are shuffled so that bytes of the same significance follow each other, which lets zlib
+    # compress floating point counts much better
+    shuffled = values.view(numpy.uint8).reshape((-1, values.itemsize)).T
+    return zlib.compress(numpy.ascontiguousarray(shuffled).tobytes(), compression_level)
+
+
+def decompress_block(block, values):
+
+    # decompress the block directly into its values
+    shuffled = numpy.frombuffer(zlib.decompress(block), dtype=numpy.uint8).reshape((values.itemsize, -1))
+    values.view(numpy.uint8).reshape((-1, values.itemsize))[:] = shuffled.T
+
+
+def difference(previous, current):
+
+    # the bitwise difference of the values before and after a change turns either of them into the other one, values
+    # which have not been changed have no difference and compress to almost nothing
+    integer_type = numpy.dtype('u%d' % previous.dtype.itemsize)
+    return numpy.bitwise_xor(numpy.ascontiguousarray(previous).view(integer_type),
+                             numpy.ascontiguousarray(current).view(integer_type))
+
+
+def pack_array(array, executor):
+
+    # compress the array in blocks in parallel
+    array = numpy.ascontiguousarray(array)
+    flat = array.reshape(-1)
+    n_values = max(1, block_bytes // array.itemsize)
+    blocks = list(executor.map(compress_block, [flat[start:start+n_values] for start in range(0, flat.size, n_values)]))
+    return {'shape': array.shape, 'dtype': array.dtype, 'blocks': blocks}
+
+
+def unpack_array(packed, executor):
+
+    # decompress the blocks in parallel into a new array
+    array = numpy.empty(packed['shape'], dtype=packed['dtype'])
+    flat = array.reshape(-1)
+    n_values = max(1, block_bytes // array.itemsize)
+    list(executor.map(decompress_block, packed['blocks'],
+                      [flat[start:start+n_values] for start in range(0, flat.size, n_values)]))
+    return array
+
+
+class History:
+
+    """
+    History
+    The history keeps the changes of the spectra as compressed diffs of the changed pixels so that they can be undone
+    and redone. Steps which exceed the memory budget are evicted, the oldest first.
+    """
+
+    # maximum number of bytes of the compressed diffs of all steps
+    history_bytes = 256 * 1024 ** 2
+
+    def __init__(self):
+
+        # create all variables
+        self._undo_steps = []   # steps which can be undone, the latest last
+        self._redo_steps = []   # steps which can be redone, the latest undone last
+        self._step = None       # the step which is recorded at the moment
+        self._depth = 0         # the number of nested steps which are recorded at the moment
+        self._n_bytes = 0       # the number of bytes of the compressed diffs of all steps
+
+    def apply_step(self, step, exchange, reverse):
+
+        # apply the diffs of the step, the latest first if the step is undone, the exchange toggles the values of the
+        # pixels given by the index between their values before and after the step
+        for diff in (reversed(step['diffs']) if reverse else step['diffs']):
+            exchange(*self.unpack(diff))
+
+    def begin_step(self, name):
+
+        # all changes until the matching end are recorded as one step, nested steps belong to the outermost step
+        if self._depth == 0:
+            self._step = {'name': name, 'diffs': [], 'n_bytes': 0, 'complete': True}
+        self._depth += 1
+
+    def can_redo(self):
+
+        # return whether there is a step which can be redone
+        return len(self._redo_steps) > 0
+
+    def can_undo(self):
+
+        # return whether there is a step which can be undone
+        return len(self._undo_steps) > 0
+
+    def clear(self):
+
+        # drop all steps, e.g. after the spectra have been replaced or laid out anew
+        self._undo_steps = []
+        self._redo_steps = []
+        self._n_bytes = 0
+        if self._step is not None:
+            self._step['diffs'] = []
+            self._step['n_bytes'] = 0
+            self._step['complete'] = False
+
+    def end_step(self):
+
+        # return whether the outermost step has been completed
+        self._depth -= 1
+        if self._depth > 0:
+            return False
+        step = self._step
+        self._step = None
+
+        # a step which could not be recorded completely cannot be undone, neither can the steps before it
+        if not step['complete']:
+            self.clear()
+        elif len(step['diffs']) > 0:
+            self._undo_steps.append(step)
+            self._n_bytes += step['n_bytes']
+            self.evict()
+        return True
+
+    def evict(self):
+
+        # drop the oldest steps until the diffs fit into the memory budget, the steps which can be redone are dropped
+        # before the steps which can be undone
+        n_recording = 0 if self._step is None else self._step['n_bytes']
+        while self._n_bytes + n_recording > self.history_bytes and len(self._redo_steps) > 0:
+            self._n_bytes -= self._redo_steps.pop(0)['n_bytes']
+        while self._n_bytes + n_recording > self.history_bytes and len(self._undo_steps) > 0:
+            self._n_bytes -= self._undo_steps.pop(0)['n_bytes']
+
+    def get_footprint(self):
+
+        # return the number of bytes of the compressed diffs of all steps
+        return self._n_bytes
+
+    def get_redo_name(self):
+
+        # return the name of the step which is redone next
+        return self._redo_steps[-1]['name'] if self.can_redo() else ''
+
+    def get_undo_name(self):
+
+        # return the name of the step which is undone next
+        return self._undo_steps[-1]['name'] if self.can_undo() else ''
+
+    @staticmethod
+    def pack(index, previous, current):
+
+        # compress the index of the changed pixels and the differences of their values
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            diff = {'index': [pack_array(axis_index, executor) for axis_index in index],
+                    'values': {name: pack_array(difference(previous[name], current[name]), executor)
+                               for name in previous.keys()}}
+        diff['n_bytes'] = sum(len(block) for packed in diff['index'] + list(diff['values'].values())
+                              for block in packed['blocks'])
+        return diff
+
+    def redo(self, exchange):
+
+        # redo the step which has been undone last, the same diffs undo it again
+        step = self._redo_steps.pop()
+        self.apply_step(step, exchange, False)
+        self._undo_steps.append(step)
+
+    def record(self, index, previous, current):
+
+        # a new change cannot be combined with the steps which have been undone
+        self._n_bytes -= sum(step['n_bytes'] for step in self._redo_steps)
+        self._redo_steps = []
+
+        # add the diff to the recorded step unless the step already exceeded the memory budget
+        if not self._step['complete']:
+            return
+        diff = self.pack(index, previous, current)
+        self._step['diffs'].append(diff)
+        self._step['n_bytes'] += diff['n_bytes']
+        self.evict()
+        if self._step['n_bytes'] > self.history_bytes:
+            self._step['diffs'] = []
+            self._step['n_bytes'] = 0
+            self._step['complete'] = False
+
+    def undo(self, exchange):
+
+        # undo the latest step, the same diffs redo it
+        step = self._undo_steps.pop()
+        self.apply_step(step, exchange, True)
+        self._redo_steps.append(step)
+
+    @staticmethod
+    def unpack(diff):
+
+        # decompress the index of the changed pixels and the differences of their values
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            index = tuple(unpack_array(packed, executor) for packed in diff['index'])
+            values = {name: unpack_array(packed, executor) for name, packed in diff['values'].items()}
+        return index, values
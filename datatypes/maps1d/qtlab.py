@@ -1,17 +1,20 @@
-# import PyQt5 elements
-from PyQt5.QtWidgets import QProgressDialog, QApplication
-from PyQt5.QtCore import Qt
 # general imports
 import numpy
 from os import path
+# datatype imports
+from datatypes import create_spectra
+from datatypes.asc import create_manifest, load_cache, read_spectra, read_spectrum, save_cache
+
 
 class QtLab1D:
 
-    def __init__(self, file_name):
+    def __init__(self, file_name, dtype='float64', store_name=None):
 
         self._file_name = file_name
+        self._dtype = dtype
+        self._store_name = store_name
 
-    def load_data(self):
+    def load_data(self, progress=None):
 
         # get the directory from path
         dir_name = path.dirname(self._file_name)
@@ -22,12 +25,11 @@ class QtLab1D:
         # read the number of pixels
         nx = int(file_data[-1, 0]) + 1
 
-        # read the resolution of the CCD from the first spectrum file
-        spectrum = numpy.loadtxt(dir_name + '/spectrum_0.asc')
-        resolution = len(spectrum)
+        # read the energies and the resolution of the CCD from the first spectrum file
+        energies = read_spectrum(dir_name + '/spectrum_0.asc')[:, 0]
+        resolution = len(energies)
 
         # create variables for the data
-        spectra = numpy.zeros((nx, resolution, 2))
         data = numpy.zeros((file_data.shape[1]-1, nx))
 
         # read column names and map name
@@ -42,39 +44,30 @@ class QtLab1D:
                     next_split = file_lines[i_line + 1].split()
                     data_names[int(line_split[2][:-1])-2] = ' '.join(next_split[2:])
 
-        # check if there are .npy files available to accelerate the loading procedure
-        if path.isfile(dir_name + '/spectra.npy') and path.isfile(dir_name + '/energies.npy'):
+        # read other quantities
+        for ix in range(nx):
+            data[:, ix] = file_data[ix, 1:]
 
-            # load data from npy files
-            spectra[:, :, 0] = numpy.load(dir_name + '/energies.npy')
-            spectra[:, :, 1] = numpy.load(dir_name + '/spectra.npy')
+        # list the spectrum files
+        file_names = [dir_name + '/spectrum_' + str(ix) + '.asc' for ix in range(nx)]
+        pixels = list(range(nx))
 
-            # read other quantities
-            for ix in range(nx):
-                data[:, ix] = file_data[ix, 1:]
+        # check if there is a valid .npy cache available to accelerate the loading procedure
+        manifest = create_manifest([self._file_name] + file_names, (nx, resolution), self._dtype)
+        cache = load_cache(dir_name + '/spectra.npy', manifest)
+        if cache is not None:
+            energies, spectra = cache
 
-        # if no .npy files are available the spectra need to be loaded from .asc files
+        # if no valid cache is available the spectra need to be loaded from .asc files
         else:
 
-            # create progressbar dialog
-            progress_dialog = QProgressDialog('', '', 0, nx,
-                                              QApplication.instance().windows['mapWindow'])
-            progress_dialog.setWindowTitle('Loading Map')
-            progress_dialog.setWindowModality(Qt.WindowModal)
-            progress_dialog.setCancelButton(None)
-            progress_dialog.show()
-
-            # read data
-            for ix in range(nx):
-                spectrum = numpy.loadtxt(dir_name + '/spectrum_' + str(ix) + '.asc')
-                spectrum[:, 0] = 1e-9 * 1239.841842144513 / spectrum[:, 0]
-                spectrum = numpy.flipud(spectrum)
-                spectra[ix, :, :] = spectrum
-                data[:, ix] = file_data[ix, 1:]
-                progress_dialog.setValue(ix + 1)
-
-            # save .npy files for the next time the map is loaded
-            numpy.save(dir_name + '/energies.npy', spectra[:, :, 0])
-            numpy.save(dir_name + '/spectra.npy', spectra[:, :, 1])
-
-        return map_name, spectra, data_names, data
+            # create variable for the spectra
+            spectra = create_spectra((nx, resolution), self._dtype, self._store_name)
+
+            # read spectra from the .asc files in parallel while reporting the progress
+            energies = read_spectra(file_names, pixels, energies, spectra, progress)
+
+            # save the .npy cache for the next time the map is loaded
+            save_cache(dir_name + '/spectra.npy', energies, spectra, manifest)
+
+        return map_name, energies, spectra, data_names, data
@@ -1,15 +1,23 @@
 # general imports
+import itertools
 import numpy
 from os import path
+# datatype imports
+from datatypes import create_spectra, LoadingCancelled
 
 
 class Horiba2D:
 
-    def __init__(self, file_name):
+    # number of pixels which are parsed at once
+    chunk_size = 256
+
+    def __init__(self, file_name, dtype='float64', store_name=None):
 
         self._file_name = file_name
+        self._dtype = dtype
+        self._store_name = store_name
 
-    def load_data(self):
+    def load_data(self, progress=None):
 
         # get the directory from path
         dir_name = path.dirname(self._file_name)
@@ -17,59 +25,88 @@ class Horiba2D:
         # set map name to the file name
         map_name = self._file_name[len(dir_name)+1:-4]
 
-        # read text file
-        file_data = open(self._file_name)
-        data_lines = file_data.readlines()
-
-        # convert the data into numpy arrays
-        data_list = []
-        for i_line in range(len(data_lines)):
-            # check if the line is a comment
-            if data_lines[i_line][0] == '#':
-                continue
-            else:
-                data_list.append(data_lines[i_line].split('\t'))
-
-        # the first line of the text file includes the energies of the spectra
-        energies = numpy.array(data_list[0][2:], dtype='float64')
-        del data_list[0]
+        # open text file
+        with open(self._file_name) as file_data:
+
+            # the first line which is not a comment includes the energies of the spectra, all further lines which are
+            # not comments are pixels starting with their x and y positions, only the lines are counted here and the
+            # leading pixels which share the first x position give the number of y positions for the preview
+            energies = None
+            n_pixels = 0
+            first_x = None
+            ny = 0
+            for line in file_data:
+                if line[0] == '#' or line.strip() == '':
+                    continue
+                elif energies is None:
+                    energies = numpy.array(line.split('\t')[2:], dtype='float64')
+                else:
+                    n_pixels += 1
+                    if n_pixels == ny + 1:
+                        x_position = line.split('\t', 1)[0]
+                        if first_x is None:
+                            first_x = x_position
+                        if x_position == first_x:
+                            ny += 1
+
+            # set the resolution to the number of pixels of the CCD
+            resolution = len(energies)
+
+            # map shape which is assumed until all positions are read, the pixels are ordered with x as the outer index
+            ny = max(ny, 1)
+            nx = -(-n_pixels // ny)
+
+            # create data structures for intensities and positions which are filled pixel by pixel
+            spectra = create_spectra((n_pixels, resolution), self._dtype, self._store_name)
+            positions = numpy.zeros((n_pixels, 2))
+            integrals = numpy.zeros(n_pixels)
+
+            # preview of the integrated counts which is reported with the progress, pixels which are not read yet
+            # are NaN
+            preview = numpy.full((nx, ny), numpy.nan)
+
+            # go back to the line after the energies
+            file_data.seek(0)
+            for line in file_data:
+                if line[0] != '#' and line.strip() != '':
+                    break
+
+            # parse the pixels chunk by chunk directly into the spectra array
+            i_px = 0
+            while i_px < n_pixels:
+                chunk = numpy.loadtxt(itertools.islice(file_data, self.chunk_size), delimiter='\t',
+                                      comments='#', dtype='float64', ndmin=2)
+                n_chunk = chunk.shape[0]
+                spectra[i_px:i_px+n_chunk, :] = chunk[:, :1:-1]
+                positions[i_px:i_px+n_chunk, :] = chunk[:, :2]
+                integrals[i_px:i_px+n_chunk] = numpy.sum(spectra[i_px:i_px+n_chunk, :], axis=1, dtype='float64')
+                preview.reshape(-1)[i_px:i_px+n_chunk] = integrals[i_px:i_px+n_chunk][:max(0, nx*ny-i_px)]
+                i_px += n_chunk
+
+                # the progress callback returns False if the loading was cancelled
+                if progress is not None and progress(i_px, n_pixels, preview) is False:
+                    raise LoadingCancelled()
 
         # check if data is given in eV or nm TODO: read this from the .txt file
         if numpy.mean(energies) > 100:
             energies = 1239.841842144513 / energies
+        energies = numpy.flipud(energies)
+
+        # get map shape from the unique x and y positions, each position of the map needs exactly one pixel
+        nx = len(numpy.unique(positions[:, 0]))
+        ny = len(numpy.unique(positions[:, 1]))
+        if nx*ny != n_pixels:
+            raise ValueError(path.basename(self._file_name) + ' includes ' + str(n_pixels) + ' spectra for a map of ' +
+                             str(nx) + ' x ' + str(ny) + ' positions.')
+
+        # reshape the pixels into the map, the pixels are ordered with x as the outer index
+        spectra = spectra.reshape((nx, ny, resolution))
 
-        # set the resolution to the number of pixels of the CCD
-        resolution = len(energies)
-
-        # convert the list into a numpy array
-        data_array = numpy.array(data_list, dtype='float64')
-
-        # get map shape
-        x_positions = []
-        y_positions = []
-        for i_px in range(len(data_array)):
-            if data_array[i_px, 0] not in x_positions:
-                x_positions.append(data_array[i_px, 0])
-            if data_array[i_px, 1] not in y_positions:
-                y_positions.append(data_array[i_px, 1])
-        nx = len(x_positions)
-        ny = len(y_positions)
-
-        # create data structures for spectra and position data
-        spectra = numpy.zeros((nx, ny, resolution, 2))
+        # create data structure for the position data
         data_names = {0: 'intensity', 1: 'x position', 2: 'y position'}
         data = numpy.zeros((3, nx, ny))
+        data[0] = integrals.reshape((nx, ny))
+        data[1] = positions[:, 0].reshape((nx, ny))
+        data[2] = positions[:, 1].reshape((nx, ny))
 
-        # read spectra and position data
-        i_px = 0
-        for ix in range(nx):
-            for iy in range(ny):
-                spectra[ix, iy, :, 0] = numpy.flipud(energies)
-                spectra[ix, iy, :, 1] = numpy.flipud(data_array[i_px, 2:])
-                data[0, ix, iy] = numpy.sum(spectra[ix, iy, :, 1])
-                data[1, ix, iy] = data_array[i_px, 0]
-                data[2, ix, iy] = data_array[i_px, 1]
-                i_px += 1
-
-        return map_name, spectra, data_names, data
-    
+        return map_name, energies, spectra, data_names, data
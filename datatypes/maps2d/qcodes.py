@@ -1,19 +1,20 @@
-# import PyQt5 elements
-from PyQt5.QtWidgets import QProgressDialog, QApplication
-from PyQt5.QtCore import Qt
 # general imports
 import numpy
 from os import path
 import pandas
+# datatype imports
+from datatypes import compact_energies, create_spectra
 
 
 class QCoDeS2D:
 
-    def __init__(self, file_name):
+    def __init__(self, file_name, dtype='float64', store_name=None):
 
         self._file_name = file_name
+        self._dtype = dtype
+        self._store_name = store_name
 
-    def load_data(self):
+    def load_data(self, progress=None):
 
         # get the directory from path
         dir_name = path.dirname(self._file_name)
@@ -21,34 +22,31 @@ class QCoDeS2D:
         #  load the data file
         df = pandas.read_pickle(self._file_name)
 
-        # read the number of pixels
-        v_x = numpy.sort(numpy.array(list(set(numpy.array(df.index.tolist())[:,0]))))
-        v_y = numpy.sort(numpy.array(list(set(numpy.array(df.index.tolist())[:,1]))))
+        # read the number of pixels from the sorted unique values of the x and y index levels
+        v_x = numpy.unique(df.index.get_level_values(0).to_numpy())
+        v_y = numpy.unique(df.index.get_level_values(1).to_numpy())
         nx = len(v_x)
         ny = len(v_y)
 
-        # read the resolution of the CCD from the first spectrum file
-        resolution = 1024
+        # the resolution of the CCD is the number of rows per pixel
+        resolution = len(df) // (nx * ny)
 
         # create variables for the data
-        spectra = numpy.zeros((nx, ny, resolution, 2))
         data = numpy.zeros((2, nx, ny))
 
         # read column names and map name
         data_names = {0: 'x voltage', 1: 'y voltage'}
         map_name = 'blub'
 
-        # read spectra
-        data_energies = numpy.array(df.index.tolist())[:,2]
-        data_energies.shape = (nx, ny, resolution)
-        data_spectra = numpy.array(df.values.tolist())
-        data_spectra.shape = (nx, ny, resolution)
-        spectra[:, :, :, 0] = 1239.841842144513 / data_energies
-        spectra[:, :, :, 1] = data_spectra
+        # read spectra, the rows are ordered with x as the outer, y as the middle and the energy as the inner index
+        data_energies = df.index.get_level_values(2).to_numpy(dtype='float64').reshape((nx, ny, resolution))
+        energies = compact_energies(1239.841842144513 / data_energies)
+        spectra = create_spectra((nx, ny, resolution), self._dtype, self._store_name)
+        spectra[:, :, :] = df.to_numpy().reshape((nx, ny, resolution))
 
         # read data
         grid = numpy.meshgrid(v_x, v_y)
         data[0, :, :] = grid[0].transpose()
         data[1, :, :] = grid[1].transpose()
 
-        return map_name, spectra, data_names, data
+        return map_name, energies, spectra, data_names, data
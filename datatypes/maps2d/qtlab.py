@@ -1,18 +1,25 @@
-# import PyQt5 elements
-from PyQt5.QtWidgets import QProgressDialog, QApplication
-from PyQt5.QtCore import Qt
 # general imports
 import numpy
+import os
 from os import path
+import time
+# datatype imports
+from datatypes import create_spectra
+from datatypes.asc import create_manifest, load_cache, read_spectra, read_spectrum, save_cache
+
+# number of seconds after which a spectrum file of a running scan is taken as complete even if it was seen only once
+settle_time = 1.0
 
 
 class QtLab2D:
 
-    def __init__(self, file_name):
+    def __init__(self, file_name, dtype='float64', store_name=None):
 
         self._file_name = file_name
+        self._dtype = dtype
+        self._store_name = store_name
 
-    def load_data(self):
+    def load_data(self, progress=None):
 
         # get the directory from path
         dir_name = path.dirname(self._file_name)
@@ -27,12 +34,11 @@ class QtLab2D:
             nx -= 1
             ny = file_data[-1 - ny, 2]
 
-        # read the resolution of the CCD from the first spectrum file
-        spectrum = numpy.loadtxt(dir_name + '/spectrum_0_0.asc')
-        resolution = len(spectrum)
+        # read the energies and the resolution of the CCD from the first spectrum file
+        energies = read_spectrum(dir_name + '/spectrum_0_0.asc')[:, 0]
+        resolution = len(energies)
 
         # create variables for the data
-        spectra = numpy.zeros((nx, ny, resolution, 2))
         data = numpy.zeros((file_data.shape[1] - 3, nx, ny))
 
         # read column names and map name
@@ -47,41 +53,138 @@ class QtLab2D:
                     next_split = file_lines[i_line + 1].split()
                     data_names[int(line_split[2][:-1]) - 4] = ' '.join(next_split[2:])
 
-        # check if there are .npy files available to accelerate the loading procedure
-        if path.isfile(dir_name + '/spectra.npy') and path.isfile(dir_name + '/energies.npy'):
+        # read other quantities
+        for ix in range(nx):
+            for iy in range(ny):
+                data[:, ix, iy] = file_data[ix * ny + iy, 3:]
+
+        # list the spectrum files
+        file_names = []
+        pixels = []
+        for ix in range(nx):
+            for iy in range(ny):
+                file_names.append(dir_name + '/spectrum_' + str(ix) + '_' + str(iy) + '.asc')
+                pixels.append((ix, iy))
+
+        # check if there is a valid .npy cache available to accelerate the loading procedure
+        manifest = create_manifest([self._file_name] + file_names, (nx, ny, resolution), self._dtype)
+        cache = load_cache(dir_name + '/spectra.npy', manifest)
+        if cache is not None:
+            energies, spectra = cache
+
+        # if no valid cache is available the spectra need to be loaded from .asc files
+        else:
 
-            # load data from npy files
-            spectra[:, :, :, 0] = numpy.load(dir_name + '/energies.npy')
-            spectra[:, :, :, 1] = numpy.load(dir_name + '/spectra.npy')
+            # create variable for the spectra
+            spectra = create_spectra((nx, ny, resolution), self._dtype, self._store_name)
 
-            # read other quantities
-            for ix in range(nx):
-                for iy in range(ny):
-                    data[:, ix, iy] = file_data[ix * ny + iy, 3:]
+            # read spectra from the .asc files in parallel while reporting the progress
+            energies = read_spectra(file_names, pixels, energies, spectra, progress)
 
-        # if no .npy files are available the spectra need to be loaded from .asc files
-        else:
+            # save the .npy cache for the next time the map is loaded
+            save_cache(dir_name + '/spectra.npy', energies, spectra, manifest)
+
+        return map_name, energies, spectra, data_names, data
+
+
+class QtLab2DScan:
+
+    """
+    QtLab2DScan
+    Follows a running QtLab scan and reads its spectrum files as they are written.
+    """
+
+    def __init__(self, file_name, nx, ny, dtype='float64', store_name=None):
+
+        self._file_name = file_name
+        self._dir_name = path.dirname(file_name)
+        self._nx = nx
+        self._ny = ny
+        self._dtype = dtype
+        self._store_name = store_name
 
-            # create progressbar dialog
-            progress_dialog = QProgressDialog('', '', 0, nx * ny,
-                                              QApplication.instance().windows['mapWindow'])
-            progress_dialog.setWindowTitle('Loading Map')
-            progress_dialog.setWindowModality(Qt.WindowModal)
-            progress_dialog.setCancelButton(None)
-            progress_dialog.show()
-
-            # read data
-            for ix in range(nx):
-                for iy in range(ny):
-                    spectrum = numpy.loadtxt(dir_name + '/spectrum_' + str(ix) + '_' + str(iy) + '.asc')
-                    spectrum[:, 0] = 1e-9 * 1239.841842144513 / spectrum[:, 0]
-                    spectrum = numpy.flipud(spectrum)
-                    spectra[ix, iy, :, :] = spectrum
-                    data[:, ix, iy] = file_data[ix * ny + iy, 3:]
-                    progress_dialog.setValue(ix * ny + iy + 1)
-
-            # save .npy files for the next time the map is loaded
-            numpy.save(dir_name + '/energies.npy', spectra[:, :, :, 0])
-            numpy.save(dir_name + '/spectra.npy', spectra[:, :, :, 1])
-
-        return map_name, spectra, data_names, data
+        # the energies and resolution of the CCD are known once the first spectrum has been read
+        self._energies = None
+
+        # spectrum files which have been read and the sizes of the files seen by the last poll
+        self._read = set()
+        self._sizes = {}
+
+        # spectrum files which have been read but were left out since their energies differ from the ones of the map
+        self._rejected = []
+
+    def get_rejected(self):
+
+        # return the spectrum files which have been left out of the map
+        return self._rejected
+
+    def is_complete(self):
+
+        # the scan is complete once every pixel has been read
+        return len(self._read) == self._nx * self._ny
+
+    def load_data(self, progress=None):
+
+        # read the energies and the resolution of the CCD from the first spectrum file
+        if not path.isfile(self._dir_name + '/spectrum_0_0.asc'):
+            raise ValueError('The scan has not written its first spectrum yet.')
+        self._energies = read_spectrum(self._dir_name + '/spectrum_0_0.asc')[:, 0]
+        resolution = len(self._energies)
+
+        # the data file is still being written, so only the spectra are followed
+        map_name = path.basename(self._file_name)[:-4]
+        data_names = {}
+        data = numpy.zeros((0, self._nx, self._ny))
+
+        # create variable for the spectra, pixels which have not been scanned yet are NaN
+        spectra = create_spectra((self._nx, self._ny, resolution), self._dtype, self._store_name)
+        spectra[:, :, :] = numpy.nan
+
+        # read the spectra which have been written so far
+        pixels, counts = self.poll(progress)
+        for i_pixel, pixel in enumerate(pixels):
+            spectra[pixel] = counts[i_pixel]
+
+        return map_name, self._energies, spectra, data_names, data
+
+    def poll(self, progress=None):
+
+        # list the spectrum files which have not been read yet, a file is taken as complete once it has not changed
+        # since the last poll or has not been modified for settle_time seconds
+        now = time.time()
+        sizes = {}
+        file_names = []
+        pixels = []
+        with os.scandir(self._dir_name) as entries:
+            for entry in entries:
+                if not entry.name.startswith('spectrum_') or entry.name[-4:] != '.asc' or entry.name in self._read:
+                    continue
+                try:
+                    ix, iy = [int(i) for i in entry.name[9:-4].split('_')]
+                except ValueError:
+                    continue
+                if ix >= self._nx or iy >= self._ny:
+                    continue
+                entry_stat = entry.stat()
+                if self._sizes.get(entry.name) == entry_stat.st_size or now - entry_stat.st_mtime >= settle_time:
+                    file_names.append(entry.name)
+                    pixels.append((ix, iy))
+                else:
+                    sizes[entry.name] = entry_stat.st_size
+        self._sizes = sizes
+
+        # read the new spectrum files in parallel, the counts are returned in the order of the pixels
+        counts = numpy.zeros((len(file_names), len(self._energies)), dtype=self._dtype)
+        energies = read_spectra([self._dir_name + '/' + file_name for file_name in file_names],
+                                list(range(len(file_names))), self._energies, counts, progress)
+        self._read.update(file_names)
+
+        # the spectra share the energy axis of the map, spectra whose energies differ would be placed on the wrong
+        # energies, so they are rejected and their pixels stay empty
+        if energies.ndim > 1:
+            matching = numpy.all(energies == self._energies, axis=-1)
+            self._rejected += [file_name for file_name, match in zip(file_names, matching) if not match]
+            pixels = [pixel for pixel, match in zip(pixels, matching) if match]
+            counts = counts[matching]
+
+        return pixels, counts
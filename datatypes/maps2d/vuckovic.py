@@ -1,15 +1,19 @@
 # general imports
 import numpy
 from os import path
+# datatype imports
+from datatypes import create_spectra
 
 
 class Vuckovic2D:
 
-    def __init__(self, file_name):
+    def __init__(self, file_name, dtype='float64', store_name=None):
 
         self._file_name = file_name
+        self._dtype = dtype
+        self._store_name = store_name
 
-    def load_data(self):
+    def load_data(self, progress=None):
 
         # get the directory from path
         dir_name = path.dirname(self._file_name)
@@ -25,15 +29,13 @@ class Vuckovic2D:
         ny = file_data.shape[1]
 
         # create data structures for spectra and position data
-        spectra = numpy.zeros((nx, ny, 1, 2))
+        energies = numpy.zeros(1)
+        spectra = create_spectra((nx, ny, 1), self._dtype, self._store_name)
         data_names = {0: 'intensity'}
         data = numpy.zeros((1, nx, ny))
 
         # read intensities
-        for ix in range(nx):
-            for iy in range(ny):
-                    spectra[ix, iy, :, 0] = 0
-                    spectra[ix, iy, :, 1] = file_data[ix, iy]
-                    data[0, ix, iy] = file_data[ix, iy]
+        spectra[:, :, 0] = file_data
+        data[0, :, :] = file_data
 
-        return map_name, spectra, data_names, data
+        return map_name, energies, spectra, data_names, data
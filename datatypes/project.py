@@ -0,0 +1,203 @@
+# general imports
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import json
+import numpy
+import os
+import shutil
+import zipfile
+import zlib
+# datatype imports
+from datatypes import create_spectra, LoadingCancelled
+
+# version of the project format, projects written by a newer version cannot be read
+project_version = 1
+
+# number of bytes of an array which are compressed into one chunk
+chunk_bytes = 16 * 1024 ** 2
+
+# number of chunks which are compressed or decompressed at the same time
+max_workers = os.cpu_count() or 4
+
+# zlib compression level, low levels are much faster and compress counts almost as well as high ones
+compression_level = 1
+
+# fraction of a project taken up by superseded chunks above which the project is compacted with the next save
+compaction_fraction = 0.5
+
+
+def is_project(file_name):
+
+    # projects are zip containers, older .py2ds files are pickled maps
+    return zipfile.is_zipfile(file_name)
+
+
+def read_manifest(project_file):
+
+    # every save adds a manifest with a higher generation, the one with the highest generation is the current one
+    manifest_names = [name for name in project_file.namelist() if name.startswith('manifest.')]
+    if len(manifest_names) == 0:
+        raise ValueError('The file is not a Py2DSpectroscopy project.')
+    manifest_name = max(manifest_names, key=lambda name: int(name.split('.')[1]))
+    manifest = json.loads(project_file.read(manifest_name).decode('utf-8'))
+
+    # check if the project can be read by this version
+    if manifest['version'] > project_version:
+        raise ValueError('The project was saved by a newer version of Py2DSpectroscopy.')
+
+    return manifest
+
+
+def load_manifest(file_name):
+
+    # return the current manifest which describes the metadata and the arrays of the project
+    with zipfile.ZipFile(file_name) as project_file:
+        return read_manifest(project_file)
+
+
+def compress_chunk(array, start, stop):
+
+    # reading the chunk from memory-mapped arrays happens here as well, so disk access is parallelized too
+    return zlib.compress(numpy.ascontiguousarray(array[start:stop]).tobytes(), compression_level)
+
+
+def decompress_chunk(project_file, member_name, array, start, stop):
+
+    # decompress the chunk directly into its rows of the array
+    chunk = numpy.frombuffer(zlib.decompress(project_file.read(member_name)), dtype=array.dtype)
+    array[start:stop] = chunk.reshape((stop - start,) + array.shape[1:])
+
+
+def get_member_bytes(project_file, member_names):
+
+    # return the number of bytes the members take up in the project
+    return sum(project_file.getinfo(member_name).compress_size for member_name in member_names)
+
+
+def save_project(file_name, metadata, arrays, append=False):
+
+    # groups whose chunks are copied from the old project if it is compacted
+    kept_groups = {}
+
+    # in the append mode only the given groups are written, all other groups are taken from the current manifest, the
+    # chunks of the given groups and the current manifest are superseded and only take up space from now on, the
+    # project is copied to a temporary file which is appended to, appending to the project itself would overwrite its
+    # central directory and a crash during the save would leave no readable project
+    if append:
+        with zipfile.ZipFile(file_name) as project_file:
+            manifest = read_manifest(project_file)
+            stale_bytes = manifest.get('stale_bytes', 0)
+            stale_bytes += get_member_bytes(project_file, ['manifest.%d.json' % manifest['generation']])
+            for group in arrays.keys():
+                for entry in manifest['groups'].get(group, {}).values():
+                    stale_bytes += get_member_bytes(project_file, entry['chunks'])
+        manifest['generation'] += 1
+        manifest['version'] = project_version
+        manifest['stale_bytes'] = stale_bytes
+        write_name = file_name + '.tmp'
+        mode = 'a'
+
+        # once the superseded chunks take up a large part of the project, it is compacted by writing a new project with
+        # the current chunks only, the chunks of the unchanged groups are copied without compressing them again
+        if stale_bytes > compaction_fraction * os.path.getsize(file_name):
+            kept_groups = {group: entries for group, entries in manifest['groups'].items() if group not in arrays}
+            manifest['stale_bytes'] = 0
+            mode = 'w'
+
+    # otherwise a new project is written to a temporary file which replaces the old file once it is complete
+    else:
+        manifest = {'format': 'py2ds', 'version': project_version, 'generation': 0, 'stale_bytes': 0, 'groups': {}}
+        write_name = file_name + '.tmp'
+        mode = 'w'
+    manifest['metadata'] = metadata
+
+    # copy the project which is appended to
+    if mode == 'a':
+        shutil.copyfile(file_name, write_name)
+
+    with zipfile.ZipFile(write_name, mode, zipfile.ZIP_STORED) as project_file, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        # copy the chunks of the unchanged groups if the project is compacted
+        if len(kept_groups) > 0:
+            with zipfile.ZipFile(file_name) as old_project_file:
+                for entries in kept_groups.values():
+                    for entry in entries.values():
+                        for member_name in entry['chunks']:
+                            project_file.writestr(member_name, old_project_file.read(member_name))
+
+        # compressed chunks which are waiting to be written in order
+        pending = deque()
+
+        for group, group_arrays in arrays.items():
+            manifest['groups'][group] = {}
+            for name, array in group_arrays.items():
+
+                # split the array into chunks of rows
+                array = numpy.asarray(array)
+                rows = max(1, chunk_bytes // max(1, array[:1].nbytes))
+                entry = {'shape': list(array.shape), 'dtype': array.dtype.str, 'rows': rows, 'chunks': []}
+                manifest['groups'][group][name] = entry
+
+                # compress the chunks in parallel while the main thread writes them in order,
+                # only a limited number of compressed chunks is held in memory
+                for start in range(0, array.shape[0], rows):
+                    member_name = '%s/%s/%d/%d.z' % (group, name, manifest['generation'], len(entry['chunks']))
+                    entry['chunks'].append(member_name)
+                    pending.append((member_name, executor.submit(compress_chunk, array, start, start + rows)))
+                    if len(pending) > 2 * max_workers:
+                        member_name, future = pending.popleft()
+                        project_file.writestr(member_name, future.result())
+
+        # write the remaining chunks
+        while len(pending) > 0:
+            member_name, future = pending.popleft()
+            project_file.writestr(member_name, future.result())
+
+        # the manifest is written last so that an incomplete save never replaces the previous manifest
+        project_file.writestr('manifest.%d.json' % manifest['generation'], json.dumps(manifest).encode('utf-8'))
+
+    # replace the old project once the new one is complete
+    os.replace(write_name, file_name)
+
+
+def load_project(file_name, groups=None, store_names=None, progress=None):
+
+    # arrays named in store_names are decompressed into memory-mapped files instead of memory
+    if store_names is None:
+        store_names = {}
+
+    with zipfile.ZipFile(file_name) as project_file, ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        manifest = read_manifest(project_file)
+
+        # allocate all requested arrays and decompress their chunks in parallel
+        arrays = {}
+        futures = []
+        for group, entries in manifest['groups'].items():
+            if groups is not None and group not in groups:
+                continue
+            for name, entry in entries.items():
+                arrays[name] = create_spectra(tuple(entry['shape']), numpy.dtype(entry['dtype']),
+                                              store_names.get(name))
+                for i_chunk, member_name in enumerate(entry['chunks']):
+                    start = i_chunk * entry['rows']
+                    futures.append(executor.submit(decompress_chunk, project_file, member_name, arrays[name],
+                                                   start, min(start + entry['rows'], entry['shape'][0])))
+
+        # wait for all chunks while reporting the progress, errors of corrupted chunks are raised here
+        try:
+            for n_done, future in enumerate(futures, 1):
+                future.result()
+
+                # the progress callback returns False if the loading was cancelled
+                if progress is not None and progress(n_done, len(futures)) is False:
+                    raise LoadingCancelled()
+
+        finally:
+
+            # drop all chunks which have not been decompressed yet
+            for future in futures:
+                future.cancel()
+
+    return manifest['metadata'], arrays
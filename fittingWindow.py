@@ -1,6 +1,7 @@
 # general imports
 import numpy
 from scipy.optimize import curve_fit
+import time
 # import PyQt5 elements
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QCursor
@@ -21,6 +22,9 @@ class FittingWidget(QWidget):
 
     # TODO: 1D Map Fitting
 
+    # seconds between the updates of the map while an area is fitted
+    update_interval = 0.5
+
     def __init__(self, parent, map_handle):
 
         # call widget init
@@ -36,7 +40,7 @@ class FittingWidget(QWidget):
         self.ui = UiFittingWidget(self)
 
         # fill threshold combo box
-        self.ui.threshold_type_combo.addItems(['spectra', '-- integral', '-- mean', '-- maximum'])
+        self.ui.threshold_type_combo.addItems(['spectra', '-- integral', '-- mean', '-- maximum', '-- peak'])
         self.ui.threshold_type_combo.model().item(0).setEnabled(False)
         self.ui.threshold_type_combo.setCurrentIndex(1)
         for key, value in self._map.get_data_names().items():
@@ -194,23 +198,13 @@ class FittingWidget(QWidget):
                 lower_threshold = min_data+1./10000.*self.ui.lower_threshold_slider.value()*(max_data-min_data)
                 upper_threshold = min_data+1./10000.*self.ui.upper_threshold_slider.value()*(max_data-min_data)
 
-                # clear fits from the area which fulfills the threshold condition
-                for ix in range(int(numpy.ceil(fit_area[0])), int(numpy.ceil(fit_area[1]))):
-
-                    for iy in range(int(numpy.ceil(fit_area[2])), int(numpy.ceil(fit_area[3]))):
-
-                        if lower_threshold <= threshold_data[ix, iy] <= upper_threshold:
-
-                            # check if this is the last cleared fit in this column
-                            if numpy.sum(numpy.logical_and(
-                                            lower_threshold <= threshold_data[ix, iy:int(numpy.ceil(fit_area[3]))],
-                                            threshold_data[ix, iy] <= upper_threshold)) == 1:
-                                self._map.clear_fit(pixel=[ix, iy], emit=True)
-                            else:
-                                self._map.clear_fit(pixel=[ix, iy], emit=False)
-
-                        # process events
-                        self._app.processEvents()
+                # clear fits from the area which fulfills the threshold condition at once
+                area = (slice(int(numpy.ceil(fit_area[0])), int(numpy.ceil(fit_area[1]))),
+                        slice(int(numpy.ceil(fit_area[2])), int(numpy.ceil(fit_area[3]))))
+                pixels = numpy.zeros(threshold_data.shape, dtype=bool)
+                pixels[area] = numpy.logical_and(lower_threshold <= threshold_data[area],
+                                                 threshold_data[area] <= upper_threshold)
+                self._map.clear_fits(pixels)
 
             else:
 
@@ -317,6 +311,29 @@ class FittingWidget(QWidget):
                     k_parameter += 4
             return result
 
+        # fits of an area which have not been stored in the map yet, they are stored at once in regular intervals
+        pending_fits = {}
+        last_update = time.monotonic()
+
+        def get_fit(pixel):
+
+            # the pending fits of neighbours are used as well
+            if tuple(pixel) in pending_fits:
+                return pending_fits[tuple(pixel)][0], pending_fits[tuple(pixel)][2]
+            return self._map.get_fit_functions(pixel=pixel), self._map.get_fit_parameters(pixel=pixel)
+
+        def store_fits(force):
+
+            # store the pending fits if the last update is long enough ago, the map is updated once for all of them
+            nonlocal last_update
+            if not force and time.monotonic() - last_update < self.update_interval:
+                return
+            fits = list(pending_fits.values())
+            self._map.set_fits(list(pending_fits.keys()), [fit[0] for fit in fits], [fit[1] for fit in fits],
+                               [fit[2] for fit in fits])
+            pending_fits.clear()
+            last_update = time.monotonic()
+
         # check if only one or multiple pixels are to be fitted
         if self.ui.focused_pixel_radio_button.isChecked():
 
@@ -386,9 +403,6 @@ class FittingWidget(QWidget):
                 progress_dialog.setCancelButton(progress_dialog_cancel_button)
                 progress_dialog.show()
 
-                # start live plotting
-                self._app.start_live_plotting()
-
                 # start fitting
                 i_px = 0
 
@@ -436,14 +450,14 @@ class FittingWidget(QWidget):
                                             if neighbours[i_neighbour_order][i_neighbour][1] < 0 or neighbours[i_neighbour_order][i_neighbour][1] >= self._map.get_size()[1]:
                                                 break
 
-                                            # get fit functions from neighbour
-                                            fit_functions_neighbour = self._map.get_fit_functions(pixel=neighbours[i_neighbour_order][i_neighbour])
+                                            # get fit functions and parameters from neighbour
+                                            fit_functions_neighbour, parameters_neighbour = get_fit(
+                                                neighbours[i_neighbour_order][i_neighbour])
 
                                             # check if fit functions are the same as the current ones
                                             if (fit_functions == fit_functions_neighbour).all():
 
-                                                # get parameters at neighbour pixel
-                                                parameters_neighbour = self._map.get_fit_parameters(pixel=neighbours[i_neighbour_order][i_neighbour])
+                                                # sum up the parameters of the neighbour pixel
                                                 j_parameter = 0
                                                 for neighbour_peak in range(6):
                                                     if 1 <= fit_functions_neighbour[neighbour_peak] <= 2:
@@ -477,17 +491,10 @@ class FittingWidget(QWidget):
                                         spectrum[self.ui.lower_limit_slider.value():self.ui.upper_limit_slider.value(), 1],
                                         p0=start_parameters, bounds=(fit_lower_boundaries, fit_upper_boundaries))
 
-                                    # check if this is the currently focused pixel
-                                    if ix == self._map.get_focus()[0] and iy == self._map.get_focus()[1]:
-
-                                        # save fit
-                                        self._map.set_fit(fit_functions, start_parameters, fit_optimized_parameters,
-                                                          pixel=[ix, iy], emit=True)
-                                    else:
-
-                                        # save fit
-                                        self._map.set_fit(fit_functions, start_parameters, fit_optimized_parameters,
-                                                          pixel=[ix, iy], emit=False)
+                                    # keep the fit until the map is updated
+                                    pending_fits[(ix, iy)] = (
+                                        fit_functions, self._map.pack_fit_parameters(fit_functions, start_parameters),
+                                        self._map.pack_fit_parameters(fit_functions, fit_optimized_parameters))
 
                                 except RuntimeError:
                                     message_box = QMessageBox(self._app.windows['fittingWindow'])
@@ -498,10 +505,12 @@ class FittingWidget(QWidget):
                                     message_box.addButton('Stop Fitting', QMessageBox.AcceptRole)
                                     message_box.exec_()
                                     if message_box.result() == 1:
+                                        store_fits(True)
                                         progress_dialog.close()
                                         return
 
-                            # process events
+                            # store the pending fits and process events
+                            store_fits(False)
                             self._app.processEvents()
 
                             # update progress bar
@@ -512,8 +521,8 @@ class FittingWidget(QWidget):
                     if progress_dialog.wasCanceled():
                         break
 
-                # stop live plotting
-                self._app.stop_live_plotting()
+                # store the remaining fits
+                store_fits(True)
 
             else:
 
@@ -549,9 +558,6 @@ class FittingWidget(QWidget):
                 progress_dialog.setCancelButton(progress_dialog_cancel_button)
                 progress_dialog.show()
 
-                # start live plotting
-                self._app.start_live_plotting()
-
                 # start fitting
                 i_px = 0
 
@@ -590,14 +596,13 @@ class FittingWidget(QWidget):
                                     if neighbours[i_neighbour][0] < 0 or neighbours[i_neighbour][0] >= self._map.get_size()[0]:
                                         break
 
-                                    # get fit functions from neighbour
-                                    fit_functions_neighbour = self._map.get_fit_functions(pixel=neighbours[i_neighbour])
+                                    # get fit functions and parameters from neighbour
+                                    fit_functions_neighbour, parameters_neighbour = get_fit(neighbours[i_neighbour])
 
                                     # check if fit functions are the same as the current ones
                                     if (fit_functions == fit_functions_neighbour).all():
 
-                                        # get parameters at neighbour pixel
-                                        parameters_neighbour = self._map.get_fit_parameters(pixel=neighbours[i_neighbour])
+                                        # sum up the parameters of the neighbour pixel
                                         j_parameter = 0
                                         for neighbour_peak in range(6):
                                             if 1 <= fit_functions_neighbour[neighbour_peak] <= 2:
@@ -627,17 +632,10 @@ class FittingWidget(QWidget):
                                     spectrum[self.ui.lower_limit_slider.value():self.ui.upper_limit_slider.value(), 1],
                                     p0=start_parameters, bounds=(fit_lower_boundaries, fit_upper_boundaries))
 
-                                # check if this is the currently focused pixel
-                                if ix == self._map.get_focus()[0]:
-
-                                    # save fit
-                                    self._map.set_fit(fit_functions, start_parameters, fit_optimized_parameters,
-                                                      pixel=[ix], emit=True)
-                                else:
-
-                                    # save fit
-                                    self._map.set_fit(fit_functions, start_parameters, fit_optimized_parameters,
-                                                      pixel=[ix], emit=False)
+                                # keep the fit until the map is updated
+                                pending_fits[(ix,)] = (
+                                    fit_functions, self._map.pack_fit_parameters(fit_functions, start_parameters),
+                                    self._map.pack_fit_parameters(fit_functions, fit_optimized_parameters))
 
                             except RuntimeError:
                                 message_box = QMessageBox(self._app.windows['fittingWindow'])
@@ -648,18 +646,20 @@ class FittingWidget(QWidget):
                                 message_box.addButton('Stop Fitting', QMessageBox.AcceptRole)
                                 message_box.exec_()
                                 if message_box.result() == 1:
+                                    store_fits(True)
                                     progress_dialog.close()
                                     return
 
-                        # process events
+                        # store the pending fits and process events
+                        store_fits(False)
                         self._app.processEvents()
 
                         # update progress bar
                         i_px += 1
                         progress_dialog.setValue(i_px)
 
-                # stop live plotting
-                self._app.stop_live_plotting()
+                # store the remaining fits
+                store_fits(True)
         
     def cb_function_selected(self, index):
 
@@ -3,17 +3,111 @@ from os import path
 from matplotlib import image
 import numpy
 from skimage import transform
+import threading
 import webbrowser
 # import PyQt5 elements
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtWidgets import QApplication, QFileDialog, QInputDialog, QMainWindow, QMessageBox, QProgressDialog, QWidget
 # import UI
 from UIs.mapWindowUi import UiMapWindow
 from UIs.mapTabWidgetUi import UiMapTabWidget
+from UIs.loadingTabWidgetUi import UiLoadingTabWidget
 from addMicrographDialog import AddMicrographDialog
+from datatypes.maps2d.qtlab import QtLab2DScan
 from exportDialog import ExportDialog
 # import map canvas
-from mplCanvas import MapCanvas1D, MapCanvas2D
+from mplCanvas import MapCanvas1D, MapCanvas2D, PreviewCanvas
+
+
+class LoadingTab(QWidget):
+
+    """
+    LoadingTab
+    Placeholder tab for a map which is loaded in a worker thread, it shows the integrated counts read so far.
+    """
+
+    def __init__(self, load):
+
+        # call QWidget init
+        super().__init__()
+
+        # link app
+        self._app = QApplication.instance()
+
+        # load and set up UI
+        self.ui = UiLoadingTabWidget(self)
+        self.ui.cancel_button.clicked.connect(self.cancel)
+
+        # create preview canvas
+        self._preview_canvas = PreviewCanvas(self.ui.plot_widget)
+
+        # progress reported by the worker thread and the progress shown last, the widgets are only
+        # touched by the gui thread which polls the progress
+        self._cancelled = False
+        self._progress = None
+        self._shown_progress = None
+
+        # result of the loading
+        self._finished = False
+        self._map = None
+        self._error = None
+
+        # poll the progress of the worker thread
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.update_progress)
+        self._timer.start(200)
+
+        # load the map in a worker thread, load is called with the progress callback and returns the map
+        self._load = load
+        self._thread = threading.Thread(target=self.run, name='map_loading', daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+
+        # the worker thread stops at its next progress report
+        self._cancelled = True
+        self.ui.cancel_button.setEnabled(False)
+
+    def get_map(self):
+
+        # the map is not available before the loading has finished
+        return None
+
+    def is_cancelled(self):
+
+        # return whether the loading has been cancelled
+        return self._cancelled
+
+    def progress(self, value, maximum, preview=None):
+
+        # store the progress for the gui thread and report if the loading was cancelled
+        self._progress = (value, maximum, preview)
+        return not self._cancelled
+
+    def run(self):
+
+        # load the map, errors are shown by the gui thread
+        try:
+            self._map = self._load(self.progress)
+        except Exception as error:
+            self._error = error
+        self._finished = True
+
+    def update_progress(self):
+
+        # update the progress bar and the preview if the worker has read further
+        progress = self._progress
+        if progress is not None and progress[:2] != self._shown_progress:
+            self._shown_progress = progress[:2]
+            self.ui.progress_bar.setRange(0, progress[1])
+            self.ui.progress_bar.setValue(progress[0])
+            if progress[2] is not None:
+                self._preview_canvas.update_data(progress[2])
+
+        # hand the map over to the map window once the loading has finished
+        if self._finished:
+            self._timer.stop()
+            self._app.windows['mapWindow'].finish_loading(self, self._map, self._error)
 
 
 class MapTab(QWidget):
@@ -50,7 +144,7 @@ class MapTab(QWidget):
         self._map_canvas.add_toolbar(self.ui.toolbar_widget)
 
         # fill data selection widget
-        self.ui.data_selection_combo_box.addItems(['spectra', '-- integral', '-- mean', '-- maximum'])
+        self.ui.data_selection_combo_box.addItems(['spectra', '-- integral', '-- mean', '-- maximum', '-- peak'])
         if self._map.get_dimension() == 2:
             self.ui.data_selection_combo_box.model().item(0).setEnabled(False)
         for key, value in self._map.get_data_names().items():
@@ -182,7 +276,7 @@ class MapTab(QWidget):
         self.ui.data_selection_combo_box.clear()
 
         # add data items for the spectra
-        self.ui.data_selection_combo_box.addItems(['spectra', '-- integral', '-- mean', '-- maximum'])
+        self.ui.data_selection_combo_box.addItems(['spectra', '-- integral', '-- mean', '-- maximum', '-- peak'])
 
         # disable spectra item for 2d maps
         if self._map.get_dimension() == 2:
@@ -197,29 +291,8 @@ class MapTab(QWidget):
             for key, value in self._map.get_micrograph_names().items():
                 self.ui.data_selection_combo_box.addItems([value])
 
-        # add fit data to the selection box
-        fit_functions = self._map.get_fit_functions()
-        subscripts = [u'\u2081', u'\u2082', u'\u2083', u'\u2084', u'\u2085', u'\u2086']
-        if self._map.get_dimension() == 2:
-            for i_peak in range(6):
-                if numpy.sum(numpy.int_(fit_functions[:, :, i_peak] > 0)) > 0:
-                    self.ui.data_selection_combo_box.addItems(['I'+subscripts[i_peak], 'ε'+subscripts[i_peak]])
-                if numpy.sum(numpy.int_(fit_functions[:, :, i_peak] == 1)) > 0 or numpy.sum(numpy.int_(fit_functions[:, :, i_peak] == 3)) > 0:
-                    self.ui.data_selection_combo_box.addItems(['σ'+subscripts[i_peak]])
-                if numpy.sum(numpy.int_(fit_functions[:, :, i_peak] == 2)) > 0 or numpy.sum(numpy.int_(fit_functions[:, :, i_peak] == 3)) > 0:
-                    self.ui.data_selection_combo_box.addItems(['γ'+subscripts[i_peak]])
-                if numpy.sum(numpy.int_(fit_functions[:, :, i_peak] > 0)) > 0:
-                    self.ui.data_selection_combo_box.addItems(['FWHM'+subscripts[i_peak]])
-        else:
-            for i_peak in range(6):
-                if numpy.sum(numpy.int_(fit_functions[:, i_peak] > 0)) > 0:
-                    self.ui.data_selection_combo_box.addItems(['I'+subscripts[i_peak], 'ε'+subscripts[i_peak]])
-                if numpy.sum(numpy.int_(fit_functions[:, i_peak] == 1)) > 0 or numpy.sum(numpy.int_(fit_functions[:, i_peak] == 3)) > 0:
-                    self.ui.data_selection_combo_box.addItems(['σ'+subscripts[i_peak]])
-                if numpy.sum(numpy.int_(fit_functions[:, i_peak] == 2)) > 0 or numpy.sum(numpy.int_(fit_functions[:, i_peak] == 3)) > 0:
-                    self.ui.data_selection_combo_box.addItems(['γ'+subscripts[i_peak]])
-                if numpy.sum(numpy.int_(fit_functions[:, i_peak] > 0)) > 0:
-                    self.ui.data_selection_combo_box.addItems(['FWHM'+subscripts[i_peak]])
+        # add the available fit parameters to the selection box
+        self.ui.data_selection_combo_box.addItems(self._map.get_fit_catalog_names())
 
         # reconnect
         self.ui.data_selection_combo_box.currentIndexChanged.connect(self.cb_data_selection_changed)
@@ -252,16 +325,29 @@ class MapWindow(QMainWindow):
         # dictionary for map tabs
         self._map_tab_widgets = {}
 
+        # dictionaries for the timers polling running scans and for the polls which are in progress
+        self._scan_timers = {}
+        self._scan_polls = {}
+
+        # interval in milliseconds in which running scans are polled for new spectra
+        self._scan_interval = 500
+
         # load and set up UI
         self.ui = UiMapWindow(self)
 
         # link actions for the file menu
         self.ui.action_1d_map.triggered.connect(self.cb_action1d_map)
         self.ui.action_2d_map.triggered.connect(self.cb_action2d_map)
+        self.ui.action_follow_scan.triggered.connect(self.cb_action_follow_scan)
         self.ui.action_save.triggered.connect(self.cb_action_save)
         self.ui.action_export.triggered.connect(self.cb_action_export)
+        self.ui.action_import_fits.triggered.connect(self.cb_action_import_fits)
         self.ui.action_exit.triggered.connect(self.cb_action_exit)
 
+        # link actions for the edit menu
+        self.ui.action_undo.triggered.connect(self.cb_action_undo)
+        self.ui.action_redo.triggered.connect(self.cb_action_redo)
+
         # link actions for the view menu
         self.ui.action_spectrum.triggered.connect(self.cb_action_spectrum)
         self.ui.action_pixel_information.triggered.connect(self.cb_action_pixel_information)
@@ -275,6 +361,7 @@ class MapWindow(QMainWindow):
         self.ui.action_vertically.triggered.connect(self.cb_action_vertically)
         self.ui.action_clockwise.triggered.connect(self.cb_action_clockwise)
         self.ui.action_anticlockwise.triggered.connect(self.cb_action_anticlockwise)
+        self.ui.action_compact.triggered.connect(self.cb_action_compact)
 
         # link actions for the help menu
         self.ui.action_about.triggered.connect(self.cb_action_about)
@@ -351,10 +438,10 @@ class MapWindow(QMainWindow):
             data_id = map_handle.add_micrograph(micrograph_name, micrograph_transformed)
 
             # update data selection box
-            self.ui.tab_widget.currentWidget().update_data_selection_combo_box()
+            self.update_data_selection_combo_box(map_handle.get_id())
 
             # set current data to the new micrograph
-            self.ui.tab_widget.currentWidget().ui.data_selection_combo_box.setCurrentIndex(data_id)
+            self._map_tab_widgets[map_handle.get_id()].ui.data_selection_combo_box.setCurrentIndex(data_id)
 
     def cb_action_anticlockwise(self):
 
@@ -366,6 +453,11 @@ class MapWindow(QMainWindow):
         # rotate the currently selected map clockwise
         self._app.maps.get_selected_map().rotate('clockwise')
 
+    def cb_action_compact(self):
+
+        # store the arrays of the currently selected map in its displayed orientation
+        self._app.maps.get_selected_map().compact()
+
     def cb_action_exit(self):
 
         # ask the user if he wants to close the program
@@ -404,23 +496,38 @@ class MapWindow(QMainWindow):
         # open spectrum window
         self._app.windows['fittingWindow'].show()
 
-    def cb_action_horizontally(self):
-
-        # flip the currently selected map horizontally
-        self._app.maps.get_selected_map().flip('horizontally')
-
-    def cb_action1d_map(self):
+    def cb_action_follow_scan(self):
 
-        # get file to load
-        file_name = QFileDialog.getOpenFileName(self._app.windows['mapWindow'], 'Open File', '', '')
+        # get the data file of the running scan
+        file_name = QFileDialog.getOpenFileName(self._app.windows['mapWindow'], 'Follow QtLab Scan', '',
+                                                'QtLab Data Files (*.dat)')
         file_name = file_name[0]
 
         # check if file has been selected
         if file_name == '':
             return
 
-        # add map
-        map_handle = self._app.maps.append_1d(file_name)
+        # the size of the map cannot be read from the data file before the scan has finished
+        nx, ok = QInputDialog.getInt(self._app.windows['mapWindow'], 'Follow QtLab Scan', 'Pixels along x:', 10, 1,
+                                     100000, 1)
+        if not ok:
+            return
+        ny, ok = QInputDialog.getInt(self._app.windows['mapWindow'], 'Follow QtLab Scan', 'Pixels along y:', 10, 1,
+                                     100000, 1)
+        if not ok:
+            return
+
+        # add the map with the spectra written so far, the spectra of a running scan are always kept in memory
+        if self.ui.action_single_precision.isChecked():
+            dtype = 'float32'
+        else:
+            dtype = 'float64'
+        scan = QtLab2DScan(file_name, nx, ny, dtype)
+        try:
+            map_handle = self._app.maps.append_2d(file_name, dtype, loader=scan)
+        except (OSError, ValueError) as error:
+            QMessageBox.warning(self._app.windows['mapWindow'], 'Follow QtLab Scan', str(error))
+            return
 
         # create new tab for map
         self._map_tab_widgets[map_handle.get_id()] = MapTab(map_handle)
@@ -429,7 +536,39 @@ class MapWindow(QMainWindow):
         self.ui.tab_widget.setCurrentWidget(self._map_tab_widgets[map_handle.get_id()])
 
         # update menus
-        #self.update_menus()
+        self.update_menus()
+
+        # report the spectra which have been left out of the map so far
+        self.show_rejected_spectra(scan)
+
+        # poll the scan for new spectra until it is complete
+        if not scan.is_complete():
+            timer = QTimer(self)
+            timer.timeout.connect(lambda: self.update_scan(map_handle, scan))
+            timer.start(self._scan_interval)
+            self._scan_timers[map_handle.get_id()] = timer
+
+    def cb_action_horizontally(self):
+
+        # flip the currently selected map horizontally
+        self._app.maps.get_selected_map().flip('horizontally')
+
+    def cb_action1d_map(self):
+
+        # get file to load
+        file_name = QFileDialog.getOpenFileName(self._app.windows['mapWindow'], 'Open File', '', '')
+        file_name = file_name[0]
+
+        # check if file has been selected
+        if file_name == '':
+            return
+
+        # load the map in single precision if selected in the open menu
+        if self.ui.action_single_precision.isChecked():
+            dtype = 'float32'
+        else:
+            dtype = 'float64'
+        self.start_loading(file_name, lambda progress: self._app.maps.load_1d(file_name, dtype, progress))
 
     def cb_action2d_map(self):
 
@@ -441,24 +580,41 @@ class MapWindow(QMainWindow):
         if file_name == '':
             return
 
-        # add map
-        map_handle = self._app.maps.append_2d(file_name)
+        # load the map in single precision and with spectra kept on disk if selected in the open menu
+        lazy = self.ui.action_on_demand_spectra.isChecked()
+        if self.ui.action_single_precision.isChecked():
+            dtype = 'float32'
+        else:
+            dtype = 'float64'
+        self.start_loading(file_name, lambda progress: self._app.maps.load_2d(file_name, dtype, lazy, progress))
 
-        # create new tab for map
-        self._map_tab_widgets[map_handle.get_id()] = MapTab(map_handle)
-        self._map_tab_widgets[map_handle.get_id()].update_data()
-        self._map_tab_widgets[map_handle.get_id()].update_crosshair()
-        self.ui.tab_widget.addTab(self._map_tab_widgets[map_handle.get_id()], map_handle.get_map_name())
-        self.ui.tab_widget.setCurrentWidget(self._map_tab_widgets[map_handle.get_id()])
+    def cb_action_import_fits(self):
 
-        # update menus
-        self.update_menus()
+        # get the project to import the fit results from
+        file_name = QFileDialog.getOpenFileName(self._app.windows['mapWindow'], 'Import Fit Results', '',
+                                                'Py2DSpectroscopy Projects (*.py2ds)')
+        file_name = file_name[0]
+
+        # check if file has been selected
+        if file_name == '':
+            return
+
+        # only the fit results are loaded from the project
+        try:
+            self._app.maps.get_selected_map().import_fits(file_name)
+        except (KeyError, ValueError) as error:
+            QMessageBox.warning(self._app.windows['mapWindow'], 'Import Fit Results', str(error))
 
     def cb_action_pixel_information(self):
 
         # open spectrum window
         self._app.windows['pixelInformationWindow'].show()
 
+    def cb_action_redo(self):
+
+        # redo the change of the spectra of the currently selected map which has been undone last
+        self._app.maps.get_selected_map().redo()
+
     def cb_action_remove_background(self):
 
         # open remove background window
@@ -481,54 +637,62 @@ class MapWindow(QMainWindow):
 
         else:
 
-            # get map size
+            # get map size, the spectra are processed in chunks of rows which are updated at once
             nx, ny = map_handle.get_size()
+            resolution = map_handle.get_resolution()
+            n_rows = max(1, map_handle.chunk_bytes // max(1, 8*ny*resolution))
 
             # create progressbar dialog
-            progress_dialog = QProgressDialog('', '', 0, nx * ny, self)
+            progress_dialog = QProgressDialog('', '', 0, nx, self)
             progress_dialog.setWindowTitle('Removing Cosmic Rays')
             progress_dialog.setWindowModality(Qt.WindowModal)
             progress_dialog.setCancelButton(None)
             progress_dialog.show()
 
-            # start live plotting
-            self._app.start_live_plotting()
-
-            for ix in range(nx):
-                for iy in range(ny):
-                    spectrum = map_handle.get_spectrum(pixel=[ix, iy])
-
-                    # calculate average neighbour spectrum
-                    spectrum_neighbours = numpy.zeros(spectrum.shape[0])
-                    n_neighbours = 0
-                    if ix > 0:
-                        spectrum_neighbours += map_handle.get_spectrum(pixel=[ix - 1, iy])[:, 1]
-                        n_neighbours += 1
-                    if ix < nx-1:
-                        spectrum_neighbours += map_handle.get_spectrum(pixel=[ix + 1, iy])[:, 1]
-                        n_neighbours += 1
-                    if iy > 0:
-                        spectrum_neighbours += map_handle.get_spectrum(pixel=[ix, iy - 1])[:, 1]
-                        n_neighbours += 1
-                    if iy < ny-1:
-                        spectrum_neighbours += map_handle.get_spectrum(pixel=[ix, iy + 1])[:, 1]
-                        n_neighbours += 1
-                    spectrum_neighbours *= 1./n_neighbours
-
-                    # calculate difference between spectrum and averaged neighbour spectrum
-                    diff = spectrum[:, 1]-spectrum_neighbours
-                    spectrum[diff > threshold, 1] = spectrum_neighbours[diff > threshold]
-
-                    if numpy.sum(diff > threshold) > 0:
-                        if ix == map_handle.get_focus()[0] and iy == map_handle.get_focus()[1]:
-                            map_handle.set_spectrum(spectrum, pixel=[ix, iy], emit=True)
-                        else:
-                            map_handle.set_spectrum(spectrum, pixel=[ix, iy], emit=False)
-
-                    progress_dialog.setValue(ix * ny + iy + 1)
-
-            # stop live plotting
-            self._app.stop_live_plotting()
+            # the last uncorrected row of the previous chunk, all spectra are compared to the uncorrected spectra
+            # of their neighbours
+            previous_row = None
+
+            # the changes of all chunks are undone at once
+            with map_handle.history_step('Remove Cosmic Rays'):
+                for i_row in range(0, nx, n_rows):
+
+                    # load the spectra of the rows and of the next row, missing neighbours at the border are NaN
+                    n = min(n_rows, nx - i_row)
+                    rows = numpy.zeros((nx, ny), dtype=bool)
+                    rows[i_row:i_row+n+1] = True
+                    counts = map_handle.get_counts(rows).reshape((-1, ny, resolution))
+                    spectra = numpy.full((n + 2, ny + 2, resolution), numpy.nan)
+                    spectra[1:1+counts.shape[0], 1:-1] = counts
+                    if previous_row is not None:
+                        spectra[0, 1:-1] = previous_row
+                    previous_row = counts[n-1].copy()
+
+                    # calculate average neighbour spectra
+                    spectra_neighbours = numpy.zeros((n, ny, resolution))
+                    n_neighbours = numpy.zeros((n, ny, resolution))
+                    for neighbours in (spectra[:-2, 1:-1], spectra[2:, 1:-1], spectra[1:-1, :-2], spectra[1:-1, 2:]):
+                        on_map = numpy.logical_not(numpy.isnan(neighbours))
+                        spectra_neighbours += numpy.where(on_map, neighbours, 0)
+                        n_neighbours += on_map
+                    spectra_neighbours /= n_neighbours
+
+                    # replace the counts which exceed the averaged neighbour spectra by more than the threshold
+                    spectra = spectra[1:-1, 1:-1]
+                    cosmic_rays = spectra - spectra_neighbours > threshold
+                    spectra[cosmic_rays] = spectra_neighbours[cosmic_rays]
+
+                    # update the spectra with cosmic rays at once
+                    changed = numpy.zeros((nx, ny), dtype=bool)
+                    changed[i_row:i_row+n] = numpy.any(cosmic_rays, axis=-1)
+                    map_handle.set_spectra(changed, spectra[numpy.any(cosmic_rays, axis=-1)])
+
+                    progress_dialog.setValue(i_row + n)
+
+    def cb_action_undo(self):
+
+        # undo the latest change of the spectra of the currently selected map
+        self._app.maps.get_selected_map().undo()
 
     def cb_action_save(self):
 
@@ -536,9 +700,11 @@ class MapWindow(QMainWindow):
         file_name = QFileDialog.getSaveFileName(self._app.windows['mapWindow'], 'Save Map', '', '')
         file_name = file_name[0]
 
-        # save the map
+        # save the map, the extension is needed to recognize the project when it is opened again
         if file_name == '':
             return
+        if file_name[-6:] != '.py2ds':
+            file_name += '.py2ds'
         self._app.maps.save_map(file_name)
 
     def cb_action_vertically(self):
@@ -562,9 +728,10 @@ class MapWindow(QMainWindow):
         # check if last map has been removed
         if index >= 0:
 
-            # change selected map in the map list
+            # change selected map in the map list, tabs of maps which are still loading keep the selection
             map_handle = self.ui.tab_widget.widget(index).get_map()
-            self._app.maps.set_selected_map(map_handle)
+            if map_handle is not None:
+                self._app.maps.set_selected_map(map_handle)
 
         else:
 
@@ -582,8 +749,14 @@ class MapWindow(QMainWindow):
 
         if reply == QMessageBox.Yes:
 
+            # maps which are still loading are cancelled, their tab is removed once the worker has stopped
+            if isinstance(self.ui.tab_widget.widget(index), LoadingTab):
+                self.ui.tab_widget.widget(index).cancel()
+                return
+
             # remove the map from the map list
             map_handle = self.ui.tab_widget.widget(index).get_map()
+            self.stop_scan(map_handle.get_id())
             self._app.maps.remove_map(map_handle)
 
             # remove the tab from the tab widget
@@ -604,6 +777,68 @@ class MapWindow(QMainWindow):
             else:
                 event.ignore()
 
+    def finish_loading(self, loading_tab, map_handle, error):
+
+        # the placeholder is replaced by the tab of the map at the same position
+        index = self.ui.tab_widget.indexOf(loading_tab)
+        current = self.ui.tab_widget.currentIndex() == index
+
+        # files of unknown formats are rejected
+        if error is not None:
+            QMessageBox.warning(self._app.windows['mapWindow'], 'Open File', str(error))
+
+        # loaders which do not report their progress cannot be stopped and run to the end, their map is dropped if the
+        # loading has been cancelled in the meantime
+        if map_handle is not None and loading_tab.is_cancelled():
+            map_handle.release()
+            map_handle = None
+
+        # the map is only added to the map list if the loading was successful
+        if map_handle is None:
+            self.ui.tab_widget.removeTab(index)
+            loading_tab.deleteLater()
+            return
+        map_handle = self._app.maps.add_map(map_handle)
+
+        # select the map if it is shown or if no other map is available for the tools
+        if current or self._app.maps.get_selected_map() not in self._app.maps.get_maps().values():
+            self._app.maps.set_selected_map(map_handle)
+
+        # create new tab for map
+        self._map_tab_widgets[map_handle.get_id()] = MapTab(map_handle)
+        self._map_tab_widgets[map_handle.get_id()].update()
+        self.ui.tab_widget.insertTab(index, self._map_tab_widgets[map_handle.get_id()], map_handle.get_map_name())
+        self.ui.tab_widget.removeTab(index + 1)
+        loading_tab.deleteLater()
+        if current:
+            self.ui.tab_widget.setCurrentWidget(self._map_tab_widgets[map_handle.get_id()])
+
+        # update menus
+        self.update_menus()
+
+    def show_rejected_spectra(self, scan):
+
+        # report the spectra of a running scan which have been left out of the map since their energies differ
+        rejected = scan.get_rejected()
+        if len(rejected) > 0:
+            self.statusBar().showMessage('Skipped %d spectra whose energies differ from the map, the last one is %s.' %
+                                         (len(rejected), path.basename(rejected[-1])))
+
+    def start_loading(self, file_name, load):
+
+        # add a placeholder tab which loads the map in a worker thread
+        loading_tab = LoadingTab(load)
+        self.ui.tab_widget.addTab(loading_tab, path.basename(file_name))
+        self.ui.tab_widget.setCurrentWidget(loading_tab)
+
+    def stop_scan(self, map_id):
+
+        # stop polling the running scan of the map, the result of a poll which is in progress is dropped
+        if map_id in self._scan_timers:
+            self._scan_timers[map_id].stop()
+            del self._scan_timers[map_id]
+        self._scan_polls.pop(map_id, None)
+
     def update_crosshair(self, map_id):
 
         # update data in the currently selected tab
@@ -614,18 +849,57 @@ class MapWindow(QMainWindow):
         # update data in the currently selected tab
         self._map_tab_widgets[map_id].update_data()
 
-    def update_data_selection_combo_box(self):
+    def update_data_selection_combo_box(self, map_id):
+
+        # update the data selection box in the tab of the map, the current tab can belong to a map which is loading
+        if map_id in self._map_tab_widgets:
+            self._map_tab_widgets[map_id].update_data_selection_combo_box()
+
+    def update_history_actions(self, map_id=None):
+
+        # only the history of the selected map is shown
+        map_handle = self._app.maps.get_selected_map()
+        if map_handle is None:
+            self.ui.action_undo.setText('Undo')
+            self.ui.action_undo.setEnabled(False)
+            self.ui.action_redo.setText('Redo')
+            self.ui.action_redo.setEnabled(False)
+            return
+        if map_id is not None and map_id != map_handle.get_id():
+            return
 
-        # update the data selection box in the currently selected tab
-        self.ui.tab_widget.currentWidget().update_data_selection_combo_box()
+        # name the steps which are undone and redone next
+        history = map_handle.get_history()
+        self.ui.action_undo.setText(('Undo ' + history.get_undo_name()).strip())
+        self.ui.action_undo.setEnabled(history.can_undo())
+        self.ui.action_redo.setText(('Redo ' + history.get_redo_name()).strip())
+        self.ui.action_redo.setEnabled(history.can_redo())
+
+    def update_memory_label(self):
+
+        # show the memory used by the maps and the number of maps whose spectra have been spilled to disk
+        maps = self._app.maps.get_maps().values()
+        text = 'Memory: %.1f of %.1f GB' % (self._app.maps.get_footprint() / 1024 ** 3,
+                                           self._app.maps.memory_bytes / 1024 ** 3)
+        n_spilled = sum(map_handle.is_spilled() for map_handle in maps)
+        if n_spilled > 0:
+            text += ' (%d maps on disk)' % n_spilled
+        self.ui.memory_label.setText(text)
 
     def update_menus(self):
 
-        # check if there are maps
-        if self._app.maps.get_count() > 0:
+        # update the actions of the edit menu
+        self.update_history_actions()
+
+        # update the memory usage in the status bar
+        self.update_memory_label()
+
+        # check if there is a selected map
+        if self._app.maps.get_selected_map() is not None:
 
             self.ui.action_save.setEnabled(True)
             self.ui.action_export.setEnabled(True)
+            self.ui.action_import_fits.setEnabled(True)
             if self._app.maps.get_selected_map().get_dimension() == 2:
                 self.ui.action_add_micrograph.setEnabled(True)
             else:
@@ -638,13 +912,16 @@ class MapWindow(QMainWindow):
                 self.ui.action_remove_cosmic_rays.setEnabled(True)
             else:
                 self.ui.action_remove_cosmic_rays.setEnabled(False)
-            if self._app.maps.get_selected_map().get_dimension() == 2:
+            # maps of running scans keep their orientation since new spectra are placed by their scan position
+            if self._app.maps.get_selected_map().get_dimension() == 2 and \
+                    self._app.maps.get_selected_map().get_id() not in self._scan_timers:
                 self.ui.flip_menu.setEnabled(True)
                 self.ui.rotate_menu.setEnabled(True)
                 self.ui.action_horizontally.setEnabled(True)
                 self.ui.action_vertically.setEnabled(True)
                 self.ui.action_clockwise.setEnabled(True)
                 self.ui.action_anticlockwise.setEnabled(True)
+                self.ui.action_compact.setEnabled(True)
             else:
                 self.ui.flip_menu.setEnabled(False)
                 self.ui.rotate_menu.setEnabled(False)
@@ -652,11 +929,13 @@ class MapWindow(QMainWindow):
                 self.ui.action_anticlockwise.setEnabled(False)
                 self.ui.action_horizontally.setEnabled(False)
                 self.ui.action_vertically.setEnabled(False)
+                self.ui.action_compact.setEnabled(False)
 
         else:
 
             self.ui.action_save.setEnabled(False)
             self.ui.action_export.setEnabled(False)
+            self.ui.action_import_fits.setEnabled(False)
             self.ui.action_add_micrograph.setEnabled(False)
             self.ui.action_fitting.setEnabled(False)
             self.ui.action_spectrum.setEnabled(False)
@@ -667,3 +946,81 @@ class MapWindow(QMainWindow):
             self.ui.action_vertically.setEnabled(False)
             self.ui.action_clockwise.setEnabled(False)
             self.ui.action_anticlockwise.setEnabled(False)
+            self.ui.action_compact.setEnabled(False)
+
+    def update_scan(self, map_handle, scan):
+
+        # the spectra are read by a worker thread, a poll which is still in progress is checked again at the next tick
+        map_id = map_handle.get_id()
+        if map_id in self._scan_polls:
+            scan_poll = self._scan_polls[map_id]
+            if not scan_poll.is_finished():
+                return
+            del self._scan_polls[map_id]
+
+            # put the spectra written since the last poll into the map, the map is redrawn once for all of them
+            pixels, counts, rejected, error = scan_poll.get_result()
+            if error is not None:
+                self.stop_scan(map_id)
+                QMessageBox.warning(self._app.windows['mapWindow'], 'Follow QtLab Scan', str(error))
+                return
+            map_handle.set_spectra(pixels, counts, undoable=False)
+
+            # report the spectra which have been left out of the map
+            if rejected:
+                self.show_rejected_spectra(scan)
+
+            # stop polling once the scan is complete
+            if scan.is_complete():
+                self.stop_scan(map_id)
+                self.update_menus()
+                return
+
+        # start the next poll
+        self._scan_polls[map_id] = ScanPoll(scan)
+
+
+class ScanPoll:
+
+    """
+    ScanPoll
+    Reads the spectra written by a running scan since its last poll in a worker thread, the gui thread puts them into
+    the map once the poll has finished.
+    """
+
+    def __init__(self, scan):
+
+        # link the scan
+        self._scan = scan
+
+        # result of the poll
+        self._finished = False
+        self._pixels = None
+        self._counts = None
+        self._rejected = False
+        self._error = None
+
+        # poll the scan in a worker thread
+        self._thread = threading.Thread(target=self.run, name='scan_polling', daemon=True)
+        self._thread.start()
+
+    def get_result(self):
+
+        # return the pixels and counts of the new spectra, whether spectra have been rejected and the error of the poll
+        return self._pixels, self._counts, self._rejected, self._error
+
+    def is_finished(self):
+
+        # return whether the poll has finished
+        return self._finished
+
+    def run(self):
+
+        # poll the scan, errors are shown by the gui thread
+        n_rejected = len(self._scan.get_rejected())
+        try:
+            self._pixels, self._counts = self._scan.poll()
+        except (OSError, ValueError) as error:
+            self._error = error
+        self._rejected = len(self._scan.get_rejected()) > n_rejected
+        self._finished = True
@@ -1,19 +1,143 @@
-# import PyQt5 elements
-from PyQt5.QtWidgets import QApplication
 # general imports
+from contextlib import contextmanager
+import functools
 from os import path
 import numpy
+import os
 import pickle
+import tempfile
+import threading
 # datatype imports
-from datatypes.maps1d.qtlab import QtLab1D
-from datatypes.maps1d.qcodes import QCoDeS1D
-from datatypes.maps2d.qtlab import QtLab2D
-from datatypes.maps2d.qcodes import QCoDeS2D
-from datatypes.maps2d.horiba import Horiba2D
-from datatypes.maps2d.vuckovic import Vuckovic2D
+from datatypes import compact_energies, create_spectra, find_loader, LoadingCancelled
+from datatypes.history import History
+from datatypes.project import is_project, load_manifest, load_project, save_project
 
 import time
 
+
+def get_physical_memory():
+
+    # return the number of bytes of the physical memory or None on systems which do not report it
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def reading(method):
+
+    # run the method while the map cannot be written by other threads
+    @functools.wraps(method)
+    def locked_method(self, *args, **kwargs):
+        with self._lock.reading():
+            return method(self, *args, **kwargs)
+    return locked_method
+
+
+def writing(method):
+
+    # run the method with exclusive access to the map
+    @functools.wraps(method)
+    def locked_method(self, *args, **kwargs):
+        with self._lock.writing():
+            return method(self, *args, **kwargs)
+    return locked_method
+
+
+class MapLock:
+
+    """
+    MapLock
+    A reader/writer lock of a map. Any number of threads can read the map at the same time while a thread which writes
+    it has exclusive access. Both kinds of access can be nested and the writing thread can read as well, but a reading
+    thread cannot start to write. Every completed write increases the version of the map.
+    """
+
+    def __init__(self):
+
+        # create all variables
+        self._condition = threading.Condition()
+        self._readers = {}          # number of nested reads of each reading thread
+        self._writer = None         # the thread which writes at the moment
+        self._n_writes = 0          # number of nested writes of the writing thread
+        self._n_waiting = 0         # number of threads waiting to write
+        self._version = 0           # number of completed writes
+
+    def acquire_read(self):
+
+        # nested reads and reads of the writing thread never wait, new readers let waiting writers go first so that
+        # writers are not starved by a continuous stream of readers
+        thread = threading.get_ident()
+        with self._condition:
+            if thread not in self._readers and thread != self._writer:
+                while self._writer is not None or self._n_waiting > 0:
+                    self._condition.wait()
+            self._readers[thread] = self._readers.get(thread, 0) + 1
+
+    def acquire_write(self):
+
+        # wait until no other thread reads or writes, a thread which reads cannot start to write since two reading
+        # threads which both did would wait for each other forever
+        thread = threading.get_ident()
+        with self._condition:
+            if thread == self._writer:
+                self._n_writes += 1
+                return
+            if thread in self._readers:
+                raise RuntimeError('A thread which reads a map cannot start to write it.')
+            self._n_waiting += 1
+            while self._writer is not None or len(self._readers) > 0:
+                self._condition.wait()
+            self._n_waiting -= 1
+            self._writer = thread
+            self._n_writes = 1
+
+    def get_version(self):
+
+        # return the number of completed writes
+        return self._version
+
+    @contextmanager
+    def reading(self):
+
+        # read within a with statement
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    def release_read(self):
+
+        # let waiting writers continue once the last read of the thread is finished
+        thread = threading.get_ident()
+        with self._condition:
+            self._readers[thread] -= 1
+            if self._readers[thread] == 0:
+                del self._readers[thread]
+                self._condition.notify_all()
+
+    def release_write(self):
+
+        # let waiting readers and writers continue once the outermost write is finished
+        with self._condition:
+            self._n_writes -= 1
+            if self._n_writes == 0:
+                self._writer = None
+                self._version += 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def writing(self):
+
+        # write within a with statement
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
 class Map:
 
     """
@@ -22,18 +146,327 @@ class Map:
     The Map1D and Map2D classes inherit from this class.
     """
 
+    # number of bytes of the spectra which are processed at once by operations on the whole map
+    chunk_bytes = 64 * 1024 ** 2
+
+    # maximum number of bytes of the prefix sums which make changes of the integration interval fast
+    prefix_sum_bytes = 1024 ** 3
+
     def __init__(self):
 
         # create all general variables
-        self._app = None
+        self._event_sink = None     # a callable which receives the events of the map together with the map id
         self._data_names = {}       # dictionary for all data names
         self._dimension = 0         # the dimension of the map (1D, 2D)
+        self._dtype = numpy.dtype('float64')    # the precision in which spectra and derived data are stored
+        self._energies = None       # energy axis shared by all pixels or one energy axis per pixel
         self._focus = []            # the currently focused pixel
         self._id = 0                # the map id
         self._interval = [0, 0]     # integration interval for energy
         self._map_name = ''         # the map name
+        self._orientation = [False, False, False]  # swap of the axes, flip along x and flip along y of the stored arrays
         self._resolution = 0        # the pixels on the CCD
         self._selected_data = 0     # a flag for the currently selected data
+        self._store_name = None     # the memory-mapped file holding the spectra of a lazily loaded map
+        self._spill_name = None     # the memory-mapped scratch file holding the spectra while the map is spilled
+        self._project_name = None   # the project file the map was loaded from or saved to
+        self._cum_counts = None     # prefix sums of the counts along the energy axis starting with zero
+        self._cum_weighted = None   # prefix sums of the energy-weighted counts along the energy axis starting with zero
+        self._fit_functions = None  # fit function codes of all pixels and peaks
+        self._fit_slots = None      # the slot in the parameter pool of each fitted pixel, -1 for pixels without fit
+        self._fit_parameters = None  # pool of initial and optimized fit parameters of the fitted pixels
+        self._fit_free = []         # free slots of the parameter pool
+        self._fit_data = {}         # cached maps of fit parameters by peak and quantity
+        self._fit_data_dirty = {}   # masks of the pixels whose fits have changed since each cached map was updated
+        self._peak_energies = None  # cached map of the peak energies with the version of the map it was calculated for
+        self._history = History()   # compressed diffs of the spectra which can be undone and redone
+        self._lock = MapLock()      # reader/writer lock which counts the versions of the map
+        self._cache_lock = threading.Lock()  # serializes the updates of the cached maps by concurrent readers
+        self._unsaved_groups = {'spectra', 'overview', 'fits', 'micrographs'}  # project groups changed since then
+
+    def allocate_fit_slots(self, n_slots):
+
+        # take slots from the free list of the parameter pool, the pool grows by doubling so that fitting pixel after
+        # pixel does not copy the pool every time
+        if n_slots == 0:
+            return numpy.zeros(0, dtype='int32')
+        if len(self._fit_free) < n_slots:
+            capacity = len(self._fit_parameters)
+            new_capacity = max(2 * capacity, capacity + n_slots - len(self._fit_free), 16)
+            fit_parameters = numpy.full((new_capacity, 2, 6, 4), numpy.nan, dtype=self._dtype)
+            fit_parameters[:capacity] = self._fit_parameters
+            self._fit_parameters = fit_parameters
+            self._fit_free.extend(range(new_capacity - 1, capacity - 1, -1))
+        slots = numpy.array(self._fit_free[-n_slots:], dtype='int32')
+        del self._fit_free[-n_slots:]
+        return slots
+
+    @staticmethod
+    def apply_orientation(array, orientation, axes=(0, 1)):
+
+        # return a view of an array with the orientation applied to its x and y axes, the axes are swapped first and
+        # flipped afterwards so that the eight combinations cover all rotations and reflections of the map
+        if orientation[0]:
+            array = numpy.swapaxes(array, axes[0], axes[1])
+        if orientation[1]:
+            array = numpy.flip(array, axes[0])
+        if orientation[2]:
+            array = numpy.flip(array, axes[1])
+        return array
+
+    def begin_step(self, name):
+
+        # all changes of the spectra until the matching end are undone and redone as one step with the given name
+        self._history.begin_step(name)
+
+    def build_prefix_sums(self):
+
+        # the prefix sums are not built for maps whose spectra are kept on disk or would need too much memory,
+        # energies which are not finite would spoil the differences of all intervals
+        shape = self._spectra.shape[:-1] + (self._resolution + 1,)
+        if self.is_lazy() or 2 * 8 * numpy.prod(shape) > self.prefix_sum_bytes:
+            return
+        if not numpy.all(numpy.isfinite(self._energies)):
+            return
+
+        # the first entry of each pixel is zero so that the sum over start:stop is the difference of two entries
+        self._cum_counts = numpy.zeros(shape)
+        self._cum_weighted = numpy.zeros(shape)
+        self.update_prefix_sums(())
+
+    def calculate_derived_data(self, start, stop):
+
+        # process chunks of rows one after another so that spectra stored on disk are streamed instead of fully loaded
+        n_rows = max(1, self.chunk_bytes // max(1, self._spectra[0].nbytes))
+
+        # with the prefix sums the sums over the interval are the differences of two slices, otherwise the sums are
+        # accumulated in double precision
+        if self._cum_counts is not None:
+            int_counts = self._cum_counts[..., stop] - self._cum_counts[..., start]
+            mean_energies = self._cum_weighted[..., stop] - self._cum_weighted[..., start]
+        else:
+            int_counts = numpy.zeros(self._spectra.shape[:-1])
+            mean_energies = numpy.zeros(self._spectra.shape[:-1])
+            for i_row in range(0, self._spectra.shape[0], n_rows):
+                spectra = self._spectra[i_row:i_row+n_rows, ..., start:stop]
+                if self._energies.ndim == 1:
+                    energies = self._energies[start:stop]
+                else:
+                    energies = self._energies[i_row:i_row+n_rows, ..., start:stop]
+                int_counts[i_row:i_row+n_rows] = numpy.sum(spectra, axis=-1, dtype='float64')
+                mean_energies[i_row:i_row+n_rows] = numpy.sum(energies*spectra, axis=-1, dtype='float64')
+
+        # store the derived data in the precision of the map, the energies at the maxima need a full pass through the
+        # spectra and are only calculated once they are requested
+        self._int_counts = int_counts.astype(self._dtype, copy=False)
+        self._mean_energies = (mean_energies/int_counts).astype(self._dtype, copy=False)
+        self._max_energies = None
+
+    def calculate_fit_data(self, i_peak, quantity, index):
+
+        # fit functions and optimized parameters of the peak for the pixels given by the index,
+        # the empty tuple selects all pixels
+        fit_functions = self._fit_functions[..., i_peak][index]
+        parameters = self.gather_fit_parameters(index, 1, i_peak)
+
+        # return intensities
+        if quantity == 0:
+            return parameters[..., 0]
+
+        # return central energies
+        elif quantity == 1:
+            return parameters[..., 1]
+
+        # return sigma of Gaussians and Voigts in meV
+        elif quantity == 2:
+            sigma = numpy.full(fit_functions.shape, numpy.nan)
+            sigma[fit_functions == 1] = parameters[..., 2][fit_functions == 1]
+            sigma[fit_functions == 3] = parameters[..., 2][fit_functions == 3]
+            return 1000*sigma
+
+        # return gamma of Lorentzians and Voigts in meV
+        elif quantity == 3:
+            gamma = numpy.full(fit_functions.shape, numpy.nan)
+            gamma[fit_functions == 2] = parameters[..., 2][fit_functions == 2]
+            gamma[fit_functions == 3] = parameters[..., 3][fit_functions == 3]
+            return 1000*gamma
+
+        # return FWHM in meV
+        elif quantity == 4:
+            fwhm = numpy.full(fit_functions.shape, numpy.nan)
+            sigma_from_gaussian = parameters[..., 2][fit_functions == 1]
+            gamma_from_lorentzian = parameters[..., 2][fit_functions == 2]
+            sigma_from_voigt = parameters[..., 2][fit_functions == 3]
+            gamma_from_voigt = parameters[..., 3][fit_functions == 3]
+            fwhm[fit_functions == 1] = 2.35482*sigma_from_gaussian
+            fwhm[fit_functions == 2] = 2*gamma_from_lorentzian
+            fwhm[fit_functions == 3] = 0.5346*2.*gamma_from_voigt+numpy.sqrt(0.2166*4.*gamma_from_voigt**2.+2.35482**2.*sigma_from_voigt**2.)
+            return 1000*fwhm
+
+    def clear_fit(self, **kwargs):
+
+        # clear the fit of the given pixel or, if no pixel was provided, of the focused pixel
+        self.clear_fits([self.get_pixel(**kwargs)], emit='emit' not in kwargs or kwargs['emit'])
+
+    def clear_fits(self, pixels, emit=True):
+
+        # clear the fits of all given pixels at once
+        self.set_fits(pixels, numpy.zeros(6), numpy.full((6, 4), numpy.nan), numpy.full((6, 4), numpy.nan), emit)
+
+    def clear_fit_data(self):
+
+        # drop all cached maps of fit parameters after all fits have been replaced or reoriented
+        self._fit_data = {}
+        self._fit_data_dirty = {}
+
+    def clear_prefix_sums(self):
+
+        # drop the prefix sums after the spectra have been replaced or reoriented, they are rebuilt when needed
+        self._cum_counts = None
+        self._cum_weighted = None
+
+    @writing
+    def compact(self):
+
+        # nothing needs to be done if the stored arrays are in the displayed orientation
+        if not any(self._orientation):
+            return
+
+        # the spectra of a spilled map are read back into memory first, since the new store would otherwise replace its
+        # scratch file and keep the map on disk for good
+        self.restore()
+
+        # spectra on disk are copied into a new store in chunks of rows
+        spectra = self.orient(self._spectra)
+        if self.is_lazy() or isinstance(self._spectra, numpy.memmap):
+            store_file, store_name = tempfile.mkstemp(prefix='py2ds_', suffix='.npy')
+            os.close(store_file)
+            compacted = create_spectra(spectra.shape, self._dtype, store_name)
+            n_rows = max(1, self.chunk_bytes // max(1, spectra[0].nbytes))
+            for i_row in range(0, spectra.shape[0], n_rows):
+                compacted[i_row:i_row+n_rows] = spectra[i_row:i_row+n_rows]
+            self.release()
+            self._store_name = store_name
+            self._spectra = compacted
+        else:
+            self._spectra = numpy.ascontiguousarray(spectra)
+        if self._energies.ndim > 1:
+            self._energies = numpy.ascontiguousarray(self.orient(self._energies))
+
+        # lay out all other arrays in the displayed orientation
+        self._data = numpy.ascontiguousarray(self.orient(self._data, (1, 2)))
+        self._int_counts = numpy.ascontiguousarray(self.orient(self._int_counts))
+        self._mean_energies = numpy.ascontiguousarray(self.orient(self._mean_energies))
+        if self._max_energies is not None:
+            self._max_energies = numpy.ascontiguousarray(self.orient(self._max_energies))
+        self._fit_functions = numpy.ascontiguousarray(self.orient(self._fit_functions))
+        self._fit_slots = numpy.ascontiguousarray(self.orient(self._fit_slots))
+        if self._dimension == 2:
+            for key in self._micrographs.keys():
+                self._micrographs[key] = numpy.ascontiguousarray(self.orient(self._micrographs[key], (1, 0)))
+
+        # the prefix sums and the cached maps of fit parameters are rebuilt when needed, the diffs of the history refer
+        # to the previous layout and are dropped
+        self._orientation = [False, False, False]
+        self.clear_prefix_sums()
+        self.clear_fit_data()
+        self._history.clear()
+        self.notify('history_changed')
+
+        # mark the changed project groups
+        self._unsaved_groups.update({'spectra', 'overview', 'fits', 'micrographs'})
+
+    def count_fits(self):
+
+        # count the pixels whose peaks are fitted by each function, the functions are no fit (0), Gaussian (1),
+        # Lorentzian (2) and Voigt (3)
+        fit_functions = self._fit_functions.reshape((-1, 6))
+        self._fit_counts = numpy.zeros((6, 4), dtype='int64')
+        for function in range(4):
+            self._fit_counts[:, function] = numpy.sum(fit_functions == function, axis=0)
+
+    def create_dense_fit_store(self, fit_functions, fit_initial_parameters, fit_optimized_parameters):
+
+        # convert dense fit arrays with parameters for all pixels as pickled by the released versions
+        fitted = numpy.any(numpy.asarray(fit_functions) != 0, axis=-1)
+        self.create_fit_store(fit_functions, numpy.stack((fit_initial_parameters[fitted],
+                                                          fit_optimized_parameters[fitted]), axis=1))
+
+    def create_fit_store(self, fit_functions, fit_parameters=None):
+
+        # the fit functions are stored as small codes for all pixels while the initial and optimized parameters are
+        # only stored for the fitted pixels, which are given in the order of the pixels
+        self._fit_functions = numpy.asarray(fit_functions).astype('int8')
+        fitted = numpy.any(self._fit_functions != 0, axis=-1)
+        self._fit_slots = numpy.full(fitted.shape, -1, dtype='int32')
+        self._fit_slots[fitted] = numpy.arange(numpy.count_nonzero(fitted), dtype='int32')
+        if fit_parameters is None:
+            fit_parameters = numpy.zeros((0, 2, 6, 4))
+        self._fit_parameters = numpy.asarray(fit_parameters).astype(self._dtype, copy=False)
+        self._fit_free = []
+
+        # count the fitted pixels of each peak and fit function
+        self.count_fits()
+
+    def detach_copied_spectra(self):
+
+        # spectra and energies mapped copy-on-write from a cache keep their changed pages in memory which is not
+        # counted by the footprint, they are read into memory before they are changed for the first time
+        if isinstance(self._spectra, numpy.memmap) and self._spectra.mode == 'c':
+            self._spectra = numpy.array(self._spectra)
+        if isinstance(self._energies, numpy.memmap) and self._energies.mode == 'c':
+            self._energies = numpy.array(self._energies)
+
+    def end_step(self):
+
+        # finish the step of the history, the completed step can be undone
+        if self._history.end_step():
+            self.notify('history_changed')
+
+    def exchange_spectra(self, index, differences):
+
+        # toggle the spectra and energies of the pixels given by the storage index between their values before and
+        # after a step of the history by their bitwise differences
+        self.detach_copied_spectra()
+        for name, difference in differences.items():
+            array = self._spectra if name == 'spectra' else self._energies
+            values = numpy.ascontiguousarray(array[index])
+            array[index] = numpy.bitwise_xor(values.view(difference.dtype), difference).view(values.dtype)
+        self.update_prefix_sums(index)
+        self.update_derived_data(index)
+
+    @staticmethod
+    def find_max_energies(spectra, energies):
+
+        # look up the energies at the maxima of all spectra at once, pixels without spectra such as the ones not
+        # scanned yet by a running scan have no maximum
+        max_pixels = numpy.argmax(spectra, axis=-1)
+        if energies.ndim == 1:
+            max_energies = energies[max_pixels]
+        else:
+            max_energies = numpy.take_along_axis(energies, max_pixels[..., numpy.newaxis], axis=-1)[..., 0]
+        return numpy.where(numpy.any(numpy.isnan(spectra), axis=-1), numpy.nan, max_energies)
+
+    def gather_fit_parameters(self, index, kind, i_peak=None):
+
+        # return dense initial (kind = 0) or optimized (kind = 1) parameters of all peaks or of one peak for the pixels
+        # given by the index, the parameters of pixels without fit are NaN
+        slots = self._fit_slots[index]
+        if i_peak is None:
+            pool = self._fit_parameters[:, kind]
+        else:
+            pool = self._fit_parameters[:, kind, i_peak]
+        parameters = numpy.full(numpy.shape(slots) + pool.shape[1:], numpy.nan, dtype=self._dtype)
+        fitted = slots >= 0
+        parameters[fitted] = pool[slots[fitted]]
+        return parameters
+
+    @reading
+    def get_counts(self, pixels):
+
+        # return the counts of the given pixels in double precision, the pixels are given by a boolean mask of the
+        # map or a list of pixels
+        return self._spectra[self.get_storage_index(self.get_pixel_index(pixels))].astype('float64', copy=False)
 
     def get_data_names(self):
 
@@ -45,11 +478,115 @@ class Map:
         # return map dimension
         return self._dimension
 
+    def get_dtype(self):
+
+        # return the precision of the stored data
+        return self._dtype
+
+    @reading
+    def get_energies(self, **kwargs):
+
+        # return the shared energy axis if all pixels have the same energies
+        if self._energies.ndim == 1:
+            return self._energies
+
+        # if no pixel is given, return the focused pixel's energies
+        return self._energies[self.get_storage_index(tuple(self.get_pixel(**kwargs)))]
+
+    @reading
+    def get_fit(self, **kwargs):
+
+        # if no pixel was provided the current pixel is returned
+        index = self.get_storage_index(tuple(self.get_pixel(**kwargs)))
+
+        return self._fit_functions[index], self.gather_fit_parameters(index, 0), self.gather_fit_parameters(index, 1)
+
+    @reading
+    def get_fit_functions(self, **kwargs):
+
+        # return the whole fit functions array (pixel = -1), the fit functions for the focused pixel (pixel = -2)
+        # or for the desired pixel
+        return self.get_oriented(self._fit_functions, **kwargs)
+
+    def get_fit_catalog(self):
+
+        # fit parameters which are available for at least one pixel as pairs of peak and quantity, the quantities are
+        # the intensity (0), the energy (1), sigma of Gaussians and Voigts (2), gamma of Lorentzians and Voigts (3)
+        # and the FWHM (4)
+        catalog = []
+        for i_peak in range(6):
+            if numpy.sum(self._fit_counts[i_peak, 1:]) > 0:
+                catalog.append([i_peak, 0])
+                catalog.append([i_peak, 1])
+            if self._fit_counts[i_peak, 1] + self._fit_counts[i_peak, 3] > 0:
+                catalog.append([i_peak, 2])
+            if self._fit_counts[i_peak, 2] + self._fit_counts[i_peak, 3] > 0:
+                catalog.append([i_peak, 3])
+            if numpy.sum(self._fit_counts[i_peak, 1:]) > 0:
+                catalog.append([i_peak, 4])
+
+        return catalog
+
+    def get_fit_catalog_names(self):
+
+        # names of the available fit parameters in the order of the catalog
+        quantities = ['I', 'ε', 'σ', 'γ', 'FWHM']
+        subscripts = [u'\u2081', u'\u2082', u'\u2083', u'\u2084', u'\u2085', u'\u2086']
+        return [quantities[quantity]+subscripts[i_peak] for i_peak, quantity in self.get_fit_catalog()]
+
+    @reading
+    def get_fit_data(self, i_peak, quantity):
+
+        # the dense maps are cached and only the pixels whose fits have changed are recalculated, maps with many
+        # changed pixels are recalculated as a whole
+        key = (i_peak, quantity)
+        with self._cache_lock:
+            if key not in self._fit_data or \
+                    numpy.count_nonzero(self._fit_data_dirty[key]) > self._fit_data_dirty[key].size // 4:
+                self._fit_data[key] = self.calculate_fit_data(i_peak, quantity, ())
+                self._fit_data_dirty[key] = numpy.zeros(self._fit_functions.shape[:-1], dtype=bool)
+            elif numpy.any(self._fit_data_dirty[key]):
+                index = numpy.nonzero(self._fit_data_dirty[key])
+                self._fit_data[key][index] = self.calculate_fit_data(i_peak, quantity, index)
+                self._fit_data_dirty[key][:] = False
+
+            return self.orient(self._fit_data[key])
+
+    @reading
+    def get_fit_parameters(self, **kwargs):
+
+        # return the whole fit parameter array (pixel = -1), which is created on demand, the fit parameters for the
+        # focused pixel (pixel = -2) or for the desired pixel
+        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
+            return self.orient(self.gather_fit_parameters((), 1))
+        elif kwargs['pixel'] == -2:
+            return self.gather_fit_parameters(self.get_storage_index(tuple(self._focus)), 1)
+        else:
+            return self.gather_fit_parameters(self.get_storage_index(tuple(kwargs['pixel'][:self._dimension])), 1)
+
     def get_focus(self):
 
         # return focus
         return self._focus
 
+    def get_footprint(self):
+
+        # return the number of bytes of the map which are held in memory, memory-mapped spectra do not count
+        arrays = [self._energies, self._spectra, self._data, self._int_counts, self._mean_energies, self._max_energies,
+                  self._cum_counts, self._cum_weighted, self._fit_functions, self._fit_slots, self._fit_parameters]
+        arrays += list(self._fit_data.values()) + list(self._fit_data_dirty.values())
+        if self._peak_energies is not None:
+            arrays.append(self._peak_energies[1])
+        if self._dimension == 2:
+            arrays += list(self._micrographs.values())
+        return sum(array.nbytes for array in arrays if array is not None and not isinstance(array, numpy.memmap)) + \
+            self._history.get_footprint()
+
+    def get_history(self):
+
+        # return the history of the changes of the spectra
+        return self._history
+
     def get_id(self):
 
         # return the map ID
@@ -60,11 +597,129 @@ class Map:
         # return interval
         return self._interval
 
+    def get_lock(self):
+
+        # return the reader/writer lock, threads which combine several calls hold it to see a consistent map
+        return self._lock
+
     def get_map_name(self):
 
         # return map name
         return self._map_name
 
+    @reading
+    def get_max_energies(self, **kwargs):
+
+        # the energies at the maxima of the whole map are calculated on the first request after the interval has
+        # changed and are kept up to date pixel by pixel from then on
+        start, stop = self._interval
+
+        # check if the whole map (pixel = -1) or the focused pixel (pixel = -2) or a specific pixel are requested
+        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
+
+            with self._cache_lock:
+                if self._max_energies is None:
+
+                    # stream through the spectra in chunks of rows like the other derived data
+                    n_rows = max(1, self.chunk_bytes // max(1, self._spectra[0].nbytes))
+                    max_energies = numpy.zeros(self._spectra.shape[:-1], dtype=self._dtype)
+                    for i_row in range(0, self._spectra.shape[0], n_rows):
+                        spectra = self._spectra[i_row:i_row+n_rows, ..., start:stop]
+                        if self._energies.ndim == 1:
+                            energies = self._energies[start:stop]
+                        else:
+                            energies = self._energies[i_row:i_row+n_rows, ..., start:stop]
+                        max_energies[i_row:i_row+n_rows] = self.find_max_energies(spectra, energies)
+                    self._max_energies = max_energies
+
+                return self.orient(self._max_energies)
+
+        elif kwargs['pixel'] == -2:
+
+            pixel = self._focus
+
+        else:
+
+            pixel = kwargs['pixel']
+
+        # a single pixel is looked up in the map if it has been calculated and is calculated on its own otherwise
+        index = self.get_storage_index(tuple(pixel[:self._dimension]))
+        if self._max_energies is not None:
+            return self._max_energies[index]
+        spectrum = self._spectra[index][start:stop]
+        return self._dtype.type(self.find_max_energies(spectrum, self.get_energies(pixel=pixel)[start:stop]))
+
+    def get_oriented(self, array, **kwargs):
+
+        # return an array of the map in the displayed orientation (pixel = -1), its value at the focused pixel
+        # (pixel = -2) or at a specific pixel (pixel = [x, y])
+        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
+            return self.orient(array)
+        elif kwargs['pixel'] == -2:
+            return array[self.get_storage_index(tuple(self._focus))]
+        else:
+            return array[self.get_storage_index(tuple(kwargs['pixel'][:self._dimension]))]
+
+    @reading
+    def get_peak_energies(self, **kwargs):
+
+        # the peak energies are only calculated on request since they need the counts around each maximum
+        start, stop = self._interval
+
+        # check if the whole map (pixel = -1) or the focused pixel (pixel = -2) or a specific pixel are requested
+        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
+
+            # the map is cached until the map changes, e.g. its spectra or its interval
+            with self._cache_lock:
+                if self._peak_energies is None or self._peak_energies[0] != self.get_version():
+
+                    # stream through the spectra in chunks of rows like the other derived data
+                    n_rows = max(1, self.chunk_bytes // max(1, self._spectra[0].nbytes))
+                    peak_energies = numpy.zeros(self._spectra.shape[:-1], dtype=self._dtype)
+                    for i_row in range(0, self._spectra.shape[0], n_rows):
+                        spectra = self._spectra[i_row:i_row+n_rows, ..., start:stop]
+                        if self._energies.ndim == 1:
+                            energies = self._energies[start:stop]
+                        else:
+                            energies = self._energies[i_row:i_row+n_rows, ..., start:stop]
+                        peak_energies[i_row:i_row+n_rows] = self.interpolate_peaks(spectra, energies)
+                    self._peak_energies = (self.get_version(), peak_energies)
+
+                return self.orient(self._peak_energies[1])
+
+        elif kwargs['pixel'] == -2:
+
+            pixel = self._focus
+
+        else:
+
+            pixel = kwargs['pixel']
+
+        # return the peak energy of a single pixel
+        spectrum = self._spectra[self.get_storage_index(tuple(pixel))][start:stop]
+        return self._dtype.type(self.interpolate_peaks(spectrum, self.get_energies(pixel=pixel)[start:stop]))
+
+    def get_pixel(self, **kwargs):
+
+        # return the pixel given by the keyword arguments or the focused pixel if no pixel was provided
+        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
+            return list(self._focus)
+        return list(kwargs['pixel'][:self._dimension])
+
+    def get_pixel_index(self, pixels):
+
+        # convert a boolean mask of the map or a list of pixels into a tuple with one array of indices per axis,
+        # the pixels of a mask are ordered row by row
+        pixels = numpy.asarray(pixels)
+        if pixels.dtype == bool:
+            return numpy.nonzero(pixels)
+        return tuple(numpy.reshape(pixels, (-1, self._dimension)).T.astype('intp'))
+
+    def get_region(self, index):
+
+        # return the bounding box of the pixels given by the index as start and stop along each axis
+        return [[int(numpy.min(axis)), int(numpy.max(axis)) + 1] for axis in index]
+
     def get_resolution(self):
 
         # return pixels on CCD
@@ -75,10 +730,297 @@ class Map:
         # return the currently selected data
         return self._selected_data
 
-    def set_app(self, app):
+    def get_project_data(self):
+
+        # metadata of the map which is stored in the project manifest
+        metadata = {'dimension': self._dimension,
+                    'map_name': self._map_name,
+                    'data_names': [[int(key), name] for key, name in self._data_names.items()],
+                    'dtype': self._dtype.str,
+                    'focus': [int(i) for i in self._focus],
+                    'interval': [int(i) for i in self._interval],
+                    'selected_data': int(self._selected_data),
+                    'orientation': [bool(flag) for flag in self._orientation]}
+
+        # arrays of the map sorted into groups which can be loaded and saved separately
+        arrays = {'spectra': {'energies': self._energies,
+                              'spectra': self._spectra},
+                  'overview': {'data': self._data,
+                               'int_counts': self._int_counts,
+                               'mean_energies': self._mean_energies},
+                  'fits': {'fit_functions': self._fit_functions,
+                           'fit_parameters': self._fit_parameters[self._fit_slots[self._fit_slots >= 0]]}}
+
+        # the energies at the maxima are only stored if they have been calculated
+        if self._max_energies is not None:
+            arrays['overview']['max_energies'] = self._max_energies
+
+        # micrographs only exist for two-dimensional maps
+        if self._dimension == 2:
+            metadata['micrograph_names'] = [[int(key), name] for key, name in self._micrograph_names.items()]
+            arrays['micrographs'] = {'micrograph_' + str(key): micrograph for key, micrograph in self._micrographs.items()}
+
+        return metadata, arrays
+
+    def get_stored_spectra(self, index):
+
+        # return the spectra and the per-pixel energies of the pixels given by the storage index
+        values = {'spectra': self._spectra[index]}
+        if self._energies.ndim > 1:
+            values['energies'] = self._energies[index]
+        return values
+
+    def get_storage_index(self, index):
+
+        # convert a tuple of pixel indices or of arrays of pixel indices in the displayed orientation to the indices
+        # of the stored arrays
+        if self._dimension == 1:
+            return index
+        ix, iy = index
+        if self._orientation[1]:
+            ix = self._nx - 1 - ix
+        if self._orientation[2]:
+            iy = self._ny - 1 - iy
+        if self._orientation[0]:
+            return iy, ix
+        return ix, iy
+
+    def get_version(self):
+
+        # return the version of the map which increases with every change, readers compare it to detect changes
+        return self._lock.get_version()
+
+    @contextmanager
+    def history_step(self, name):
+
+        # record the changes within a with statement as one step, the step is also ended if the changes fail so that
+        # later changes are not folded into a step which is never completed
+        self.begin_step(name)
+        try:
+            yield
+        finally:
+            self.end_step()
+
+    @writing
+    def import_fits(self, file_name):
+
+        # only load the fit results of the project
+        if not is_project(file_name):
+            raise ValueError('The file is not a Py2DSpectroscopy project.')
+        metadata, arrays = load_project(file_name, ['fits'])
+
+        # both maps are compared in their displayed orientation
+        orientation = metadata['orientation']
+        fit_functions = self.apply_orientation(arrays['fit_functions'], orientation)
+        if fit_functions.shape != self.orient(self._fit_functions).shape:
+            raise ValueError('The fit results of the project do not match the size of the map.')
+
+        # the fitted pixels of the project in the displayed orientation and their parameters
+        fit_slots = numpy.full(arrays['fit_functions'].shape[:-1], -1)
+        fit_slots[numpy.any(arrays['fit_functions'] != 0, axis=-1)] = numpy.arange(len(arrays['fit_parameters']))
+        fit_slots = self.apply_orientation(fit_slots, orientation)
+        fitted = fit_slots >= 0
+
+        # replace all fits
+        self.clear_fits(numpy.ones(fitted.shape, dtype=bool), emit=False)
+        self.set_fits(fitted, fit_functions[fitted], arrays['fit_parameters'][fit_slots[fitted], 0],
+                      arrays['fit_parameters'][fit_slots[fitted], 1], emit=False)
+        self.clear_fit_data()
 
-        # set map list
-        self._app = app
+        # emit signal
+        self.notify('fit_changed')
+
+    @staticmethod
+    def interpolate_peaks(spectra, energies):
+
+        # position of the maximum of each spectrum and of its neighbours, maxima at the border have no neighbour
+        max_pixels = numpy.argmax(spectra, axis=-1)[..., numpy.newaxis]
+        inner = (max_pixels > 0) & (max_pixels < spectra.shape[-1] - 1)
+        lower_pixels = numpy.maximum(max_pixels - 1, 0)
+        upper_pixels = numpy.minimum(max_pixels + 1, spectra.shape[-1] - 1)
+
+        # counts at the maximum and its neighbours in double precision
+        y0 = numpy.take_along_axis(spectra, lower_pixels, axis=-1).astype('float64')
+        y1 = numpy.take_along_axis(spectra, max_pixels, axis=-1).astype('float64')
+        y2 = numpy.take_along_axis(spectra, upper_pixels, axis=-1).astype('float64')
+
+        # shift of the vertex of the parabola through the three points in pixels, it lies between -0.5 and 0.5
+        curvature = y0 - 2*y1 + y2
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            shift = numpy.where(inner & (curvature < 0), 0.5*(y0 - y2)/curvature, 0)
+
+        # energies at the maximum and its neighbours, the energy axis may be shared by all spectra
+        if energies.ndim == 1:
+            e0, e1, e2 = energies[lower_pixels], energies[max_pixels], energies[upper_pixels]
+        else:
+            e0 = numpy.take_along_axis(energies, lower_pixels, axis=-1)
+            e1 = numpy.take_along_axis(energies, max_pixels, axis=-1)
+            e2 = numpy.take_along_axis(energies, upper_pixels, axis=-1)
+
+        # interpolate the energy linearly towards the neighbour in the direction of the shift,
+        # spectra without counts such as the ones not scanned yet have no peak
+        peak_energies = e1 + numpy.where(shift > 0, shift*(e2 - e1), shift*(e1 - e0))
+        peak_energies[numpy.isnan(y1)] = numpy.nan
+
+        return peak_energies[..., 0]
+
+    def invalidate_fit_data(self, index):
+
+        # mark the changed pixels given by the index in all cached maps of fit parameters
+        for dirty in self._fit_data_dirty.values():
+            dirty[index] = True
+
+    def notify(self, event, region=None):
+
+        # report an event such as 'spectrum_changed' to the event sink, events which concern a part of the map only
+        # carry the bounding box of the changed pixels
+        if self._event_sink is not None:
+            self._event_sink(event, self._id, region)
+
+    def orient(self, array, axes=(0, 1)):
+
+        # return a view of a stored array in the displayed orientation of the map
+        return self.apply_orientation(array, self._orientation, axes)
+
+    @staticmethod
+    def pack_fit_parameters(fit_functions, parameters):
+
+        # distribute the parameters of the fitted peaks, which are concatenated in the order of the peaks, to four
+        # parameters per peak, the fourth parameter of Gaussians and Lorentzians is zero and peaks without fit are NaN
+        packed = numpy.full((6, 4), numpy.nan)
+        i_parameter = 0
+        for i_peak in range(len(fit_functions)):
+            if fit_functions[i_peak] == 1 or fit_functions[i_peak] == 2:
+                packed[i_peak, :3] = parameters[i_parameter:i_parameter+3]
+                packed[i_peak, 3] = 0
+                i_parameter += 3
+            elif fit_functions[i_peak] == 3:
+                packed[i_peak, :] = parameters[i_parameter:i_parameter+4]
+                i_parameter += 4
+        return packed
+
+    def is_lazy(self):
+
+        # return whether the spectra are kept on disk
+        return self._store_name is not None
+
+    def is_spilled(self):
+
+        # return whether the spectra have been spilled to disk to save memory
+        return self._spill_name is not None
+
+    def load_project(self, file_name, progress=None):
+
+        # load all groups of the project, the spectra of a lazily loaded map are decompressed into its store
+        metadata, arrays = load_project(file_name, store_names={'spectra': self._store_name}, progress=progress)
+
+        # set metadata
+        self._map_name = metadata['map_name']
+        self._data_names = {key: name for key, name in metadata['data_names']}
+        self._dtype = numpy.dtype(metadata['dtype'])
+        self._focus = metadata['focus']
+        self._interval = metadata['interval']
+        self._selected_data = metadata['selected_data']
+        self._orientation = metadata['orientation']
+
+        # set spectra and map size, the arrays are stored in their original orientation
+        self._energies = arrays['energies']
+        self._spectra = arrays['spectra']
+        self.clear_prefix_sums()
+        self._nx = self._spectra.shape[0]
+        if self._dimension == 2:
+            self._ny = self._spectra.shape[1]
+            if self._orientation[0]:
+                self._nx, self._ny = self._ny, self._nx
+        self._resolution = self._spectra.shape[-1]
+
+        # set data derived from the spectra
+        self._data = arrays['data']
+        self._int_counts = arrays['int_counts']
+        self._mean_energies = arrays['mean_energies']
+        self._max_energies = arrays.get('max_energies')
+
+        # set fit data
+        self.create_fit_store(arrays['fit_functions'], arrays['fit_parameters'])
+        self.clear_fit_data()
+
+        # set micrographs
+        if self._dimension == 2:
+            self._micrograph_names = {key: name for key, name in metadata['micrograph_names']}
+            self._micrographs = {key: arrays['micrograph_' + str(key)] for key in self._micrograph_names.keys()}
+
+        # nothing has been changed since the project was saved, the loaded spectra start a new history
+        self._project_name = file_name
+        self._unsaved_groups = set()
+        self._history.clear()
+        self.notify('history_changed')
+
+    @writing
+    def redo(self):
+
+        # redo the step which has been undone last
+        if not self._history.can_redo():
+            return
+        self._history.redo(self.exchange_spectra)
+
+        # mark the changed project groups
+        self._unsaved_groups.update({'spectra', 'overview'})
+
+        # emit signals
+        self.notify('spectrum_changed')
+        self.notify('history_changed')
+
+    def release(self):
+
+        # remove the on-disk store of a lazily loaded map and the scratch file of a spilled map
+        for name in (self._store_name, self._spill_name):
+            if name is not None:
+                try:
+                    os.remove(name)
+                except OSError:
+                    # the file can still be mapped on some systems, it is then left in the temporary directory
+                    pass
+        self._store_name = None
+        self._spill_name = None
+
+    def replace_spectra(self, energies, spectra):
+
+        # replace the counts and the energies of all pixels, per-pixel energy axes are only kept if they differ
+        self._energies = compact_energies(energies)
+        if self._energies.ndim > 1:
+            self._energies = self._energies.astype(self._dtype, copy=False)
+        self._spectra = spectra.astype(self._dtype, copy=False)
+        self.clear_prefix_sums()
+        self._history.clear()
+
+    @writing
+    def restore(self):
+
+        # read the spectra of a spilled map back into memory and remove its scratch file
+        if self._spill_name is None:
+            return
+        self._spectra = numpy.array(self._spectra)
+        self.release()
+
+    def set_event_sink(self, event_sink):
+
+        # set the callable which receives the events of the map, maps without an event sink do not report events
+        self._event_sink = event_sink
+
+    @reading
+    def save_project(self, file_name):
+
+        metadata, arrays = self.get_project_data()
+
+        # if the map was loaded from or saved to the same project before, only the changed groups are appended
+        append = file_name == self._project_name and path.isfile(file_name)
+        if append:
+            arrays = {group: group_arrays for group, group_arrays in arrays.items() if group in self._unsaved_groups}
+
+        # write the project
+        save_project(file_name, metadata, arrays, append)
+        self._project_name = file_name
+        self._unsaved_groups = set()
 
     def set_id(self, map_id):
 
@@ -93,7 +1035,255 @@ class Map:
             self._selected_data = selected_data
 
             # emit signal
-            self._app.selected_data_changed.emit(self._id)
+            self.notify('selected_data_changed')
+
+    def set_fit(self, fit_functions, fit_initial_parameters, fit_optimized_parameters, **kwargs):
+
+        # set the fit of the given pixel or, if no pixel was provided, of the focused pixel, the parameters of the
+        # fitted peaks are concatenated in the order of the peaks
+        fit_functions = numpy.where(numpy.isin(fit_functions, [1, 2, 3]), fit_functions, 0)
+        self.set_fits([self.get_pixel(**kwargs)], fit_functions[numpy.newaxis],
+                      self.pack_fit_parameters(fit_functions, fit_initial_parameters)[numpy.newaxis],
+                      self.pack_fit_parameters(fit_functions, fit_optimized_parameters)[numpy.newaxis],
+                      emit='emit' not in kwargs or kwargs['emit'])
+
+    @writing
+    def set_fits(self, pixels, fit_functions, fit_initial_parameters, fit_optimized_parameters, emit=True):
+
+        # the pixels are given by a boolean mask of the map or a list of pixels, the fit functions and the parameters
+        # with four parameters per peak hold one fit per pixel in the order of the pixels or one fit for all pixels
+        index = self.get_pixel_index(pixels)
+        if len(index[0]) == 0:
+            return
+        region = self.get_region(index)
+        index = self.get_storage_index(index)
+
+        # a pixel which is given more than once gets its last fit, so that it takes only one slot of the pool
+        fit_functions = numpy.broadcast_to(fit_functions, (len(index[0]), 6))
+        fit_initial_parameters = numpy.broadcast_to(fit_initial_parameters, (len(index[0]), 6, 4))
+        fit_optimized_parameters = numpy.broadcast_to(fit_optimized_parameters, (len(index[0]), 6, 4))
+        pixel_ids = numpy.ravel_multi_index(index, self._fit_slots.shape)
+        last = len(pixel_ids) - 1 - numpy.unique(pixel_ids[::-1], return_index=True)[1]
+        if len(last) < len(pixel_ids):
+            index = tuple(axis[last] for axis in index)
+            fit_functions = fit_functions[last]
+            fit_initial_parameters = fit_initial_parameters[last]
+            fit_optimized_parameters = fit_optimized_parameters[last]
+
+        # pixels without any fitted peak release their slots in the parameter pool, newly fitted pixels get one
+        fitted = numpy.any(fit_functions != 0, axis=-1)
+        slots = self._fit_slots[index]
+        self._fit_free.extend(slots[numpy.logical_and(slots >= 0, numpy.logical_not(fitted))].tolist())
+        slots[numpy.logical_not(fitted)] = -1
+        new = numpy.logical_and(slots < 0, fitted)
+        slots[new] = self.allocate_fit_slots(numpy.count_nonzero(new))
+        self._fit_slots[index] = slots
+
+        # replace the fits of all pixels at once and update the counts of the fitted pixels
+        old_functions = self._fit_functions[index]
+        self._fit_functions[index] = fit_functions
+        self._fit_parameters[slots[fitted], 0] = fit_initial_parameters[fitted]
+        self._fit_parameters[slots[fitted], 1] = fit_optimized_parameters[fitted]
+        self.update_fit_counts(old_functions, self._fit_functions[index])
+        self.invalidate_fit_data(index)
+
+        # mark the changed project groups
+        self._unsaved_groups.add('fits')
+
+        # emit one signal for all pixels
+        if emit:
+            self.notify('fit_changed', region)
+
+    @writing
+    def set_spectra(self, pixels, counts, energies=None, emit=True, undoable=True):
+
+        # the pixels are given by a boolean mask of the map or a list of pixels, the counts hold one spectrum per pixel
+        # in the order of the pixels, energies are only stored if each pixel has its own energy axis
+        index = self.get_pixel_index(pixels)
+        if len(index[0]) == 0:
+            return
+        region = self.get_region(index)
+        index = self.get_storage_index(index)
+
+        # update the spectra of all pixels at once
+        self.detach_copied_spectra()
+        if undoable:
+            previous = self.get_stored_spectra(index)
+        self._spectra[index] = counts
+        if energies is not None and self._energies.ndim > 1:
+            self._energies[index] = energies
+        self.update_prefix_sums(index)
+        self.update_derived_data(index)
+
+        # keep the change in the history, changes outside of a step can be undone one by one
+        if undoable:
+            with self.history_step('Change Spectra'):
+                self._history.record(index, previous, self.get_stored_spectra(index))
+
+        # mark the changed project groups
+        self._unsaved_groups.update({'spectra', 'overview'})
+
+        # emit one signal for all pixels
+        if emit:
+            self.notify('spectrum_changed', region)
+
+    def set_spectrum(self, spectrum, **kwargs):
+
+        # set the spectrum with energies in the first and counts in the second column of the given pixel or, if no
+        # pixel was provided, of the focused pixel
+        self.set_spectra([self.get_pixel(**kwargs)], spectrum[numpy.newaxis, :, 1], spectrum[numpy.newaxis, :, 0],
+                         emit='emit' not in kwargs or kwargs['emit'])
+
+    @writing
+    def undo(self):
+
+        # undo the latest step of the history
+        if not self._history.can_undo():
+            return
+        self._history.undo(self.exchange_spectra)
+
+        # mark the changed project groups
+        self._unsaved_groups.update({'spectra', 'overview'})
+
+        # emit signals
+        self.notify('spectrum_changed')
+        self.notify('history_changed')
+
+    @writing
+    def spill(self):
+
+        # move the spectra held in memory to a memory-mapped scratch file in chunks of rows, the map keeps working on
+        # the file until it is restored, the prefix sums are rebuilt when needed
+        if isinstance(self._spectra, numpy.memmap):
+            return
+        spill_file, self._spill_name = tempfile.mkstemp(prefix='py2ds_', suffix='.npy')
+        os.close(spill_file)
+        spilled = create_spectra(self._spectra.shape, self._spectra.dtype, self._spill_name)
+        n_rows = max(1, self.chunk_bytes // max(1, self._spectra[0].nbytes))
+        for i_row in range(0, self._spectra.shape[0], n_rows):
+            spilled[i_row:i_row+n_rows] = self._spectra[i_row:i_row+n_rows]
+        spilled.flush()
+        self._spectra = spilled
+        self.clear_prefix_sums()
+
+    def update_derived_data(self, index):
+
+        # recalculate the derived data of the pixels given by the index, the sums are always accumulated in double
+        # precision
+        spectra = self._spectra[index][..., self._interval[0]:self._interval[1]]
+        if self._energies.ndim == 1:
+            energies = self._energies[self._interval[0]:self._interval[1]]
+        else:
+            energies = self._energies[index][..., self._interval[0]:self._interval[1]]
+
+        # with the prefix sums the sums are the differences of two entries as for all other pixels, so that the
+        # derived data of a pixel do not depend on whether its spectrum has been changed
+        start, stop = self._interval
+        if self._cum_counts is None:
+            int_counts = numpy.sum(spectra, axis=-1, dtype='float64')
+            mean_energies = numpy.sum(energies*spectra, axis=-1, dtype='float64')
+        else:
+            int_counts = self._cum_counts[index][..., stop] - self._cum_counts[index][..., start]
+            mean_energies = self._cum_weighted[index][..., stop] - self._cum_weighted[index][..., start]
+        self._int_counts[index] = int_counts
+        self._mean_energies[index] = mean_energies/int_counts
+
+        # the energies at the maxima are only kept up to date once they have been calculated
+        if self._max_energies is not None:
+            self._max_energies[index] = self.find_max_energies(spectra, energies)
+
+    def update_fit_counts(self, old_functions, new_functions):
+
+        # move the pixels from the counts of their old fit functions to the counts of their new fit functions
+        old_functions = numpy.reshape(old_functions, (-1, 6))
+        new_functions = numpy.reshape(new_functions, (-1, 6))
+        for function in range(4):
+            self._fit_counts[:, function] += numpy.sum(new_functions == function, axis=0) - \
+                numpy.sum(old_functions == function, axis=0)
+
+    def update_prefix_sums(self, index):
+
+        # recalculate the prefix sums of the pixels given by the index, which is a tuple of pixel indices or of arrays
+        # of pixel indices, the empty tuple recalculates all pixels
+        if self._cum_counts is None:
+            return
+        if not isinstance(index, tuple):
+            index = (index,)
+        if self._energies.ndim == 1:
+            energies = self._energies
+        else:
+            energies = self._energies[index]
+        self._cum_counts[index + (Ellipsis, slice(1, None))] = numpy.cumsum(self._spectra[index], axis=-1,
+                                                                            dtype='float64')
+        self._cum_weighted[index + (Ellipsis, slice(1, None))] = numpy.cumsum(energies*self._spectra[index], axis=-1,
+                                                                              dtype='float64')
+
+    def __getstate__(self):
+
+        # the event sink belongs to the running program and is not pickled
+        state = self.__dict__.copy()
+        state['_event_sink'] = None
+
+        # the prefix sums and the cached maps of fit parameters are rebuilt instead of being pickled
+        state['_cum_counts'] = None
+        state['_cum_weighted'] = None
+        state['_fit_data'] = {}
+        state['_fit_data_dirty'] = {}
+        state['_peak_energies'] = None
+
+        # the history and the locks belong to the running program and are not pickled
+        state['_history'] = History()
+        del state['_lock']
+        del state['_cache_lock']
+        return state
+
+    def __setstate__(self, state):
+
+        # maps pickled by the released versions, which saved maps as pickles before projects were introduced, store the
+        # energies together with the counts in the last axis of the spectra in double precision, hold the application
+        # instead of an event sink and keep their arrays in the displayed orientation
+        released = '_energies' not in state
+        if released:
+            state['_energies'] = compact_energies(state['_spectra'][..., 0])
+            state['_spectra'] = state['_spectra'][..., 1]
+            state['_dtype'] = numpy.dtype('float64')
+            state.pop('_app', None)
+            state['_orientation'] = [False, False, False]
+
+            # their data entries follow the maximum energies directly instead of the peak energies
+            if state['_selected_data'] > 3:
+                state['_selected_data'] += 1
+
+        # restored maps keep their spectra in memory, the on-disk store belongs to the map which was saved
+        state['_store_name'] = None
+        state['_spill_name'] = None
+        state['_event_sink'] = None
+
+        # the prefix sums and the cached maps of fit parameters are rebuilt when needed
+        state['_cum_counts'] = None
+        state['_cum_weighted'] = None
+        state['_fit_data'] = {}
+        state['_fit_data_dirty'] = {}
+        state['_peak_energies'] = None
+
+        # restored maps start a new history and are not locked
+        state['_history'] = History()
+        state['_lock'] = MapLock()
+        state['_cache_lock'] = threading.Lock()
+
+        # pickled maps are not linked to a project
+        state['_project_name'] = None
+        state['_unsaved_groups'] = {'spectra', 'overview', 'fits', 'micrographs'}
+
+        # restore the map
+        self.__dict__.update(state)
+
+        # maps pickled by the released versions keep the fit parameters of all pixels
+        if released:
+            self.create_dense_fit_store(state['_fit_functions'], state['_fit_initial_parameters'],
+                                        state['_fit_optimized_parameters'])
+            del self._fit_initial_parameters
+            del self._fit_optimized_parameters
 
 
 class Map1D(Map):
@@ -103,7 +1293,7 @@ class Map1D(Map):
     Class for one-dimensional maps such as gate-dependent measurements.
     """
 
-    def __init__(self, map_id, file_name):
+    def __init__(self, map_id, file_name, dtype='float64', progress=None):
 
         # call super init
         super(Map1D, self).__init__()
@@ -111,26 +1301,26 @@ class Map1D(Map):
         # set dimension of the map
         self._dimension = 1
 
+        # set the precision in which spectra and derived data are stored
+        self._dtype = numpy.dtype(dtype)
+
         # set the map id
         self._id = map_id
 
         # get the directory from path
         dir_name = path.dirname(file_name)
 
-        # check for the file type of the map
-        # .dat files are acquired in the PGI9 (FZJ) lab using QTLab
-        if file_name[-4:] == '.dat':
-
-            # define map loader
-            map_loader = QtLab1D(file_name)
-
-        elif file_name[-4:] == '.pck':
+        # .py2ds files are projects which have been saved by this program
+        if file_name[-6:] == '.py2ds':
+            self.load_project(file_name, progress)
+            return
 
-            # define map loader
-            map_loader = QCoDeS1D(file_name)
+        # define map loader from the registered formats
+        map_loader = find_loader(file_name, 1)(file_name, self._dtype, self._store_name)
 
-        # load data
-        self._map_name, self._spectra, self._data_names, self._data = map_loader.load_data()
+        # load data, the loader reports its progress to the progress callback which can cancel the loading
+        self._map_name, energies, spectra, self._data_names, self._data = map_loader.load_data(progress)
+        self.replace_spectra(energies, spectra)
 
         # set map size
         self._nx = self._spectra.shape[0]
@@ -141,43 +1331,18 @@ class Map1D(Map):
         # set initial interval for the integration of the spectra
         self._interval = [0, self._resolution-1]
 
-        # get integrated counts, average energy and maximum energy
-        self._int_counts = numpy.sum(self._spectra[:, :, 1], axis=1)
-        self._mean_energies = numpy.sum(self._spectra[:, :, 0]*self._spectra[:, :, 1], axis=1)/self._int_counts
-        max_pixels = numpy.argmax(self._spectra[:, :, 1], axis=1)
-        self._max_energies = numpy.zeros((self._nx))
-        for ix in range(self._nx):
-            self._max_energies[ix] = self._spectra[ix, max_pixels[ix], 0]
-
-        # create variables for the fit data
-        self._fit_functions = numpy.zeros((self._nx, 6))
-        self._fit_initial_parameters = numpy.zeros((self._nx, 6, 4))
-        self._fit_initial_parameters[:, :, :] = numpy.NAN
-        self._fit_optimized_parameters = numpy.zeros((self._nx, 6, 4))
-        self._fit_optimized_parameters[:, :, :] = numpy.NAN
+        # get integrated counts, average energy and maximum energy by streaming through the spectra
+        self.calculate_derived_data(0, self._resolution)
+
+        # create the fit store without fitted pixels
+        self.create_fit_store(numpy.zeros((self._nx, 6)))
 
         # set focus to the center of the map
         self._focus = [int(self._nx / 2)]
 
-    def clear_fit(self, **kwargs):
-
-        # if no pixel was provided the current pixel is updated
-        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-            px = self._focus[0]
-        else:
-            px = kwargs['pixel'][0]
-
-        # clear fit
-        self._fit_functions[px, :] = numpy.zeros(6)
-        self._fit_initial_parameters[px, :, :] = numpy.NAN
-        self._fit_optimized_parameters[px, :, :] = numpy.NAN
-
-        # emit signal
-        if 'emit' not in kwargs or kwargs['emit']:
-            self._app.fit_changed.emit(self._id)
-
     # TODO: Flip for 1D
 
+    @reading
     def get_data(self, **kwargs):
 
         # if no data index is given, return the currently selected data
@@ -189,7 +1354,7 @@ class Map1D(Map):
         # return a data
         if data_index == 0:
 
-            return self._spectra[:, :, 1]
+            return self._spectra
 
         elif data_index == 1:
 
@@ -232,26 +1397,17 @@ class Map1D(Map):
 
         elif data_index == 3:
 
-            # check if the whole map data (pixel = -1) or the focussed pixel (pixel = -2)
-            # or a specific pixel (pixel = [x,y]) are requested
-            if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-
-                # return whole map data
-                return self._max_energies
-
-            elif kwargs['pixel'] == -2:
-
-                # return data at focused pixel
-                return self._max_energies[self._focus[0]]
+            # the energies at the maxima are calculated from the spectra on request
+            return self.get_max_energies(**kwargs)
 
-            else:
+        elif data_index == 4:
 
-                # return data at requested pixel
-                return self._max_energies[kwargs['pixel'][0]]
+            # the peak energies are calculated from the spectra on request
+            return self.get_peak_energies(**kwargs)
 
-        elif 3 < data_index < 4 + len(self._data):
+        elif 4 < data_index < 5 + len(self._data):
 
-            data_index -= 4
+            data_index -= 5
 
             # check if the whole map data (pixel = -1) or the focussed pixel (pixel = -2)
             # or a specific pixel (pixel = [x,y]) are requested
@@ -274,66 +1430,11 @@ class Map1D(Map):
         else:
 
             # check which fit parameters are there
-            data_index -= 4 + len(self._data)
-
-            # get fit functions and fit parameters once
-            fit_functions = self._fit_functions
-            fit_optimized_parameters = self._fit_optimized_parameters
-
-            parameters = []
-            for i_peak in range(6):
-                if numpy.sum(numpy.int_(fit_functions[:, i_peak] > 0)) > 0:
-                    parameters.append([i_peak, 0])
-                    parameters.append([i_peak, 1])
-                if numpy.sum(numpy.int_(fit_functions[:, i_peak] == 2)) > 0 or \
-                        numpy.sum(numpy.int_(fit_functions[:, i_peak] == 3)) > 0:
-                    parameters.append([i_peak, 2])
-                if numpy.sum(numpy.int_(fit_functions[:, i_peak] == 1)) > 0 or \
-                        numpy.sum(numpy.int_(fit_functions[:, i_peak] == 3)) > 0:
-                    parameters.append([i_peak, 3])
-                if numpy.sum(numpy.int_(fit_functions[:, i_peak] > 0)) > 0:
-                    parameters.append([i_peak, 4])
-
-            # return intensities
-            if parameters[data_index][1] == 0:
-                return fit_optimized_parameters[:, parameters[data_index][0], 0]
-
-            # return central energies
-            elif parameters[data_index][1] == 1:
-                return fit_optimized_parameters[:, parameters[data_index][0], 1]
-
-            # return sigma
-            elif parameters[data_index][1] == 2:
-                sigma = numpy.zeros((self._nx))
-                sigma[:] = numpy.NAN
-                sigma_from_gaussian = fit_optimized_parameters[:, parameters[data_index][0], 2][fit_functions[:, parameters[data_index][0]] == 2]
-                sigma_from_voigt = fit_optimized_parameters[:, parameters[data_index][0], 2][fit_functions[:, parameters[data_index][0]] == 3]
-                sigma[fit_functions[:, parameters[data_index][0]] == 2] = sigma_from_gaussian
-                sigma[fit_functions[:, parameters[data_index][0]] == 3] = sigma_from_voigt
-                return 1000*sigma
-
-            # return gamma
-            elif parameters[data_index][1] == 3:
-                gamma = numpy.zeros((self._nx))
-                gamma[:] = numpy.NAN
-                gamma_from_lorentzian = fit_optimized_parameters[:, parameters[data_index][0], 2][fit_functions[:, parameters[data_index][0]] == 1]
-                gamma_from_voigt = fit_optimized_parameters[:, parameters[data_index][0], 3][fit_functions[:, parameters[data_index][0]] == 3]
-                gamma[fit_functions[:, parameters[data_index][0]] == 1] = gamma_from_lorentzian
-                gamma[fit_functions[:, parameters[data_index][0]] == 3] = gamma_from_voigt
-                return 1000*gamma
-
-            # return FWHM
-            elif parameters[data_index][1] == 4:
-                fwhm = numpy.zeros((self._nx))
-                fwhm[:] = numpy.NAN
-                sigma_from_gaussian = fit_optimized_parameters[:, parameters[data_index][0], 2][fit_functions[:, parameters[data_index][0]] == 2]
-                gamma_from_lorentzian = fit_optimized_parameters[:, parameters[data_index][0], 2][fit_functions[:, parameters[data_index][0]] == 1]
-                gamma_from_voigt = fit_optimized_parameters[:, parameters[data_index][0], 3][fit_functions[:, parameters[data_index][0]] == 3]
-                sigma_from_voigt = fit_optimized_parameters[:, parameters[data_index][0], 2][fit_functions[:, parameters[data_index][0]] == 3]
-                fwhm[fit_functions[:, parameters[data_index][0]] == 1] = 2*gamma_from_lorentzian
-                fwhm[fit_functions[:, parameters[data_index][0]] == 2] = 2.35482*sigma_from_gaussian
-                fwhm[fit_functions[:, parameters[data_index][0]] == 3] = 0.5346*2.*gamma_from_voigt+numpy.sqrt(0.2166*4.*gamma_from_voigt**2.+2.35482**2.*sigma_from_voigt**2.)
-                return 1000*fwhm
+            data_index -= 5 + len(self._data)
+
+            # return the map of the fit parameter from the catalog of the available fit parameters
+            i_peak, quantity = self.get_fit_catalog()[data_index]
+            return self.get_fit_data(i_peak, quantity)
 
     def get_data_name(self, **kwargs):
 
@@ -360,122 +1461,39 @@ class Map1D(Map):
 
             return 'spectra --maximum'
 
-        elif 3 < data_index < 4 + len(self._data):
+        elif data_index == 4:
+
+            return 'spectra --peak'
 
-            data_index -= 4
+        elif 4 < data_index < 5 + len(self._data):
+
+            data_index -= 5
             # return data name
             return self._data_names[data_index]
 
         else:
 
-            data_index -= 4 + len(self._data)
+            data_index -= 5 + len(self._data)
 
             # return parameter name
-            parameters = []
-            subscripts = [u'\u2081', u'\u2082', u'\u2083', u'\u2084', u'\u2085', u'\u2086']
-            for i_peak in range(6):
-                if numpy.sum(numpy.int_(self._fit_functions[:, i_peak] > 0)) > 0:
-                    parameters.append('I'+subscripts[i_peak])
-                    parameters.append('ε'+subscripts[i_peak])
-                if numpy.sum(numpy.int_(self._fit_functions[:, i_peak] == 1)) > 0 or \
-                        numpy.sum(numpy.int_(self._fit_functions[:, i_peak] == 3)) > 0:
-                    parameters.append('σ'+subscripts[i_peak])
-                if numpy.sum(numpy.int_(self._fit_functions[:, i_peak] == 2)) > 0 or \
-                        numpy.sum(numpy.int_(self._fit_functions[:, i_peak] == 3)) > 0:
-                    parameters.append('γ'+subscripts[i_peak])
-                parameters.append('FWHM'+subscripts[i_peak])
-            return parameters[data_index]
-
-    def get_fit(self, **kwargs):
-
-        # if no pixel was provided the current pixel is returned
-        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-            px = self._focus[0]
-        else:
-            px = kwargs['pixel'][0]
-
-        return self._fit_functions[px, :], self._fit_initial_parameters[px, :, :], self._fit_optimized_parameters[px, :, :]
-
-    def get_fit_functions(self, **kwargs):
-
-        # if no pixel was provided return the whole fit functions array
-        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-            return self._fit_functions[:, :]
-
-        # if pixel is set to -2 return the fit functions for the focused pixel
-        elif kwargs['pixel'] == -2:
-            return self._fit_functions[self._focus[0], :]
-
-        # return the fit functions for the desired pixel
-        else:
-            return self._fit_functions[kwargs['pixel'][0], :]
-
-    def get_fit_parameters(self, **kwargs):
-
-        # if no pixel was provided return the whole fit parameter array
-        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-            return self._fit_optimized_parameters[:, :, :]
-
-        # if pixel is set to -2 return the fit parameters for the focused pixel
-        elif kwargs['pixel'] == -2:
-            return self._fit_optimized_parameters[self._focus[0], :, :]
-
-        # return the fit parameters for the desired pixel
-        else:
-            return self._fit_optimized_parameters[kwargs['pixel'][0], :, :]
+            return self.get_fit_catalog_names()[data_index]
 
     def get_size(self):
 
         # return map size
         return [self._nx]
 
+    @reading
     def get_spectrum(self, **kwargs):
 
         # if no pixel is given, return the focused pixel's spectrum
-        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-            return self._spectra[self._focus[0]]
-        else:
-            return self._spectra[kwargs['pixel'][0], :, :]
-
-    def set_fit(self, fit_functions, fit_initial_parameters, fit_optimized_parameters, **kwargs):
-
-        # if no pixel was provided the current pixel is updated
         if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
             px = self._focus[0]
         else:
             px = kwargs['pixel'][0]
 
-        # clear the old fit data
-        self._fit_functions[px, :] = numpy.zeros(6)
-        self._fit_initial_parameters[px, :, :] = numpy.NAN
-        self._fit_optimized_parameters[px, :, :] = numpy.NAN
-
-        # set new fit data
-        i_parameter = 0
-        for i_peak in range(len(fit_functions)):
-            if fit_functions[i_peak] == 1:
-                self._fit_functions[px, i_peak] = 1
-                self._fit_initial_parameters[px, i_peak, :3] = fit_initial_parameters[i_parameter:i_parameter+3]
-                self._fit_initial_parameters[px, i_peak, 3] = 0
-                self._fit_optimized_parameters[px, i_peak, :3] = fit_optimized_parameters[i_parameter:i_parameter+3]
-                self._fit_optimized_parameters[px, i_peak, 3] = 0
-                i_parameter += 3
-            elif fit_functions[i_peak] == 2:
-                self._fit_functions[px, i_peak] = 2
-                self._fit_initial_parameters[px, i_peak, :3] = fit_initial_parameters[i_parameter:i_parameter+3]
-                self._fit_initial_parameters[px, i_peak, 3] = 0
-                self._fit_optimized_parameters[px, i_peak, :3] = fit_optimized_parameters[i_parameter:i_parameter+3]
-                self._fit_optimized_parameters[px, i_peak, 3] = 0
-                i_parameter += 3
-            elif fit_functions[i_peak] == 3:
-                self._fit_functions[px, i_peak] = 3
-                self._fit_initial_parameters[px, i_peak, :] = fit_initial_parameters[i_parameter:i_parameter+4]
-                self._fit_optimized_parameters[px, i_peak, :] = fit_optimized_parameters[i_parameter:i_parameter+4]
-                i_parameter += 4
-
-        # emit signal
-        if 'emit' not in kwargs or kwargs['emit']:
-            self._app.fit_changed.emit(self._id)
+        # return a double precision copy of the spectrum with energies in the first and counts in the second column
+        return numpy.column_stack((self.get_energies(pixel=[px]), self._spectra[px, :])).astype('float64', copy=False)
 
     def set_focus(self, focus):
 
@@ -484,8 +1502,9 @@ class Map1D(Map):
                 self._focus = [int(numpy.round(focus[0]))]
 
                 # emit signal
-                self._app.focus_changed.emit(self._id)
+                self.notify('focus_changed')
 
+    @writing
     def set_interval(self, side, value):
 
         # check if a good interval has been given
@@ -504,35 +1523,16 @@ class Map1D(Map):
         elif side == 'right':
             self._interval[1] = value
 
-        # recalculate intensities
-        self._int_counts = numpy.sum(self._spectra[:, self._interval[0]:self._interval[1], 1], axis=1)
-        self._mean_energies = numpy.sum(self._spectra[:, self._interval[0]:self._interval[1], 0]*self._spectra[:, self._interval[0]:self._interval[1], 1], axis=1)/self._int_counts
-        max_pixels = numpy.argmax(self._spectra[:, self._interval[0]:self._interval[1], 1], axis=1)
-        for ix in range(self._nx):
-            self._max_energies[ix] = self._spectra[ix, max_pixels[ix], 0]
-
-        # emit signal
-        self._app.interval_changed.emit(self._id)
-
-    def set_spectrum(self, spectrum, **kwargs):
-
-        # if no pixel was provided update the focused pixel
-        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-            px = self._focus[0]
-        else:
-            px = kwargs['pixel'][0]
-
-        # update spectrum
-        self._spectra[px, :, :] = spectrum
+        # recalculate intensities from the prefix sums which are built with the first change of the interval
+        if self._cum_counts is None:
+            self.build_prefix_sums()
+        self.calculate_derived_data(self._interval[0], self._interval[1])
 
-        self._int_counts[px] = numpy.sum(self._spectra[px, self._interval[0]:self._interval[1], 1])
-        self._mean_energies[px] = numpy.sum(self._spectra[px, self._interval[0]:self._interval[1], 0]*self._spectra[px, self._interval[0]:self._interval[1], 1])/self._int_counts[px]
-        max_pixel = numpy.argmax(self._spectra[px, self._interval[0]:self._interval[1], 1])
-        self._max_energies[px] = self._spectra[px, self._interval[0]+max_pixel, 0]
+        # mark the changed project groups
+        self._unsaved_groups.add('overview')
 
         # emit signal
-        if 'emit' not in kwargs or kwargs['emit']:
-            self._app.spectrum_changed.emit(self._id)
+        self.notify('interval_changed')
 
 
 class Map2D(Map):
@@ -542,7 +1542,7 @@ class Map2D(Map):
     Class for two-dimensional maps which are mainly spatial maps.
     """
 
-    def __init__(self, map_id, file_name):
+    def __init__(self, map_id, file_name, dtype='float64', lazy=False, progress=None, loader=None):
 
         # call super init
         super(Map2D, self).__init__()
@@ -550,36 +1550,42 @@ class Map2D(Map):
         # set dimension of the map
         self._dimension = 2
 
+        # set the precision in which spectra and derived data are stored
+        self._dtype = numpy.dtype(dtype)
+
         # set the map id
         self._id = map_id
 
-        # check for the file type of the map
-        # .dat files are acquired in the PGI9 (FZJ) lab using QTLab
-        if file_name[-4:] == '.dat':
-
-            # define map loader
-            map_loader = QtLab2D(file_name)
-
-        # .txt files are acquired by the Horiba machine in the Heinz Group at Stanford
-        elif file_name[-4:] == '.pck':
-
-            # define map loader
-            map_loader = QCoDeS2D(file_name)
+        # lazily loaded maps keep their spectra in a memory-mapped file in the temporary directory
+        if lazy:
+            store_file, self._store_name = tempfile.mkstemp(prefix='py2ds_', suffix='.npy')
+            os.close(store_file)
 
-        # .txt files are acquired by the Horiba machine in the Heinz Group at Stanford
-        elif file_name[-4:] == '.txt':
-
-            # define map loader
-            map_loader = Horiba2D(file_name)
-
-        # .dat2 files are acquired in the J. Vuckovic group at Stanford
-        elif file_name[-5:] == '.dat2':
+        # .py2ds files are projects which have been saved by this program, the store is removed if the loading fails
+        if file_name[-6:] == '.py2ds':
+            try:
+                self.load_project(file_name, progress)
+            except BaseException:
+                self.release()
+                raise
+            return
 
-            # define map loader
-            map_loader = Vuckovic2D(file_name)
+        # define map loader from the registered formats unless a loader is given and load data, the loader reports its
+        # progress to the progress callback which can cancel the loading, the store is removed again if the loading fails
+        try:
+            if loader is None:
+                map_loader = find_loader(file_name, 2)(file_name, self._dtype, self._store_name)
+            else:
+                map_loader = loader
+            self._map_name, energies, spectra, self._data_names, self._data = map_loader.load_data(progress)
+        except BaseException:
+            self.release()
+            raise
+        self.replace_spectra(energies, spectra)
 
-        # load data
-        self._map_name, self._spectra, self._data_names, self._data = map_loader.load_data()
+        # the loader does not use the store if the spectra are already memory-mapped from a cache
+        if self._store_name is not None and os.path.getsize(self._store_name) == 0:
+            self.release()
 
         # set map size
         self._nx = self._spectra.shape[0]
@@ -591,24 +1597,19 @@ class Map2D(Map):
         # set initial interval for the integration of the spectra
         self._interval = [0, self._resolution-1]
 
-        # get integrated counts, average energy and maximum energy
-        self._int_counts = numpy.sum(self._spectra[:, :, :, 1], axis=2)
-        self._mean_energies = numpy.sum(self._spectra[:, :, :, 0]*self._spectra[:, :, :, 1], axis=2)/self._int_counts
-        max_pixels = numpy.argmax(self._spectra[:, :, :, 1], axis=2)
-        self._max_energies = numpy.zeros((self._nx, self._ny))
-        for ix in range(self._nx):
-            for iy in range(self._ny):
-                self._max_energies[ix, iy] = self._spectra[ix, iy, max_pixels[ix, iy], 0]
-
-        # create variables for the fit data
-        self._fit_functions = numpy.zeros((self._nx, self._ny, 6))
-        self._fit_initial_parameters = numpy.zeros((self._nx, self._ny, 6, 4))
-        self._fit_initial_parameters[:, :, :, :] = numpy.NAN
-        self._fit_optimized_parameters = numpy.zeros((self._nx, self._ny, 6, 4))
-        self._fit_optimized_parameters[:, :, :, :] = numpy.NAN
+        # get integrated counts, average energy and maximum energy by streaming through the spectra
+        self.calculate_derived_data(0, self._resolution)
 
-        # set focus to the center of the map
+        # create the fit store without fitted pixels
+        self.create_fit_store(numpy.zeros((self._nx, self._ny, 6)))
+
+        # set focus to the center of the map, a running scan may not have reached the center yet, so the scanned pixel
+        # closest to the center is focused instead
         self._focus = [int(self._nx / 2), int(self._ny / 2)]
+        scanned = numpy.argwhere(~numpy.isnan(self._int_counts))
+        if numpy.isnan(self._int_counts[tuple(self._focus)]) and len(scanned) > 0:
+            distances = numpy.sum((scanned - numpy.array(self._focus)) ** 2, axis=1)
+            self._focus = [int(i) for i in scanned[numpy.argmin(distances)]]
 
         # dictionary for micrographs
         self._micrographs = {}
@@ -617,6 +1618,7 @@ class Map2D(Map):
         # set selected data to integral
         self._selected_data = 1
 
+    @writing
     def add_micrograph(self, file_name, micrograph):
 
         # obtain maximum key so far
@@ -625,92 +1627,36 @@ class Map2D(Map):
         else:
             max_key = max(self._micrographs.keys())
 
-        # add micrograph and micrograph name
-        self._micrographs[int(max_key) + 1] = micrograph
+        # add micrograph and micrograph name, the micrograph is aligned to the displayed map and stored in the original
+        # orientation like all other arrays
+        shape = micrograph.shape
+        if self._orientation[0]:
+            shape = (shape[1], shape[0]) + shape[2:]
+        self._micrographs[int(max_key) + 1] = numpy.empty(shape, dtype=micrograph.dtype)
+        self.orient(self._micrographs[int(max_key) + 1], (1, 0))[...] = micrograph
         self._micrograph_names[int(max_key) + 1] = file_name
+        self._unsaved_groups.add('micrographs')
 
         # return the data id of the new micrograph
-        return 5 + len(self._data_names) + int(max_key)
-
-    def clear_fit(self, **kwargs):
-
-        # if no pixel was provided the current pixel is updated
-        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-            px = self._focus[0]
-            py = self._focus[1]
-        else:
-            px = kwargs['pixel'][0]
-            py = kwargs['pixel'][1]
-
-        # clear fit
-        self._fit_functions[px, py, :] = numpy.zeros(6)
-        self._fit_initial_parameters[px, py, :, :] = numpy.NAN
-        self._fit_optimized_parameters[px, py, :, :] = numpy.NAN
-
-        # emit signal
-        if 'emit' not in kwargs or kwargs['emit']:
-            self._app.fit_changed.emit(self._id)
+        return 6 + len(self._data_names) + int(max_key)
 
+    @writing
     def flip(self, direction):
 
-        # flip the map horizontally
+        # flipping only changes the orientation in which the stored arrays are accessed
         if direction == 'horizontally':
-
-            # flip data
-            self._data = numpy.flip(self._data, 1)
-
-            # flip spectra
-            self._spectra = numpy.flip(self._spectra, 0)
-
-            # flip data derived from spectra
-            self._int_counts = numpy.flip(self._int_counts, 0)
-            self._mean_energies = numpy.flip(self._mean_energies, 0)
-            self._max_energies = numpy.flip(self._max_energies, 0)
-
-            # flip micrographs
-            for i_micrograph in range(len(self._micrographs)):
-                self._micrographs[i_micrograph] = numpy.flip(self._micrographs[i_micrograph], 1)
-
-            # flip fit data
-            self._fit_functions = numpy.flip(self._fit_functions, 0)
-            self._fit_initial_parameters = numpy.flip(self._fit_initial_parameters, 0)
-            self._fit_optimized_parameters = numpy.flip(self._fit_optimized_parameters, 0)
-
-            # update focus
-            self._focus[0] = self._nx - self._focus[0]
-
-            # emit signal
-            self._app.geometry_changed.emit(self._id)
-
-        # flip the map vertically
+            self._orientation[1] = not self._orientation[1]
+            self._focus[0] = self._nx - 1 - self._focus[0]
         elif direction == 'vertically':
+            self._orientation[2] = not self._orientation[2]
+            self._focus[1] = self._ny - 1 - self._focus[1]
+        else:
+            return
 
-            # flip data
-            self._data = numpy.flip(self._data, 2)
-
-            # flip spectra
-            self._spectra = numpy.flip(self._spectra, 1)
-
-            # flip data derived from spectra
-            self._int_counts = numpy.flip(self._int_counts, 1)
-            self._mean_energies = numpy.flip(self._mean_energies, 1)
-            self._max_energies = numpy.flip(self._max_energies, 1)
-
-            # flip micrographs
-            for i_micrograph in range(len(self._micrographs)):
-                self._micrographs[i_micrograph] = numpy.flip(self._micrographs[i_micrograph], 0)
-
-            # flip fit data
-            self._fit_functions = numpy.flip(self._fit_functions, 1)
-            self._fit_initial_parameters = numpy.flip(self._fit_initial_parameters, 1)
-            self._fit_optimized_parameters = numpy.flip(self._fit_optimized_parameters, 1)
-
-            # update focus
-            self._focus[1] = self._ny - self._focus[1]
-
-            # emit signal
-            self._app.geometry_changed.emit(self._id)
+        # emit signal
+        self.notify('geometry_changed')
 
+    @reading
     def get_data(self, **kwargs):
 
         # if no data index is given, return the currently selected data
@@ -722,138 +1668,46 @@ class Map2D(Map):
         # return a data
         if data_index == 1:
 
-            if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-
-                return self._int_counts
-
-            elif kwargs['pixel'] == -2:
-
-                return self._int_counts[self._focus[0], self._focus[1]]
-
-            else:
-
-                return self._int_counts[kwargs['pixel'][0], kwargs['pixel'][1]]
+            return self.get_oriented(self._int_counts, **kwargs)
 
         elif data_index == 2:
 
-            if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-
-                return self._mean_energies
-
-            elif kwargs['pixel'] == -2:
-
-                return self._mean_energies[self._focus[0], self._focus[1]]
-
-            else:
-
-                return self._mean_energies[kwargs['pixel'][0], kwargs['pixel'][1]]
+            return self.get_oriented(self._mean_energies, **kwargs)
 
         elif data_index == 3:
 
-            if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-
-                return self._max_energies
+            # the energies at the maxima are calculated from the spectra on request
+            return self.get_max_energies(**kwargs)
 
-            elif kwargs['pixel'] == -2:
-
-                return self._max_energies[self._focus[0], self._focus[1]]
-
-            else:
-
-                return self._max_energies[kwargs['pixel'][0], kwargs['pixel'][1]]
-
-        elif 3 < data_index < 4 + len(self._data):
-
-            data_index -= 4
-
-            # check if the whole map data (pixel = -1) or the focussed pixel (pixel = -2)
-            # or a specific pixel (pixel = [x,y]) are requested
-            if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-
-                # return whole map data
-                return self._data[data_index]
+        elif data_index == 4:
 
-            elif kwargs['pixel'] == -2:
+            # the peak energies are calculated from the spectra on request
+            return self.get_peak_energies(**kwargs)
 
-                # return data at focused pixel
-                return self._data[data_index][self._focus[0], self._focus[1]]
+        elif 4 < data_index < 5 + len(self._data):
 
-            else:
+            data_index -= 5
 
-                # return data at requested pixel
-                return self._data[data_index][kwargs['pixel'][0], kwargs['pixel'][1]]
+            # return the whole map data (pixel = -1), the data at the focussed pixel (pixel = -2)
+            # or at a specific pixel (pixel = [x,y])
+            return self.get_oriented(self._data[data_index], **kwargs)
 
         # return a micrograph
-        elif 3 + len(self._data) < data_index < 4 + len(self._data) + len(self._micrographs):
+        elif 4 + len(self._data) < data_index < 5 + len(self._data) + len(self._micrographs):
 
             # return micrograph
-            data_index -= 4 + len(self._data)
-            return self._micrographs[data_index]
+            data_index -= 5 + len(self._data)
+            return self.orient(self._micrographs[data_index], (1, 0))
 
         # return a fit data
         else:
 
             # check which fit parameters are there
-            data_index -= 4 + len(self._data) + len(self._micrographs)
-
-            # get fit functions and fit parameters once
-            fit_functions = self._fit_functions
-            fit_optimized_parameters = self._fit_optimized_parameters
-
-            parameters = []
-            for i_peak in range(6):
-                if numpy.sum(numpy.int_(fit_functions[:, :, i_peak] > 0)) > 0:
-                    parameters.append([i_peak, 0])
-                    parameters.append([i_peak, 1])
-                if numpy.sum(numpy.int_(fit_functions[:, :, i_peak] == 2)) > 0 or \
-                        numpy.sum(numpy.int_(fit_functions[:, :, i_peak] == 3)) > 0:
-                    parameters.append([i_peak, 2])
-                if numpy.sum(numpy.int_(fit_functions[:, :, i_peak] == 1)) > 0 or \
-                        numpy.sum(numpy.int_(fit_functions[:, :, i_peak] == 3)) > 0:
-                    parameters.append([i_peak, 3])
-                if numpy.sum(numpy.int_(fit_functions[:, :, i_peak] > 0)) > 0:
-                    parameters.append([i_peak, 4])
-
-            # return intensities
-            if parameters[data_index][1] == 0:
-                return fit_optimized_parameters[:, :, parameters[data_index][0], 0]
-
-            # return central energies
-            elif parameters[data_index][1] == 1:
-                return fit_optimized_parameters[:, :, parameters[data_index][0], 1]
-
-            # return sigma
-            elif parameters[data_index][1] == 2:
-                sigma = numpy.zeros((self._nx, self._ny))
-                sigma[:] = numpy.NAN
-                sigma_from_gaussian = fit_optimized_parameters[:, :, parameters[data_index][0], 2][fit_functions[:, :, parameters[data_index][0]] == 2]
-                sigma_from_voigt = fit_optimized_parameters[:, :, parameters[data_index][0], 2][fit_functions[:, :, parameters[data_index][0]] == 3]
-                sigma[fit_functions[:, :, parameters[data_index][0]] == 2] = sigma_from_gaussian
-                sigma[fit_functions[:, :, parameters[data_index][0]] == 3] = sigma_from_voigt
-                return 1000*sigma
-
-            # return gamma
-            elif parameters[data_index][1] == 3:
-                gamma = numpy.zeros((self._nx, self._ny))
-                gamma[:] = numpy.NAN
-                gamma_from_lorentzian = fit_optimized_parameters[:, :, parameters[data_index][0], 2][fit_functions[:, :, parameters[data_index][0]] == 1]
-                gamma_from_voigt = fit_optimized_parameters[:, :, parameters[data_index][0], 3][fit_functions[:, :, parameters[data_index][0]] == 3]
-                gamma[fit_functions[:, :, parameters[data_index][0]] == 1] = gamma_from_lorentzian
-                gamma[fit_functions[:, :, parameters[data_index][0]] == 3] = gamma_from_voigt
-                return 1000*gamma
-
-            # return FWHM
-            elif parameters[data_index][1] == 4:
-                fwhm = numpy.zeros((self._nx, self._ny))
-                fwhm[:] = numpy.NAN
-                sigma_from_gaussian = fit_optimized_parameters[:, :, parameters[data_index][0], 2][fit_functions[:, :, parameters[data_index][0]] == 2]
-                gamma_from_lorentzian = fit_optimized_parameters[:, :, parameters[data_index][0], 2][fit_functions[:, :, parameters[data_index][0]] == 1]
-                gamma_from_voigt = fit_optimized_parameters[:, :, parameters[data_index][0], 3][fit_functions[:, :, parameters[data_index][0]] == 3]
-                sigma_from_voigt = fit_optimized_parameters[:, :, parameters[data_index][0], 2][fit_functions[:, :, parameters[data_index][0]] == 3]
-                fwhm[fit_functions[:, :, parameters[data_index][0]] == 1] = 2*gamma_from_lorentzian
-                fwhm[fit_functions[:, :, parameters[data_index][0]] == 2] = 2.35482*sigma_from_gaussian
-                fwhm[fit_functions[:, :, parameters[data_index][0]] == 3] = 0.5346*2.*gamma_from_voigt+numpy.sqrt(0.2166*4.*gamma_from_voigt**2.+2.35482**2.*sigma_from_voigt**2.)
-                return 1000*fwhm
+            data_index -= 5 + len(self._data) + len(self._micrographs)
+
+            # return the map of the fit parameter from the catalog of the available fit parameters
+            i_peak, quantity = self.get_fit_catalog()[data_index]
+            return self.get_fit_data(i_peak, quantity)
 
     def get_data_name(self, **kwargs):
 
@@ -875,76 +1729,26 @@ class Map2D(Map):
 
             return 'spectra --maximum'
 
+        elif data_index == 4:
+
+            return 'spectra --peak'
 
-        elif 3 < data_index < 4 + len(self._data):
+        elif 4 < data_index < 5 + len(self._data):
 
-            data_index -= 4
+            data_index -= 5
             return self._data_names[data_index]
 
-        elif 3 + len(self._data) < data_index < 4 + len(self._data) + len(self._micrographs):
+        elif 4 + len(self._data) < data_index < 5 + len(self._data) + len(self._micrographs):
 
-            data_index -= 4 + len(self._data)
+            data_index -= 5 + len(self._data)
             return self._micrograph_names[data_index]
 
         else:
 
             # check which fit parameters are there
-            data_index -= 4 + len(self._data) + len(self._micrographs)
-
-            parameters = []
-            subscripts = [u'\u2081', u'\u2082', u'\u2083', u'\u2084', u'\u2085', u'\u2086']
-            for i_peak in range(6):
-                if numpy.sum(numpy.int_(self._fit_functions[:, :, i_peak] > 0)) > 0:
-                    parameters.append('I'+subscripts[i_peak])
-                    parameters.append('ε'+subscripts[i_peak])
-                if numpy.sum(numpy.int_(self._fit_functions[:, :, i_peak] == 1)) > 0 or \
-                        numpy.sum(numpy.int_(self._fit_functions[:, :, i_peak] == 3)) > 0:
-                    parameters.append('σ'+subscripts[i_peak])
-                if numpy.sum(numpy.int_(self._fit_functions[:, :, i_peak] == 2)) > 0 or \
-                        numpy.sum(numpy.int_(self._fit_functions[:, :, i_peak] == 3)) > 0:
-                    parameters.append('γ'+subscripts[i_peak])
-                parameters.append('FWHM'+subscripts[i_peak])
-            return parameters[data_index]
-
-    def get_fit(self, **kwargs):
-
-        # if no pixel was provided the current pixel is returned
-        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-            px = self._focus[0]
-            py = self._focus[1]
-        else:
-            px = kwargs['pixel'][0]
-            py = kwargs['pixel'][1]
-
-        return self._fit_functions[px, py, :], self._fit_initial_parameters[px, py, :, :], self._fit_optimized_parameters[px, py, :, :]
-
-    def get_fit_functions(self, **kwargs):
-
-        # if no pixel was provided return the whole fit functions array
-        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-            return self._fit_functions[:, :, :]
-
-        # if pixel is set to -2 return the fit functions for the focused pixel
-        elif kwargs['pixel'] == -2:
-            return self._fit_functions[self._focus[0], self._focus[1], :]
-
-        # return the fit functions for the desired pixel
-        else:
-            return self._fit_functions[kwargs['pixel'][0], kwargs['pixel'][1], :]
-
-    def get_fit_parameters(self, **kwargs):
-
-        # if no pixel was provided return the whole fit parameter array
-        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-            return self._fit_optimized_parameters[:, :, :, :]
+            data_index -= 5 + len(self._data) + len(self._micrographs)
 
-        # if pixel is set to -2 return the fit parameters for the focused pixel
-        elif kwargs['pixel'] == -2:
-            return self._fit_optimized_parameters[self._focus[0], self._focus[1], :, :]
-
-        # return the fit parameters for the desired pixel
-        else:
-            return self._fit_optimized_parameters[kwargs['pixel'][0], kwargs['pixel'][1], :, :]
+            return self.get_fit_catalog_names()[data_index]
 
     def get_micrographs(self):
 
@@ -961,147 +1765,36 @@ class Map2D(Map):
         # return map size
         return [self._nx, self._ny]
 
+    @reading
     def get_spectrum(self, **kwargs):
 
         # if no pixel is given, return the focused pixel's spectrum
-        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-            return self._spectra[self._focus[0], self._focus[1]]
-        else:
-            return self._spectra[kwargs['pixel'][0], kwargs['pixel'][1], :, :]
+        pixel = self.get_pixel(**kwargs)
+        px, py = self.get_storage_index(tuple(pixel))
+
+        # return a double precision copy of the spectrum with energies in the first and counts in the second column
+        return numpy.column_stack((self.get_energies(pixel=pixel), self._spectra[px, py, :])).astype('float64', copy=False)
 
+    @writing
     def rotate(self, direction):
 
+        # rotating only changes the orientation in which the stored arrays are accessed, a rotation swaps the axes
+        # together with their flips and flips one of them afterwards
+        swap, flip_x, flip_y = self._orientation
         if direction == 'clockwise':
-
-            # rotate data
-            self._data = numpy.swapaxes(self._data, 1, 2)
-            self._data = numpy.flip(self._data, 2)
-
-            # rotate spectra
-            self._spectra = numpy.swapaxes(self._spectra, 0, 1)
-            self._spectra = numpy.flip(self._spectra, 1)
-
-            # rotate data derived from spectra
-            self._int_counts = numpy.swapaxes(self._int_counts, 0, 1)
-            self._int_counts = numpy.flip(self._int_counts, 1)
-            self._mean_energies = numpy.swapaxes(self._mean_energies, 0, 1)
-            self._mean_energies = numpy.flip(self._mean_energies, 1)
-            self._max_energies = numpy.swapaxes(self._max_energies, 0, 1)
-            self._max_energies = numpy.flip(self._max_energies, 1)
-
-            # rotate micrographs
-            for i_micrograph in range(len(self._micrographs)):
-                self._micrographs[i_micrograph] = numpy.swapaxes(self._micrographs[i_micrograph], 0, 1)
-                self._micrographs[i_micrograph] = numpy.flip(self._micrographs[i_micrograph], 0)
-
-            # rotate fit data
-            self._fit_functions = numpy.swapaxes(self._fit_functions, 0, 1)
-            self._fit_initial_parameters = numpy.swapaxes(self._fit_initial_parameters, 0, 1)
-            self._fit_optimized_parameters = numpy.swapaxes(self._fit_optimized_parameters, 0, 1)
-            self._fit_functions = numpy.flip(self._fit_functions, 1)
-            self._fit_initial_parameters = numpy.flip(self._fit_initial_parameters, 1)
-            self._fit_optimized_parameters = numpy.flip(self._fit_optimized_parameters, 1)
-
-            # update map size
-            tmp = self._nx
-            self._nx = self._ny
-            self._ny = tmp
-
-            # update focus
-            tmp = [self._focus[0], self._focus[1]]
-            self._focus[0] = tmp[1]
-            self._focus[1] = tmp[0]
-            self._focus[1] = self._ny-tmp[0]
-
-            # emit signal
-            self._app.geometry_changed.emit(self._id)
-
+            self._orientation = [not swap, flip_y, not flip_x]
+            self._focus = [self._focus[1], self._nx - 1 - self._focus[0]]
         elif direction == 'anticlockwise':
-
-            # rotate data
-            self._data = numpy.swapaxes(self._data, 1, 2)
-            self._data = numpy.flip(self._data, 1)
-
-            # rotate spectra
-            self._spectra = numpy.swapaxes(self._spectra, 0, 1)
-            self._spectra = numpy.flip(self._spectra, 0)
-
-            # rotate data derived from spectra
-            self._int_counts = numpy.swapaxes(self._int_counts, 0, 1)
-            self._int_counts = numpy.flip(self._int_counts, 0)
-            self._mean_energies = numpy.swapaxes(self._mean_energies, 0, 1)
-            self._mean_energies = numpy.flip(self._mean_energies, 0)
-            self._max_energies = numpy.swapaxes(self._max_energies, 0, 1)
-            self._max_energies = numpy.flip(self._max_energies, 0)
-
-            # rotate micrographs
-            for i_micrograph in range(len(self._micrographs)):
-                self._micrographs[i_micrograph] = numpy.swapaxes(self._micrographs[i_micrograph], 0, 1)
-                self._micrographs[i_micrograph] = numpy.flip(self._micrographs[i_micrograph], 1)
-
-            # rotate fit data
-            self._fit_functions = numpy.swapaxes(self._fit_functions, 0, 1)
-            self._fit_initial_parameters = numpy.swapaxes(self._fit_initial_parameters, 0, 1)
-            self._fit_optimized_parameters = numpy.swapaxes(self._fit_optimized_parameters, 0, 1)
-            self._fit_functions = numpy.flip(self._fit_functions, 0)
-            self._fit_initial_parameters = numpy.flip(self._fit_initial_parameters, 0)
-            self._fit_optimized_parameters = numpy.flip(self._fit_optimized_parameters, 0)
-
-            # update map size
-            tmp = self._nx
-            self._nx = self._ny
-            self._ny = tmp
-
-            # update focus
-            tmp = [self._focus[0], self._focus[1]]
-            self._focus[0] = tmp[1]
-            self._focus[1] = tmp[0]
-            self._focus[0] = self._nx-tmp[1]
-
-            # emit signal
-            self._app.geometry_changed.emit(self._id)
-
-    def set_fit(self, fit_functions, fit_initial_parameters, fit_optimized_parameters, **kwargs):
-
-        # if no pixel was provided the current pixel is updated
-        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-            px = self._focus[0]
-            py = self._focus[1]
+            self._orientation = [not swap, not flip_y, flip_x]
+            self._focus = [self._ny - 1 - self._focus[1], self._focus[0]]
         else:
-            px = kwargs['pixel'][0]
-            py = kwargs['pixel'][1]
-
-        # clear the old fit data
-        self._fit_functions[px, py, :] = numpy.zeros(6)
-        self._fit_initial_parameters[px, py, :, :] = numpy.NAN
-        self._fit_optimized_parameters[px, py, :, :] = numpy.NAN
+            return
 
-        # set new fit data
-        i_parameter = 0
-        for i_peak in range(len(fit_functions)):
-            if fit_functions[i_peak] == 1:
-                self._fit_functions[px, py, i_peak] = 1
-                self._fit_initial_parameters[px, py, i_peak, :3] = fit_initial_parameters[i_parameter:i_parameter+3]
-                self._fit_initial_parameters[px, py, i_peak, 3] = 0
-                self._fit_optimized_parameters[px, py, i_peak, :3] = fit_optimized_parameters[i_parameter:i_parameter+3]
-                self._fit_optimized_parameters[px, py, i_peak, 3] = 0
-                i_parameter += 3
-            elif fit_functions[i_peak] == 2:
-                self._fit_functions[px, py, i_peak] = 2
-                self._fit_initial_parameters[px, py, i_peak, :3] = fit_initial_parameters[i_parameter:i_parameter+3]
-                self._fit_initial_parameters[px, py, i_peak, 3] = 0
-                self._fit_optimized_parameters[px, py, i_peak, :3] = fit_optimized_parameters[i_parameter:i_parameter+3]
-                self._fit_optimized_parameters[px, py, i_peak, 3] = 0
-                i_parameter += 3
-            elif fit_functions[i_peak] == 3:
-                self._fit_functions[px, py, i_peak] = 3
-                self._fit_initial_parameters[px, py, i_peak, :] = fit_initial_parameters[i_parameter:i_parameter+4]
-                self._fit_optimized_parameters[px, py, i_peak, :] = fit_optimized_parameters[i_parameter:i_parameter+4]
-                i_parameter += 4
+        # update map size
+        self._nx, self._ny = self._ny, self._nx
 
         # emit signal
-        if 'emit' not in kwargs or kwargs['emit']:
-            self._app.fit_changed.emit(self._id)
+        self.notify('geometry_changed')
 
     def set_focus(self, focus):
 
@@ -1111,8 +1804,9 @@ class Map2D(Map):
                 self._focus = [int(numpy.round(focus[0])), int(numpy.round(focus[1]))]
 
                 # emit signal
-                self._app.focus_changed.emit(self._id)
+                self.notify('focus_changed')
 
+    @writing
     def set_interval(self, side, value):
 
         # check if a good interval has been given
@@ -1131,39 +1825,16 @@ class Map2D(Map):
         elif side == 'right':
             self._interval[1] = value
 
-        # recalculate data
-        self._int_counts = numpy.sum(self._spectra[:, :, self._interval[0]:self._interval[1], 1], axis=2)
-        self._mean_energies = numpy.sum(self._spectra[:, :, self._interval[0]:self._interval[1], 0]*self._spectra[:, :, self._interval[0]:self._interval[1], 1], axis=2)/self._int_counts
-        max_pixels = numpy.argmax(self._spectra[:, :, self._interval[0]:self._interval[1], 1], axis=2)
-        for ix in range(self._nx):
-            for iy in range(self._ny):
-                self._max_energies[ix, iy] = self._spectra[ix, iy, self._interval[0]+max_pixels[ix, iy], 0]
+        # recalculate data from the prefix sums which are built with the first change of the interval
+        if self._cum_counts is None:
+            self.build_prefix_sums()
+        self.calculate_derived_data(self._interval[0], self._interval[1])
 
-        # emit signal
-        self._app.interval_changed.emit(self._id)
-
-    def set_spectrum(self, spectrum, **kwargs):
-
-        # if no pixel was provided update the focused pixel
-        if 'pixel' not in kwargs.keys() or kwargs['pixel'] == -1:
-            px = self._focus[0]
-            py = self._focus[1]
-        else:
-            px = kwargs['pixel'][0]
-            py = kwargs['pixel'][1]
-
-        # update spectrum
-        self._spectra[px, py, :, :] = spectrum
-
-        # update derived data
-        self._int_counts[px, py] = numpy.sum(self._spectra[px, py, self._interval[0]:self._interval[1], 1])
-        self._mean_energies[px, py] = numpy.sum(self._spectra[px, py, self._interval[0]:self._interval[1], 0]*self._spectra[px, py, self._interval[0]:self._interval[1], 1])/self._int_counts[px, py]
-        max_pixel = numpy.argmax(self._spectra[px, py, self._interval[0]:self._interval[1], 1])
-        self._max_energies[px, py] = self._spectra[px, py, self._interval[0]+max_pixel, 0]
+        # mark the changed project groups
+        self._unsaved_groups.add('overview')
 
         # emit signal
-        if 'emit' not in kwargs or kwargs['emit']:
-            self._app.spectrum_changed.emit(self._id)
+        self.notify('interval_changed')
 
 
 class MapList:
@@ -1173,10 +1844,14 @@ class MapList:
     A map list stores all maps loaded into the program.
     """
 
-    def __init__(self):
+    # maximum number of bytes of the maps held in memory, the spectra of the least recently selected maps are spilled
+    # to disk beyond it, the maps may take up half of the physical memory or 4 GB if its size is not known
+    memory_bytes = get_physical_memory() // 2 if get_physical_memory() is not None else 4 * 1024 ** 3
 
-        # link app
-        self._app = QApplication.instance()
+    def __init__(self, app=None):
+
+        # link app which provides the signals for the events of the maps and the map list, no events are reported without
+        self._app = app
 
         # create dictionary for maps
         self._maps = {}
@@ -1186,68 +1861,59 @@ class MapList:
         self._counter = 0
         self._id_counter = 0
 
+        # ids of the maps, the least recently selected first
+        self._selection_order = []
+
         # call super init
         super(MapList, self).__init__()
 
-    def append_1d(self, file_name):
+    def add_map(self, map_handle):
 
-        # check if the loaded file is a .py2dl file
-        if file_name[-6:] == '.py2ds':
-
-            # pickle map object from .py2dl file
-            map_file = open(file_name, 'rb')
-            self._maps[self._id_counter] = pickle.load(map_file)
-            self._maps[self._id_counter].set_id(self._id_counter)
-            self._maps[self._id_counter].set_app(self._app)
-
-        else:
-
-            # create a new map object and select this map
-            self._maps[self._id_counter] = Map1D(self._id_counter, file_name)
-            self._maps[self._id_counter].set_app(self._app)
+        # register a loaded map under the next id, maps are only added once their loading has finished
+        map_handle.set_id(self._id_counter)
+        map_handle.set_event_sink(self.notify)
+        self._maps[self._id_counter] = map_handle
+        self._selection_order.append(self._id_counter)
 
         # increase the map and id counter
         self._counter += 1
         self._id_counter += 1
 
         # emit signal
-        self._app.map_added.emit(self._id_counter - 1)
-
-        # return map object
-        return self._maps[self._id_counter - 1]
+        self.notify('map_added', self._id_counter - 1)
 
-    def append_2d(self, file_name):
+        # make room for the new map
+        self.manage_memory()
 
-        # check if the loaded file is a .py2dl file
-        if file_name[-6:] == '.py2ds':
-
-            # pickle map object from .py2dl file
-            map_file = open(file_name, 'rb')
-            self._maps[self._id_counter] = pickle.load(map_file)
-            self._maps[self._id_counter].set_id(self._id_counter)
-            self._maps[self._id_counter].set_app(self._app)
-
-        else:
+        # return map object
+        return map_handle
 
-            # create a new map object and select this map
-            self._maps[self._id_counter] = Map2D(self._id_counter, file_name)
-            self._maps[self._id_counter].set_app(self._app)
+    def append_1d(self, file_name, dtype='float64', progress=None):
 
-        # increase the map and id counter
-        self._counter += 1
-        self._id_counter += 1
+        # load the map and add it, nothing is added if the loading was cancelled
+        map_handle = self.load_1d(file_name, dtype, progress)
+        if map_handle is None:
+            return None
+        return self.add_map(map_handle)
 
-        # emit signal
-        self._app.map_added.emit(self._id_counter - 1)
+    def append_2d(self, file_name, dtype='float64', lazy=False, progress=None, loader=None):
 
-        # return map object
-        return self._maps[self._id_counter - 1]
+        # load the map and add it, nothing is added if the loading was cancelled
+        map_handle = self.load_2d(file_name, dtype, lazy, progress, loader)
+        if map_handle is None:
+            return None
+        return self.add_map(map_handle)
 
     def get_count(self):
 
         # return the map counter
         return self._counter
 
+    def get_footprint(self):
+
+        # return the number of bytes of all maps which are held in memory
+        return sum(map_handle.get_footprint() for map_handle in self._maps.values())
+
     def get_map(self, map_id):
 
         # return the requested map
@@ -1260,9 +1926,70 @@ class MapList:
 
     def get_selected_map(self):
 
-        # return currently selected map object
+        # return currently selected map object or None if no map is selected
         return self._selected
 
+    def load_1d(self, file_name, dtype='float64', progress=None):
+
+        # projects store the dimension of the map, they are opened as such independent of the menu entry
+        if file_name[-6:] == '.py2ds' and is_project(file_name) and load_manifest(file_name)['metadata']['dimension'] == 2:
+            return self.load_2d(file_name, dtype, progress=progress)
+
+        # check if the loaded file is a .py2ds file which has been saved before projects were introduced
+        if file_name[-6:] == '.py2ds' and not is_project(file_name):
+
+            # pickle map object from .py2ds file
+            with open(file_name, 'rb') as map_file:
+                return pickle.load(map_file)
+
+        # create a new map object without registering it, this may run in a worker thread,
+        # None is returned if the loading was cancelled
+        try:
+            return Map1D(-1, file_name, dtype, progress)
+        except LoadingCancelled:
+            return None
+
+    def load_2d(self, file_name, dtype='float64', lazy=False, progress=None, loader=None):
+
+        # projects store the dimension of the map, they are opened as such independent of the menu entry
+        if file_name[-6:] == '.py2ds' and is_project(file_name) and load_manifest(file_name)['metadata']['dimension'] == 1:
+            return self.load_1d(file_name, dtype, progress)
+
+        # check if the loaded file is a .py2ds file which has been saved before projects were introduced
+        if file_name[-6:] == '.py2ds' and not is_project(file_name):
+
+            # pickle map object from .py2ds file
+            with open(file_name, 'rb') as map_file:
+                return pickle.load(map_file)
+
+        # create a new map object without registering it, this may run in a worker thread,
+        # None is returned if the loading was cancelled
+        try:
+            return Map2D(-1, file_name, dtype, lazy, progress, loader)
+        except LoadingCancelled:
+            return None
+
+    def manage_memory(self):
+
+        # spill the spectra of the least recently selected maps to disk until the maps fit into the memory budget, the
+        # selected map always stays in memory, fit results and overview maps are never spilled
+        for map_id in self._selection_order:
+            if self.get_footprint() <= self.memory_bytes:
+                break
+            if self._maps[map_id] is not self._selected:
+                self._maps[map_id].spill()
+
+    def notify(self, event, map_id, region=None):
+
+        # emit the signal of the app which belongs to the event, events which concern a part of a map only are emitted
+        # as region changes together with the bounding box of the changed pixels, signals emitted by worker threads are
+        # queued and delivered to the windows in the gui thread
+        if self._app is not None:
+            if region is None:
+                getattr(self._app, event).emit(map_id)
+            else:
+                self._app.region_changed.emit(map_id, event, region)
+
     def remove_map(self, map_handle):
 
         # get id of the map that is to be removed
@@ -1270,35 +1997,56 @@ class MapList:
 
         # remove map from dictionary
         del self._maps[map_id]
+        self._selection_order.remove(map_id)
 
         # decrease map counter
         self._counter -= 1
 
         # emit signal
-        self._app.map_removed.emit(map_id)
+        self.notify('map_removed', map_id)
+
+        # remove the on-disk store of the map
+        map_handle.release()
+
+        # the removed map must not stay selected, e.g. if the tab shown next belongs to a map which is still loading,
+        # so the most recently selected of the remaining maps is selected or the selection is cleared
+        if self._selected is map_handle:
+            if len(self._selection_order) > 0:
+                self.set_selected_map(self._maps[self._selection_order[-1]])
+            else:
+                self._selected = None
 
     def reset(self):
 
+        # remove the on-disk stores of all maps
+        for map_handle in self._maps.values():
+            map_handle.release()
+
         # create dictionary for maps
         self._maps = {}
+        self._selection_order = []
 
         # set flags for selected map and map counter
-        self._selected = -1
+        self._selected = None
         self._counter = 0
         self._id_counter = 0
 
     def save_map(self, file_name):
 
-        # dump map object to the pickle file
-        self._selected.set_app(None)
-        dump_file = open(file_name, 'wb')
-        pickle.dump(self._selected, dump_file, protocol=pickle.HIGHEST_PROTOCOL)
-        self._selected.set_app(self._app)
+        # save the selected map as a project
+        self._selected.save_project(file_name)
 
     def set_selected_map(self, map_handle):
 
         # set the selected map flag
         self._selected = map_handle
 
+        # the selected map is held in memory, other maps are spilled if the memory budget is exceeded
+        if map_handle.get_id() in self._selection_order:
+            self._selection_order.remove(map_handle.get_id())
+            self._selection_order.append(map_handle.get_id())
+        map_handle.restore()
+        self.manage_memory()
+
         # emit signal
-        self._app.selected_map_changed.emit(map_handle.get_id())
+        self.notify('selected_map_changed', map_handle.get_id())
@@ -8,6 +8,7 @@ from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as Navigatio
 from matplotlib.figure import Figure
 from matplotlib import gridspec, image
 import matplotlib.patches as patches
+from matplotlib.transforms import Bbox
 # import UI
 from UIs.colormapDialogUi import UiColormapDialog
 
@@ -51,13 +52,92 @@ class PlotCanvas(FigureCanvas):
         # add toolbar
         self._toolbar = NavigationToolbar(self._fig.canvas, parent)
 
+    @staticmethod
+    def get_limits(values, margin=0.):
+
+        # return the range of the finite values with the margin added on top, values which are all NaN, e.g. pixels of a
+        # running scan which have not been scanned yet, or no values at all get a fallback range
+        finite = values[numpy.isfinite(values)]
+        if len(finite) == 0:
+            return [0., 1.]
+        lower = numpy.min(finite)
+        upper = numpy.max(finite)
+        return [lower, upper + margin * (upper - lower)]
+
     def get_toolbar_active(self):
 
         # return the status of the toolbar
         return self._toolbar._active
 
 
-class MapCanvas1D(PlotCanvas):
+class OverlayCanvas(PlotCanvas):
+
+    """
+    OverlayCanvas
+    Canvas whose overlays, e.g. the crosshair, are animated artists. The canvas without the overlays and the canvas
+    with all overlays but the crosshair are cached so that changes of the overlays only redraw the overlays and moves
+    of the crosshair only redraw the crosshair.
+    """
+
+    def cb_draw_event(self, event):
+
+        # cache the canvas without the overlays after a full draw and draw the overlays on top of it
+        self._background = self._fig.canvas.copy_from_bbox(self.get_overlay_bbox())
+        self.draw_overlay_artists()
+
+    def draw_crosshair(self):
+
+        # restore the cached canvas with all overlays but the crosshair and redraw only the crosshair
+        if self._overlay_background is None:
+            self._fig.canvas.draw()
+            return
+        self._fig.canvas.restore_region(self._overlay_background)
+        for artist in self.get_crosshair():
+            self._axes.draw_artist(artist)
+        self._fig.canvas.blit(self.get_overlay_bbox())
+
+    def draw_overlay_artists(self):
+
+        # draw the overlays and cache the canvas below the crosshair, which is moved most often
+        for artist in self.get_overlays():
+            self._axes.draw_artist(artist)
+        self._overlay_background = self._fig.canvas.copy_from_bbox(self.get_overlay_bbox())
+        for artist in self.get_crosshair():
+            self._axes.draw_artist(artist)
+
+    def draw_overlays(self):
+
+        # restore the cached canvas and redraw only the overlays, the whole canvas is drawn if nothing is cached yet
+        if self._background is None:
+            self._fig.canvas.draw()
+            return
+        self._fig.canvas.restore_region(self._background)
+        self.draw_overlay_artists()
+        self._fig.canvas.blit(self.get_overlay_bbox())
+
+    def get_overlay_bbox(self):
+
+        # the region of the overlays is the axes with a margin for the antialiased pixels of the overlays at its edges
+        x0, y0, x1, y1 = self._axes.bbox.extents
+        return Bbox.from_extents(x0 - 2, y0 - 2, x1 + 2, y1 + 2)
+
+    @staticmethod
+    def get_contour_artists(contour_set):
+
+        # return the artists of a contour set, older versions of matplotlib draw contour sets as collections
+        if hasattr(contour_set, 'collections'):
+            return list(contour_set.collections)
+        return [contour_set]
+
+    def set_overlay(self, contour_set):
+
+        # mark the artists of a contour set as overlays which are only drawn on top of the cached canvas
+        for artist in self.get_contour_artists(contour_set):
+            artist.set_animated(True)
+        return contour_set
+
+
+class MapCanvas1D(OverlayCanvas):
 
     def __init__(self, parent, map_handle):
 
@@ -88,8 +168,16 @@ class MapCanvas1D(PlotCanvas):
         self._map_plot_2d = self._axes.imshow(self._map.get_data(), animated=True, aspect='auto',
                                               interpolation='none', origin='lower', cmap='nipy_spectral')
 
-        # create crosshair
-        self._crosshair_x, = self._axes.plot([0], [0], color='black')
+        # create crosshair and the empty overlays, all overlays are drawn on top of the cached canvas
+        self._crosshair_x, = self._axes.plot([0], [0], color='black', animated=True)
+        self._area_rectangle = None
+        self._threshold_map = None
+        self._background = None
+        self._overlay_background = None
+
+        # the limits of the axes are set with the data, the overlays drawn on top of the cached canvas must not change
+        # them
+        self._axes.set_autoscale_on(False)
 
         # create axes for colorbar
         self._caxes = self._fig.add_subplot(gs[1])
@@ -106,6 +194,9 @@ class MapCanvas1D(PlotCanvas):
         self.grid_layout.setObjectName("gridLayout")
         self.grid_layout.addWidget(self, 0, 0, 1, 1)
 
+        # cache the canvas without the overlays after each full draw
+        self._fig.canvas.mpl_connect('draw_event', self.cb_draw_event)
+
         self._fig.canvas.draw()
 
     def create_area_map(self, x1, x2):
@@ -117,11 +208,12 @@ class MapCanvas1D(PlotCanvas):
             x1 = tmp
 
         # create rectangle patch
-        self._area_rectangle = patches.Rectangle((-1000000000, x1 - 0.5), 2000000000, x2-x1+1, alpha=0.5)
+        self._area_rectangle = patches.Rectangle((-1000000000, x1 - 0.5), 2000000000, x2-x1+1, alpha=0.5,
+                                                 animated=True)
         self._axes.add_patch(self._area_rectangle)
 
         # redraw
-        self._fig.canvas.draw()
+        self.draw_overlays()
 
     def update_area_map(self, x1, x2):
 
@@ -136,64 +228,76 @@ class MapCanvas1D(PlotCanvas):
         self._area_rectangle.set_height(x2-x1+1)
 
         # redraw
-        self._fig.canvas.draw()
+        self.draw_overlays()
 
     def destroy_area_map(self):
 
         # destroy rectangle patch
         self._area_rectangle.remove()
+        self._area_rectangle = None
 
         # redraw
-        self._fig.canvas.draw()
+        self.draw_overlays()
 
     def create_threshold_map(self, threshold_data, threshold):
 
         # create threshold map
-        self._threshold_map = self._axes.contourf(numpy.transpose([threshold_data, threshold_data]),
-                                                  [threshold[0], threshold[1]], origin='lower',
-                                                  alpha=0.5,
-                                                  extent=[-100000000, 100000000, -0.5, self._extent[1] - 0.5])
+        self._threshold_map = self.set_overlay(self._axes.contourf(
+            numpy.transpose([threshold_data, threshold_data]), [threshold[0], threshold[1]], origin='lower', alpha=0.5,
+            extent=[-100000000, 100000000, -0.5, self._extent[1] - 0.5]))
 
         # redraw
-        self._fig.canvas.draw()
+        self.draw_overlays()
 
     def update_threshold_map(self, threshold_data, threshold):
 
         # remove old threshold map
-        for collection in self._threshold_map.collections:
-            collection.remove()
+        for artist in self.get_contour_artists(self._threshold_map):
+            artist.remove()
 
         # create new threshold map
-        self._threshold_map = self._axes.contourf(numpy.transpose([threshold_data, threshold_data]),
-                                                  [threshold[0], threshold[1]], origin='lower',
-                                                  alpha=0.5,
-                                                  extent=[-100000000, 100000000, -0.5, self._extent[1] - 0.5])
+        self._threshold_map = self.set_overlay(self._axes.contourf(
+            numpy.transpose([threshold_data, threshold_data]), [threshold[0], threshold[1]], origin='lower', alpha=0.5,
+            extent=[-100000000, 100000000, -0.5, self._extent[1] - 0.5]))
 
         # redraw
-        self._fig.canvas.draw()
+        self.draw_overlays()
 
     def destroy_threshold_map(self):
 
         # destroy threshold map
-        for collection in self._threshold_map.collections:
-            collection.remove()
+        for artist in self.get_contour_artists(self._threshold_map):
+            artist.remove()
+        self._threshold_map = None
 
         # redraw
-        self._fig.canvas.draw()
+        self.draw_overlays()
+
+    def get_crosshair(self):
+
+        # return the lines of the crosshair
+        return [self._crosshair_x]
+
+    def get_overlays(self):
+
+        # return the overlays below the crosshair in the order in which they are drawn
+        overlays = []
+        if self._threshold_map is not None:
+            overlays += self.get_contour_artists(self._threshold_map)
+        if self._area_rectangle is not None:
+            overlays.append(self._area_rectangle)
+        return overlays
 
     def update_crosshair(self):
 
         # get focus
         focus = self._map.get_focus()
 
-        # remove old crosshair
-        self._axes.lines.remove(self._crosshair_x)
-
-        # plot new crosshair
-        self._crosshair_x, = self._axes.plot([-9999999999, 9999999999], [focus, focus], color='black')
+        # move crosshair
+        self._crosshair_x.set_data([-9999999999, 9999999999], [focus, focus])
 
-        # redraw canvas
-        self._fig.canvas.draw()
+        # redraw the crosshair
+        self.draw_crosshair()
 
     def update_data(self, fix_limits=True):
 
@@ -227,12 +331,12 @@ class MapCanvas1D(PlotCanvas):
             self._map_plot_1d, = self._axes.plot(data, range(self._extent[1]), color='black')
 
             # set axes limits
-            self._axes.set_xlim([numpy.min(data[~numpy.isnan(data)]), numpy.max(data[~numpy.isnan(data)])])
+            self._axes.set_xlim(self.get_limits(data))
             if not fix_limits:
                 self._axes.set_ylim([-0.5, self._extent[1] - 0.5])
             else:
                 self._axes.set_ylim(old_lim)
-            self._axes.set_xlim([numpy.min(data[~numpy.isnan(data)]), numpy.max(data[~numpy.isnan(data)])])
+            self._axes.set_xlim(self.get_limits(data))
 
             # plot new 1d data
             self._map_plot_1d.set_visible(True)
@@ -248,7 +352,7 @@ class MapCanvas1D(PlotCanvas):
         self._fig.canvas.draw()
 
 
-class MapCanvas2D(PlotCanvas):
+class MapCanvas2D(OverlayCanvas):
 
     def __init__(self, parent, map_handle):
 
@@ -278,9 +382,18 @@ class MapCanvas2D(PlotCanvas):
         self._map_plot = self._axes.imshow(numpy.transpose(self._map.get_data()), animated=True, aspect='auto',
                                            interpolation='none', origin='lower', cmap='nipy_spectral')
 
-        # create crosshair
-        self._crosshair_x, = self._axes.plot([0], [0], color='black')
-        self._crosshair_y, = self._axes.plot([0], [0], color='black')
+        # create crosshair and the empty overlays, all overlays are drawn on top of the cached canvas
+        self._crosshair_x, = self._axes.plot([0], [0], color='black', animated=True)
+        self._crosshair_y, = self._axes.plot([0], [0], color='black', animated=True)
+        self._area_rectangle = None
+        self._threshold_map_lines = None
+        self._threshold_map_filling = None
+        self._background = None
+        self._overlay_background = None
+
+        # the limits of the axes are set with the data, the overlays drawn on top of the cached canvas must not change
+        # them
+        self._axes.set_autoscale_on(False)
 
         # create axes for colorbar
         self._caxes = self._fig.add_subplot(gs[1])
@@ -297,6 +410,9 @@ class MapCanvas2D(PlotCanvas):
         self.grid_layout.setObjectName("gridLayout")
         self.grid_layout.addWidget(self, 0, 0, 1, 1)
 
+        # cache the canvas without the overlays after each full draw
+        self._fig.canvas.mpl_connect('draw_event', self.cb_draw_event)
+
         # draw canvas
         self._fig.canvas.draw()
 
@@ -319,11 +435,11 @@ class MapCanvas2D(PlotCanvas):
 
         # create rectangle patch
         self._area_rectangle = patches.Rectangle((x1-0.5, y1-0.5), x2-x1+1, y2-y1+1, linewidth=1.5,
-                                                 facecolor=(1, 1, 1, 0.5), edgecolor=(0, 0, 0, 1))
+                                                 facecolor=(1, 1, 1, 0.5), edgecolor=(0, 0, 0, 1), animated=True)
         self._axes.add_patch(self._area_rectangle)
 
         # redraw
-        self._fig.canvas.draw()
+        self.draw_overlays()
 
     def update_area_map(self, x1, x2, y1, y2):
 
@@ -344,76 +460,87 @@ class MapCanvas2D(PlotCanvas):
         self._area_rectangle.set_height(y2-y1+1)
 
         # redraw
-        self._fig.canvas.draw()
+        self.draw_overlays()
 
     def destroy_area_map(self):
 
         # remove rectangle patch
         self._area_rectangle.remove()
+        self._area_rectangle = None
 
         # redraw
-        self._fig.canvas.draw()
+        self.draw_overlays()
 
     def create_threshold_map(self, threshold_data, threshold):
 
         # create threshold map
-        self._threshold_map_lines = self._axes.contour(numpy.transpose(threshold_data), threshold, colors=('k', 'k'),
-                                                       origin='lower',
-                                                       extent=[-0.5, self._extent[0] - 0.5, -0.5, self._extent[1] - 0.5])
-        self._threshold_map_filling = self._axes.contourf(numpy.transpose(threshold_data), threshold, colors='w',
-                                                          origin='lower',
-                                                          extent=[-0.5, self._extent[0] - 0.5, -0.5, self._extent[1] - 0.5],
-                                                          alpha=0.5)
+        self._threshold_map_lines = self.set_overlay(self._axes.contour(
+            numpy.transpose(threshold_data), threshold, colors=('k', 'k'), origin='lower',
+            extent=[-0.5, self._extent[0] - 0.5, -0.5, self._extent[1] - 0.5]))
+        self._threshold_map_filling = self.set_overlay(self._axes.contourf(
+            numpy.transpose(threshold_data), threshold, colors='w', origin='lower',
+            extent=[-0.5, self._extent[0] - 0.5, -0.5, self._extent[1] - 0.5], alpha=0.5))
 
         # redraw
-        self._fig.canvas.draw()
+        self.draw_overlays()
 
     def update_threshold_map(self, threshold_data, threshold):
 
         # remove old threshold map
-        for collection in self._threshold_map_lines.collections:
-            collection.remove()
-        for collection in self._threshold_map_filling.collections:
-            collection.remove()
+        for artist in self.get_contour_artists(self._threshold_map_lines) + \
+                self.get_contour_artists(self._threshold_map_filling):
+            artist.remove()
 
         # create new threshold map
-        self._threshold_map_lines = self._axes.contour(numpy.transpose(threshold_data),
-                                                       threshold, colors=('k', 'k'), origin='lower',
-                                                       extent=[-0.5, self._extent[0] - 0.5, -0.5, self._extent[1] - 0.5])
-        self._threshold_map_filling = self._axes.contourf(numpy.transpose(threshold_data),
-                                                          threshold, colors='w', origin='lower',
-                                                          extent=[-0.5, self._extent[0] - 0.5, -0.5, self._extent[1] - 0.5],
-                                                          alpha=0.5)
+        self._threshold_map_lines = self.set_overlay(self._axes.contour(
+            numpy.transpose(threshold_data), threshold, colors=('k', 'k'), origin='lower',
+            extent=[-0.5, self._extent[0] - 0.5, -0.5, self._extent[1] - 0.5]))
+        self._threshold_map_filling = self.set_overlay(self._axes.contourf(
+            numpy.transpose(threshold_data), threshold, colors='w', origin='lower',
+            extent=[-0.5, self._extent[0] - 0.5, -0.5, self._extent[1] - 0.5], alpha=0.5))
 
         # redraw
-        self._fig.canvas.draw()
+        self.draw_overlays()
 
     def destroy_threshold_map(self):
 
         # remove threshold map
-        for collection in self._threshold_map_lines.collections:
-            collection.remove()
-        for collection in self._threshold_map_filling.collections:
-            collection.remove()
+        for artist in self.get_contour_artists(self._threshold_map_lines) + \
+                self.get_contour_artists(self._threshold_map_filling):
+            artist.remove()
+        self._threshold_map_lines = None
+        self._threshold_map_filling = None
 
         # redraw
-        self._fig.canvas.draw()
+        self.draw_overlays()
+
+    def get_crosshair(self):
+
+        # return the lines of the crosshair
+        return [self._crosshair_x, self._crosshair_y]
+
+    def get_overlays(self):
+
+        # return the overlays below the crosshair in the order in which they are drawn
+        overlays = []
+        if self._threshold_map_lines is not None:
+            overlays += self.get_contour_artists(self._threshold_map_filling)
+            overlays += self.get_contour_artists(self._threshold_map_lines)
+        if self._area_rectangle is not None:
+            overlays.append(self._area_rectangle)
+        return overlays
 
     def update_crosshair(self):
 
         # get focus
         focus = self._map.get_focus()
 
-        # remove old crosshair
-        self._axes.lines.remove(self._crosshair_x)
-        self._axes.lines.remove(self._crosshair_y)
-
-        # plot new crosshair
-        self._crosshair_x, = self._axes.plot([focus[0], focus[0]], [-9999999999, 9999999999], color='black')
-        self._crosshair_y, = self._axes.plot([-9999999999, 9999999999], [focus[1], focus[1]], color='black')
+        # move crosshair
+        self._crosshair_x.set_data([focus[0], focus[0]], [-9999999999, 9999999999])
+        self._crosshair_y.set_data([-9999999999, 9999999999], [focus[1], focus[1]])
 
-        # redraw canvas
-        self._fig.canvas.draw()
+        # redraw the crosshair
+        self.draw_crosshair()
 
     def update_data(self, fix_limits=True):
 
@@ -446,7 +573,7 @@ class MapCanvas2D(PlotCanvas):
             self._axes.set_ylim(old_y_lim)
 
         # update colorbar limits
-        self._map_plot.set_clim([numpy.min(data[~numpy.isnan(data)]), numpy.max(data[~numpy.isnan(data)])])
+        self._map_plot.set_clim(self.get_limits(data))
 
         # update title
         self._axes.set_title(self._map.get_data_name())
@@ -506,6 +633,82 @@ class MapCanvas2DToolbar(NavigationToolbar):
         self.canvas.draw()
 
 
+class PreviewCanvas(PlotCanvas):
+
+    """
+    PreviewCanvas
+    Canvas showing the integrated counts of a map while it is loaded.
+    """
+
+    def __init__(self, parent):
+
+        # create figure
+        self._fig = Figure()
+        self._fig.set_facecolor('none')
+
+        # create a grid for plot and colorbar
+        gs = gridspec.GridSpec(1, 2, width_ratios=[10, 1])
+
+        # create axes for plot
+        self._axes = self._fig.add_subplot(gs[0])
+        self._axes.set_xlabel('x pixel')
+        self._axes.set_ylabel('y pixel')
+        self._axes.set_title('integral (loading)')
+
+        # the plots are created with the first preview since its dimension is not known before
+        self._caxes = self._fig.add_subplot(gs[1])
+        self._map_plot = None
+
+        # set tight layout
+        self._fig.tight_layout()
+
+        # call super canvas init
+        FigureCanvas.__init__(self, self._fig)
+
+        # set parent widget
+        self.grid_layout = QGridLayout(parent)
+        self.grid_layout.setObjectName("gridLayout")
+        self.grid_layout.addWidget(self, 0, 0, 1, 1)
+
+        # draw canvas
+        self._fig.canvas.draw()
+
+    def update_data(self, preview):
+
+        # pixels which are not loaded yet are NaN and are not drawn
+        loaded = preview[~numpy.isnan(preview)]
+
+        if len(preview.shape) == 2:
+
+            # create the image for 2d maps with the first preview
+            if self._map_plot is None:
+                self._map_plot = self._axes.imshow(numpy.transpose(preview), aspect='auto', interpolation='none',
+                                                   origin='lower', cmap='nipy_spectral')
+                self._fig.colorbar(self._map_plot, cax=self._caxes)
+            else:
+                self._map_plot.set_data(numpy.transpose(preview))
+
+            # update colorbar limits
+            if len(loaded) > 0:
+                self._map_plot.set_clim([numpy.min(loaded), numpy.max(loaded)])
+
+        else:
+
+            # 1d maps are shown as a line of the integrated counts along the pixels
+            if self._map_plot is None:
+                self._caxes.set_visible(False)
+                self._axes.set_xlabel('integral')
+                self._map_plot, = self._axes.plot(preview, numpy.arange(len(preview)), color='black')
+                self._axes.set_ylim([-0.5, len(preview) - 0.5])
+            else:
+                self._map_plot.set_xdata(preview)
+            if len(loaded) > 0:
+                self._axes.set_xlim([numpy.min(loaded), numpy.max(loaded) + 1e-12])
+
+        # redraw canvas
+        self._fig.canvas.draw()
+
+
 class MicrographCanvas(PlotCanvas):
 
     def __init__(self, map_data, map_data_title, micrograph_file, parent):
@@ -644,9 +847,8 @@ class SpectrumCanvas(PlotCanvas):
         self._axes.plot(spectrum[:, 0], spectrum[:, 1], color='black', label='Spectrum')
         self._axes.plot([spectrum[0, 0], spectrum[0, 0]], [-100000000, 100000000], 'r--')
         self._axes.plot([spectrum[-1, 0], spectrum[-1, 0]], [-100000000, 100000000], 'r--')
-        self._axes.set_xlim([numpy.min(spectrum[:, 0]), numpy.max(spectrum[:, 0])])
-        self._axes.set_ylim([numpy.min(spectrum[:, 1]), numpy.max(spectrum[:, 1]) + 0.1 *
-                             (numpy.max(spectrum[:, 1]) - numpy.min(spectrum[:, 1]))])
+        self._axes.set_xlim(self.get_limits(spectrum[:, 0]))
+        self._axes.set_ylim(self.get_limits(spectrum[:, 1], 0.1))
         self._axes.legend()
 
         # get energies for cursor positioning
@@ -747,9 +949,8 @@ class SpectrumCanvas(PlotCanvas):
         self._axes.plot([self._energies[interval[1]], self._energies[interval[1]]], [-100000000, 100000000], 'r--')
 
         # update axes limits
-        self._axes.set_xlim([numpy.min(data['spectrum'][:, 0]), numpy.max(data['spectrum'][:, 0])])
-        self._axes.set_ylim([numpy.min(data['spectrum'][:, 1]), numpy.max(data['spectrum'][:, 1]) + 0.1 *
-                             (numpy.max(data['spectrum'][:, 1]) - numpy.min(data['spectrum'][:, 1]))])
+        self._axes.set_xlim(self.get_limits(data['spectrum'][:, 0]))
+        self._axes.set_ylim(self.get_limits(data['spectrum'][:, 1], 0.1))
 
         # set labels and titles
         self._axes.set_xlabel('energy [eV]')
@@ -43,7 +43,7 @@ class PixelInformationWidget(QWidget):
             5*numpy.sum(numpy.int_(fit_functions == 3))
 
         # update table
-        self.ui.pixel_information_table_widget.setRowCount(3+len(data_names)+n_parameters+dimension)
+        self.ui.pixel_information_table_widget.setRowCount(4+len(data_names)+n_parameters+dimension)
         self.ui.pixel_information_table_widget.setColumnCount(2)
         self.ui.pixel_information_table_widget.horizontalHeader().setStretchLastSection(True)
         self.ui.pixel_information_table_widget.horizontalHeader().hide()
@@ -73,7 +73,7 @@ class PixelInformationWidget(QWidget):
             self.ui.pixel_information_table_widget.setItem(1, 1, data_widget)
 
         # add data derived from spectra
-        names = {0: '-- integral', 1: '-- mean', 2: '-- maximum'}
+        names = {0: '-- integral', 1: '-- mean', 2: '-- maximum', 3: '-- peak'}
         for i in range(len(names)):
             name_widget = QTableWidgetItem(names[i])
             name_widget.setFlags(Qt.ItemIsEnabled)
@@ -90,13 +90,13 @@ class PixelInformationWidget(QWidget):
             name_widget.setFlags(Qt.ItemIsEnabled)
 
             # data column
-            data_value = self._map.get_data(data_index=4+data_id, pixel=-2)
+            data_value = self._map.get_data(data_index=5+data_id, pixel=-2)
             data_widget = QTableWidgetItem(str(data_value))
             data_widget.setFlags(Qt.ItemIsEnabled)
 
             # add widgets to table
-            self.ui.pixel_information_table_widget.setItem(3+data_id+dimension, 0, name_widget)
-            self.ui.pixel_information_table_widget.setItem(3+data_id+dimension, 1, data_widget)
+            self.ui.pixel_information_table_widget.setItem(4+data_id+dimension, 0, name_widget)
+            self.ui.pixel_information_table_widget.setItem(4+data_id+dimension, 1, data_widget)
 
         j_parameter = 0
         for i_peak in range(len(fit_functions)):
@@ -108,8 +108,8 @@ class PixelInformationWidget(QWidget):
                 name_widget.setFlags(Qt.ItemIsEnabled)
                 data_widget = QTableWidgetItem(str(fit_optimized_parameters[i_peak, 0]))
                 data_widget.setFlags(Qt.ItemIsEnabled)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 0, name_widget)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 1, data_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 0, name_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 1, data_widget)
                 j_parameter += 1
 
                 # wavelength
@@ -117,19 +117,19 @@ class PixelInformationWidget(QWidget):
                 name_widget.setFlags(Qt.ItemIsEnabled)
                 data_widget = QTableWidgetItem(str(fit_optimized_parameters[i_peak, 1]))
                 data_widget.setFlags(Qt.ItemIsEnabled)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 0, name_widget)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 1, data_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 0, name_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 1, data_widget)
                 j_parameter += 1
 
-            if fit_functions[i_peak] == 1:
+            if fit_functions[i_peak] == 2:
 
                 # gamma
                 name_widget = QTableWidgetItem('γ'+str(i_peak+1))
                 name_widget.setFlags(Qt.ItemIsEnabled)
                 data_widget = QTableWidgetItem(str(1000*fit_optimized_parameters[i_peak, 2]))
                 data_widget.setFlags(Qt.ItemIsEnabled)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 0, name_widget)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 1, data_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 0, name_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 1, data_widget)
                 j_parameter += 1
 
                 # FWHM
@@ -137,19 +137,19 @@ class PixelInformationWidget(QWidget):
                 name_widget.setFlags(Qt.ItemIsEnabled)
                 data_widget = QTableWidgetItem(str(2*1000*fit_optimized_parameters[i_peak, 2]))
                 data_widget.setFlags(Qt.ItemIsEnabled)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 0, name_widget)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 1, data_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 0, name_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 1, data_widget)
                 j_parameter += 1
 
-            if fit_functions[i_peak] == 2:
+            if fit_functions[i_peak] == 1:
 
                 # sigma
                 name_widget = QTableWidgetItem('σ'+str(i_peak+1))
                 name_widget.setFlags(Qt.ItemIsEnabled)
                 data_widget = QTableWidgetItem(str(1000*fit_optimized_parameters[i_peak, 2]))
                 data_widget.setFlags(Qt.ItemIsEnabled)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 0, name_widget)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 1, data_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 0, name_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 1, data_widget)
                 j_parameter += 1
 
                 # FWHM
@@ -157,8 +157,8 @@ class PixelInformationWidget(QWidget):
                 name_widget.setFlags(Qt.ItemIsEnabled)
                 data_widget = QTableWidgetItem(str(2.35482*1000*fit_optimized_parameters[i_peak, 2]))
                 data_widget.setFlags(Qt.ItemIsEnabled)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 0, name_widget)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 1, data_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 0, name_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 1, data_widget)
                 j_parameter += 1
 
             if fit_functions[i_peak] == 3:
@@ -168,8 +168,8 @@ class PixelInformationWidget(QWidget):
                 name_widget.setFlags(Qt.ItemIsEnabled)
                 data_widget = QTableWidgetItem(str(1000*fit_optimized_parameters[i_peak, 2]))
                 data_widget.setFlags(Qt.ItemIsEnabled)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 0, name_widget)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 1, data_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 0, name_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 1, data_widget)
                 j_parameter += 1
 
                 # gamma
@@ -177,8 +177,8 @@ class PixelInformationWidget(QWidget):
                 name_widget.setFlags(Qt.ItemIsEnabled)
                 data_widget = QTableWidgetItem(str(1000*fit_optimized_parameters[i_peak, 3]))
                 data_widget.setFlags(Qt.ItemIsEnabled)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 0, name_widget)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 1, data_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 0, name_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 1, data_widget)
                 j_parameter += 1
 
                 # FWHM
@@ -188,8 +188,8 @@ class PixelInformationWidget(QWidget):
                 gamma = 1000*fit_optimized_parameters[i_peak, 3]
                 data_widget = QTableWidgetItem(str(0.5346*2.*gamma+numpy.sqrt(0.2166*4.*gamma**2.+2.35482**2.*sigma**2.)))
                 data_widget.setFlags(Qt.ItemIsEnabled)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 0, name_widget)
-                self.ui.pixel_information_table_widget.setItem(3+len(data_names)+j_parameter+dimension, 1, data_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 0, name_widget)
+                self.ui.pixel_information_table_widget.setItem(4+len(data_names)+j_parameter+dimension, 1, data_widget)
                 j_parameter += 1
 
 
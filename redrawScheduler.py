@@ -0,0 +1,129 @@
+# general imports
+import functools
+import time
+# import PyQt5 elements
+from PyQt5.QtCore import QEvent, QObject, QTimer
+
+
+class RedrawScheduler(QObject):
+
+    """
+    RedrawScheduler
+    The scheduler receives the events of the maps as dirty notices and coalesces them, each affected view is redrawn at
+    most once per frame. Views of hidden windows and of maps which are not selected are redrawn once they are shown.
+    """
+
+    # minimum time between two redraws in seconds
+    frame_interval = 1. / 30
+
+    # maximum fraction of the time spent on redrawing during long batch runs
+    redraw_fraction = 0.25
+
+    def __init__(self, app):
+
+        # call object init
+        QObject.__init__(self)
+
+        # link app
+        self._app = app
+
+        # create all variables
+        self._views = {}            # the views which are redrawn for each event as windows with their redraw callables
+        self._pending = {}          # regions of the views and maps which are redrawn with the next frame
+        self._stale = {}            # regions of the views and maps which are redrawn once they are shown
+        self._next_redraw = 0       # the earliest time of the next redraw
+
+        # timer which starts the next redraw
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.redraw)
+
+        # events which concern a part of a map carry the bounding box of the changed pixels
+        self._app.region_changed.connect(self.request)
+
+        # stale views of a map are redrawn when the map is selected
+        self._app.selected_map_changed.connect(self.wake)
+
+    def add_view(self, event, window, redraw, focused=False):
+
+        # register a view which is redrawn by calling redraw with the map id after the event, views showing the focused
+        # pixel only are not redrawn for events which concern other pixels
+        if event not in self._views:
+            self._views[event] = []
+            getattr(self._app, event).connect(functools.partial(self.request, event=event))
+        self._views[event].append((window, redraw, focused))
+
+        # stale views are redrawn when their window is shown
+        window.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+
+        # redraw the stale views once a window is shown, the event is passed on
+        if event.type() == QEvent.Show:
+            self.wake()
+        return False
+
+    @staticmethod
+    def merge_regions(region, other):
+
+        # return the bounding box of both regions, None stands for the whole map
+        if region is None or other is None:
+            return None
+        return [[min(axis[0], other_axis[0]), max(axis[1], other_axis[1])] for axis, other_axis in zip(region, other)]
+
+    def redraw(self):
+
+        # redraw the views of the pending notices which are shown, the others are redrawn once they are shown
+        pending = self._pending
+        self._pending = {}
+        start = time.perf_counter()
+        maps = self._app.maps.get_maps()
+        for (window, redraw, map_id), region in pending.items():
+            if map_id not in maps:
+                continue
+            if window.isVisible() and maps[map_id] is self._app.maps.get_selected_map():
+                redraw(map_id)
+            else:
+                self.store(self._stale, (window, redraw, map_id), region)
+
+        # long redraws delay the next frame so that batch runs spend most of their time on their work
+        duration = time.perf_counter() - start
+        self._next_redraw = time.perf_counter() + max(self.frame_interval, duration / self.redraw_fraction)
+
+        # notices which arrived during the redraw are redrawn with the next frame
+        if len(self._pending) > 0:
+            self.schedule()
+
+    def request(self, map_id, event, region=None):
+
+        # add a dirty notice for all views of the event, the region is the bounding box of the changed pixels or None if
+        # the whole map has changed
+        map_handle = self._app.maps.get_maps().get(map_id)
+        for window, redraw, focused in self._views.get(event, []):
+            if focused and region is not None and map_handle is not None and \
+                    not all(start <= focus < stop for (start, stop), focus in zip(region, map_handle.get_focus())):
+                continue
+            self.store(self._pending, (window, redraw, map_id), region)
+        self.schedule()
+
+    def schedule(self):
+
+        # start the timer for the next frame unless it is running already
+        if len(self._pending) > 0 and not self._timer.isActive():
+            self._timer.start(max(0, int(1000 * (self._next_redraw - time.perf_counter()))))
+
+    def store(self, notices, key, region):
+
+        # coalesce the notice with an earlier notice of the same view and map
+        if key in notices:
+            notices[key] = self.merge_regions(notices[key], region)
+        else:
+            notices[key] = region
+
+    def wake(self, *args):
+
+        # move the stale notices back to the pending notices, views which are still hidden stay stale
+        for key, region in self._stale.items():
+            self.store(self._pending, key, region)
+        self._stale = {}
+        self.schedule()
@@ -56,7 +56,7 @@ class SpectrumWidget(QWidget):
                 return
 
             # find pixel of clicked energy
-            energies = self._map.get_spectrum()[:,0]
+            energies = self._map.get_energies()
             for i_energy in range(len(energies)):
                 if energies[i_energy] > event.xdata:
                     self._map.set_interval('left', i_energy)
@@ -69,7 +69,7 @@ class SpectrumWidget(QWidget):
                 return
 
             # find pixel of clicked energy
-            energies = self._map.get_spectrum()[:,0]
+            energies = self._map.get_energies()
             for i_energy in range(len(energies)):
                 if energies[i_energy] > event.xdata:
                     self._map.set_interval('right', i_energy)
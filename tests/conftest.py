@@ -0,0 +1,29 @@
+# general imports
+import numpy
+import pytest
+# map imports
+from maps import Map2D
+
+
+@pytest.fixture
+def map_file(tmp_path):
+
+    # write a small Horiba export with random counts, the map is not square so that swapped axes are noticed
+    nx, ny, resolution = 6, 4, 32
+    rng = numpy.random.default_rng(1)
+    file_name = str(tmp_path / 'map.txt')
+    with open(file_name, 'w') as file_data:
+        energies = numpy.linspace(1.7, 2.1, resolution)
+        file_data.write('\t\t' + '\t'.join('%.6f' % energy for energy in energies) + '\n')
+        for ix in range(nx):
+            for iy in range(ny):
+                counts = rng.integers(0, 1000, resolution)
+                file_data.write('%.1f\t%.1f\t' % (ix, iy) + '\t'.join('%d' % count for count in counts) + '\n')
+    return file_name
+
+
+@pytest.fixture
+def map_2d(map_file):
+
+    # a two-dimensional map of the small Horiba export
+    return Map2D(0, map_file)
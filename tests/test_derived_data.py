@@ -0,0 +1,47 @@
+# general imports
+import numpy
+import pytest
+
+
+def get_expected_max_energies(map_handle):
+
+    # the energies at the maxima of the spectra within the interval looked up pixel by pixel
+    start, stop = map_handle.get_interval()
+    nx, ny = map_handle.get_size()
+    max_energies = numpy.zeros((nx, ny))
+    for ix in range(nx):
+        for iy in range(ny):
+            spectrum = map_handle.get_spectrum(pixel=[ix, iy])
+            max_energies[ix, iy] = spectrum[start:stop, 0][numpy.argmax(spectrum[start:stop, 1])]
+    return max_energies
+
+
+def test_max_energies_are_calculated_on_request(map_2d):
+
+    # changing the interval does not look for the maxima until the energies at the maxima are requested
+    map_2d.set_interval('left', 4)
+    map_2d.set_interval('right', 20)
+    assert map_2d._max_energies is None
+    assert map_2d.get_data(data_index=3, pixel=[2, 1]) == get_expected_max_energies(map_2d)[2, 1]
+    assert map_2d._max_energies is None
+    assert numpy.array_equal(map_2d.get_data(data_index=3), get_expected_max_energies(map_2d))
+    assert map_2d._max_energies is not None
+
+    # once they are calculated, changed spectra update them pixel by pixel until the interval changes again
+    spectra = numpy.zeros((2, map_2d.get_resolution()))
+    spectra[:, [5, 18]] = 1.
+    map_2d.set_spectra([[0, 0], [3, 2]], spectra)
+    assert numpy.array_equal(map_2d.get_data(data_index=3), get_expected_max_energies(map_2d))
+    map_2d.set_interval('left', 10)
+    assert map_2d._max_energies is None
+    assert map_2d.get_data(data_index=3, pixel=[0, 0]) == pytest.approx(map_2d.get_energies()[18])
+    assert numpy.array_equal(map_2d.get_data(data_index=3), get_expected_max_energies(map_2d))
+
+
+def test_pixels_without_spectra_have_no_maximum(map_2d):
+
+    # a pixel whose spectrum is not known yet has no energy at its maximum
+    map_2d.set_spectra([[1, 1]], numpy.full((1, map_2d.get_resolution()), numpy.nan))
+    assert numpy.isnan(map_2d.get_data(data_index=3, pixel=[1, 1]))
+    assert numpy.isnan(map_2d.get_data(data_index=3)[1, 1])
+    assert numpy.sum(numpy.isnan(map_2d.get_data(data_index=3))) == 1
@@ -0,0 +1,86 @@
+# general imports
+import numpy
+import pytest
+
+
+def test_fit_parameters_follow_the_fit_functions(map_2d):
+
+    # fit the first peak of three pixels with a Gaussian (1), a Lorentzian (2) and a Voigt (3) as the fitting window
+    # does, the third parameter is sigma of Gaussians and Voigts or gamma of Lorentzians, the fourth is gamma of Voigts
+    parameters = numpy.array([1000., 1.9, 0.002, 0.003])
+    for px, function in enumerate([1, 2, 3]):
+        map_2d.set_fit(numpy.array([function, 0, 0, 0, 0, 0]), parameters, parameters, pixel=[px, 0])
+
+    # the catalog lists sigma and gamma of the first peak only
+    assert map_2d.get_fit_catalog() == [[0, 0], [0, 1], [0, 2], [0, 3], [0, 4]]
+    assert map_2d.get_fit_catalog_names() == ['I₁', 'ε₁', 'σ₁', 'γ₁', 'FWHM₁']
+
+    # sigma, gamma and FWHM in meV are taken from the parameters of the matching fit function
+    sigma = map_2d.get_fit_data(0, 2)
+    gamma = map_2d.get_fit_data(0, 3)
+    fwhm = map_2d.get_fit_data(0, 4)
+    voigt = 0.5346 * 2. * 3. + numpy.sqrt(0.2166 * 4. * 3. ** 2. + 2.35482 ** 2. * 2. ** 2.)
+    assert numpy.allclose(sigma[:3, 0], [2., numpy.nan, 2.], equal_nan=True)
+    assert numpy.allclose(gamma[:3, 0], [numpy.nan, 2., 3.], equal_nan=True)
+    assert numpy.allclose(fwhm[:3, 0], [2.35482 * 2., 2. * 2., voigt])
+    assert numpy.all(numpy.isnan(fwhm[3:, 0])) and numpy.all(numpy.isnan(fwhm[:, 1:]))
+
+
+def count_used_slots(map_handle):
+
+    # return the number of slots of the parameter pool which are not free
+    return len(map_handle._fit_parameters) - len(map_handle._fit_free)
+
+
+def test_fitted_pixels_take_one_slot_each(map_2d):
+
+    # only fitted pixels take a slot of the parameter pool
+    parameters = numpy.full((6, 4), 1.)
+    mask = numpy.zeros(map_2d.get_size(), dtype=bool)
+    mask[1:4, 1:3] = True
+    map_2d.set_fits(mask, numpy.array([1, 0, 0, 0, 0, 0]), parameters, parameters)
+    assert count_used_slots(map_2d) == 6
+    assert numpy.array_equal(map_2d.get_fit_functions()[..., 0] == 1, mask)
+
+    # fitting the pixels again keeps their slots
+    map_2d.set_fits(mask, numpy.array([3, 2, 0, 0, 0, 0]), parameters, 2 * parameters)
+    assert count_used_slots(map_2d) == 6
+    assert numpy.all(map_2d.get_fit(pixel=[2, 2])[2][:2] == 2.)
+
+
+def test_cleared_slots_are_reused(map_2d):
+
+    # the slots of cleared fits are taken by the next fits before the pool grows
+    parameters = numpy.full((6, 4), 1.)
+    map_2d.set_fits(numpy.ones(map_2d.get_size(), dtype=bool), numpy.array([1, 0, 0, 0, 0, 0]), parameters, parameters)
+    capacity = len(map_2d._fit_parameters)
+    map_2d.clear_fits([[0, 0], [1, 1], [2, 2]])
+    assert count_used_slots(map_2d) == 21
+    assert map_2d.get_fit_catalog_names() == ['I₁', 'ε₁', 'σ₁', 'FWHM₁']
+    map_2d.clear_fits(numpy.ones(map_2d.get_size(), dtype=bool))
+    assert count_used_slots(map_2d) == 0
+    assert map_2d.get_fit_catalog_names() == []
+    map_2d.set_fits(numpy.ones(map_2d.get_size(), dtype=bool), numpy.array([2, 0, 0, 0, 0, 0]), parameters, parameters)
+    assert count_used_slots(map_2d) == 24
+    assert len(map_2d._fit_parameters) == capacity
+    assert numpy.all(map_2d.get_fit_data(0, 3) == 1000.)
+
+
+def test_duplicate_pixels_keep_their_last_fit(map_2d):
+
+    # a pixel which is given twice in one call takes one slot and keeps the fit given last
+    functions = numpy.array([[1, 0, 0, 0, 0, 0], [2, 0, 0, 0, 0, 0], [3, 1, 0, 0, 0, 0]])
+    parameters = numpy.arange(3 * 6 * 4, dtype='float64').reshape((3, 6, 4))
+    map_2d.set_fits([[0, 0], [1, 1], [0, 0]], functions, parameters, parameters + 1)
+    assert count_used_slots(map_2d) == 2
+    fit_functions, initial_parameters, optimized_parameters = map_2d.get_fit(pixel=[0, 0])
+    assert numpy.array_equal(fit_functions, functions[2])
+    assert numpy.array_equal(initial_parameters[:2], parameters[2, :2])
+    assert numpy.array_equal(optimized_parameters[:2], parameters[2, :2] + 1)
+    assert map_2d.get_fit(pixel=[1, 1])[0][0] == 2
+
+    # the counts of the catalog include each pixel once
+    assert map_2d.get_fit_catalog_names() == ['I₁', 'ε₁', 'σ₁', 'γ₁', 'FWHM₁', 'I₂', 'ε₂', 'σ₂', 'FWHM₂']
+    map_2d.clear_fits([[0, 0], [0, 0]])
+    assert count_used_slots(map_2d) == 1
+    assert map_2d.get_fit_catalog_names() == ['I₁', 'ε₁', 'γ₁', 'FWHM₁']
@@ -0,0 +1,119 @@
+# general imports
+import numpy
+import pytest
+# datatype imports
+from datatypes.history import History
+
+
+@pytest.fixture
+def map_2d(map_2d):
+
+    # the derived data of a new map are summed over all energies while changed pixels are summed over the interval,
+    # setting the interval sums all pixels over the interval so that the states before and after a change agree
+    map_2d.set_interval('left', 2)
+    map_2d.set_interval('right', map_2d.get_resolution() - 3)
+    return map_2d
+
+
+def get_state(map_handle):
+
+    # return the counts of all pixels and the integrated counts and mean energies which are derived from them
+    mask = numpy.ones(map_handle.get_size(), dtype=bool)
+    return [map_handle.get_counts(mask).copy(), map_handle.get_data(data_index=1).copy(),
+            map_handle.get_data(data_index=2).copy()]
+
+
+def assert_identical(state, other_state):
+
+    # compare the bytes so that also NaNs and the signs of zeros have to match
+    for array, other_array in zip(state, other_state):
+        assert array.dtype == other_array.dtype
+        assert array.tobytes() == other_array.tobytes()
+
+
+def change_spectra(map_handle, seed):
+
+    # replace the spectra of a few pixels by random counts
+    rng = numpy.random.default_rng(seed)
+    mask = rng.random(map_handle.get_size()) < 0.3
+    mask[0, 0] = True
+    map_handle.set_spectra(mask, rng.random((numpy.sum(mask), map_handle.get_resolution())) * 1000)
+
+
+def test_undo_and_redo_are_bit_identical(map_2d):
+
+    # undoing a change restores the spectra and the derived data exactly, redoing it restores the change exactly
+    initial_state = get_state(map_2d)
+    change_spectra(map_2d, 0)
+    changed_state = get_state(map_2d)
+    assert map_2d.get_history().get_undo_name() == 'Change Spectra'
+    map_2d.undo()
+    assert_identical(get_state(map_2d), initial_state)
+    assert not map_2d.get_history().can_undo()
+    map_2d.redo()
+    assert_identical(get_state(map_2d), changed_state)
+    assert not map_2d.get_history().can_redo()
+
+
+def test_nested_steps_are_one_step(map_2d):
+
+    # all changes within the outermost step are undone and redone together
+    initial_state = get_state(map_2d)
+    with map_2d.history_step('Outer'):
+        change_spectra(map_2d, 0)
+        with map_2d.history_step('Inner'):
+            change_spectra(map_2d, 1)
+            change_spectra(map_2d, 2)
+        assert not map_2d.get_history().can_undo()
+    changed_state = get_state(map_2d)
+    assert map_2d.get_history().get_undo_name() == 'Outer'
+    map_2d.undo()
+    assert_identical(get_state(map_2d), initial_state)
+    assert not map_2d.get_history().can_undo()
+    map_2d.redo()
+    assert_identical(get_state(map_2d), changed_state)
+
+
+def test_failing_step_is_closed(map_2d):
+
+    # a step whose changes fail is still ended and keeps the changes which were made before the failure
+    initial_state = get_state(map_2d)
+    with pytest.raises(RuntimeError):
+        with map_2d.history_step('Failing'):
+            change_spectra(map_2d, 0)
+            raise RuntimeError()
+    failed_state = get_state(map_2d)
+    assert map_2d.get_history().get_undo_name() == 'Failing'
+
+    # later changes are a step of their own instead of being folded into the failed step
+    change_spectra(map_2d, 1)
+    assert map_2d.get_history().get_undo_name() == 'Change Spectra'
+    map_2d.undo()
+    assert_identical(get_state(map_2d), failed_state)
+    map_2d.undo()
+    assert_identical(get_state(map_2d), initial_state)
+
+
+def test_footprint_is_bounded(map_2d, monkeypatch):
+
+    # the compressed diffs of random counts hardly compress, the oldest steps are dropped to stay within the budget
+    monkeypatch.setattr(History, 'history_bytes', 4 * 1024)
+    states = []
+    for seed in range(20):
+        states.append(get_state(map_2d))
+        change_spectra(map_2d, seed)
+        assert map_2d.get_history().get_footprint() <= History.history_bytes
+    n_steps = 0
+    while map_2d.get_history().can_undo():
+        map_2d.undo()
+        n_steps += 1
+    assert 0 < n_steps < 20
+    assert_identical(get_state(map_2d), states[20 - n_steps])
+
+    # a step which exceeds the budget on its own cannot be undone and drops the steps before it
+    change_spectra(map_2d, 20)
+    with map_2d.history_step('Large'):
+        map_2d.set_spectra(numpy.ones(map_2d.get_size(), dtype=bool),
+                           numpy.random.default_rng(0).random((24, map_2d.get_resolution())) * 1000)
+    assert not map_2d.get_history().can_undo()
+    assert map_2d.get_history().get_footprint() == 0
@@ -0,0 +1,116 @@
+# general imports
+import numpy
+import pytest
+# datatype imports
+from datatypes.maps2d.horiba import Horiba2D
+
+
+def parse_reference(file_name):
+
+    # the line based parser of the original implementation which serves as the reference
+    data_list = []
+    for line in open(file_name).readlines():
+        if line[0] == '#':
+            continue
+        data_list.append(line.split('\t'))
+
+    # the first line includes the energies of the spectra
+    energies = numpy.array(data_list[0][2:], dtype='float64')
+    del data_list[0]
+    if numpy.mean(energies) > 100:
+        energies = 1239.841842144513 / energies
+    data_array = numpy.array(data_list, dtype='float64')
+
+    # get map shape
+    x_positions = []
+    y_positions = []
+    for i_px in range(len(data_array)):
+        if data_array[i_px, 0] not in x_positions:
+            x_positions.append(data_array[i_px, 0])
+        if data_array[i_px, 1] not in y_positions:
+            y_positions.append(data_array[i_px, 1])
+    nx = len(x_positions)
+    ny = len(y_positions)
+
+    # read spectra and position data
+    spectra = numpy.zeros((nx, ny, len(energies), 2))
+    data = numpy.zeros((3, nx, ny))
+    i_px = 0
+    for ix in range(nx):
+        for iy in range(ny):
+            spectra[ix, iy, :, 0] = numpy.flipud(energies)
+            spectra[ix, iy, :, 1] = numpy.flipud(data_array[i_px, 2:])
+            data[0, ix, iy] = numpy.sum(spectra[ix, iy, :, 1])
+            data[1, ix, iy] = data_array[i_px, 0]
+            data[2, ix, iy] = data_array[i_px, 1]
+            i_px += 1
+
+    return spectra, data
+
+
+@pytest.fixture(params=[(600., 700.), (1.7, 2.1)], ids=['nm', 'eV'])
+def horiba_file(request, tmp_path):
+
+    # write a small Horiba export with comments, the energies in the first line and one pixel per line
+    nx, ny, resolution = 7, 5, 32
+    rng = numpy.random.default_rng(0)
+    file_name = str(tmp_path / 'map.txt')
+    with open(file_name, 'w') as file_data:
+        file_data.write('#Acq. time (s)=\t1\n#Grating=\t600\n')
+        energies = numpy.linspace(request.param[0], request.param[1], resolution)
+        file_data.write('\t\t' + '\t'.join('%.6f' % energy for energy in energies) + '\n')
+        for ix in range(nx):
+            for iy in range(ny):
+                counts = rng.integers(0, 1000, resolution)
+                file_data.write('%.1f\t%.1f\t' % (-3. + 1.5 * ix, 2. + 0.5 * iy) +
+                                '\t'.join('%d' % count for count in counts) + '\n')
+    return file_name, (nx, ny, resolution)
+
+
+@pytest.mark.parametrize('chunk_size', [4, 256])
+def test_streaming_parser_matches_reference(horiba_file, chunk_size, monkeypatch):
+
+    # the pixels are parsed in chunks which do not need to divide the number of pixels
+    file_name, shape = horiba_file
+    monkeypatch.setattr(Horiba2D, 'chunk_size', chunk_size)
+    map_name, energies, spectra, data_names, data = Horiba2D(file_name).load_data()
+    reference_spectra, reference_data = parse_reference(file_name)
+
+    # compare the dimensions, the shared energy axis, the counts and the position data
+    assert map_name == 'map'
+    assert spectra.shape == shape
+    assert reference_spectra.shape[:3] == shape
+    assert numpy.array_equal(energies, reference_spectra[0, 0, :, 0])
+    assert numpy.array_equal(numpy.broadcast_to(energies, shape), reference_spectra[..., 0])
+    assert numpy.array_equal(spectra, reference_spectra[..., 1])
+    assert data_names == {0: 'intensity', 1: 'x position', 2: 'y position'}
+    assert numpy.array_equal(data, reference_data)
+
+
+def test_streaming_parser_reports_progress(horiba_file, monkeypatch):
+
+    # the progress is reported after each chunk with a preview of the integrated counts read so far
+    file_name, shape = horiba_file
+    monkeypatch.setattr(Horiba2D, 'chunk_size', 4)
+    reports = []
+    Horiba2D(file_name).load_data(lambda value, maximum, preview: reports.append((value, maximum, preview.copy())))
+    assert [value for value, maximum, preview in reports] == list(range(4, shape[0] * shape[1], 4)) + \
+        [shape[0] * shape[1]]
+    assert numpy.isnan(reports[0][2]).sum() == shape[0] * shape[1] - 4
+    assert not numpy.any(numpy.isnan(reports[-1][2]))
+
+
+@pytest.mark.parametrize('n_lines', [-1, 1])
+def test_parser_rejects_inconsistent_maps(horiba_file, n_lines):
+
+    # a file with a missing or an additional spectrum does not fill the map of its positions exactly
+    file_name, shape = horiba_file
+    lines = open(file_name).readlines()
+    if n_lines < 0:
+        lines = lines[:n_lines]
+    else:
+        lines.append(lines[-1])
+    with open(file_name, 'w') as file_data:
+        file_data.writelines(lines)
+    with pytest.raises(ValueError, match='positions'):
+        Horiba2D(file_name).load_data()
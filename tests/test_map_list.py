@@ -0,0 +1,44 @@
+# general imports
+import pytest
+# map imports
+from maps import MapList
+
+
+@pytest.fixture
+def map_list(map_file):
+
+    # a map list with three maps of the same export, the last one is selected
+    map_list = MapList()
+    for i_map in range(3):
+        map_list.set_selected_map(map_list.append_2d(map_file))
+    return map_list
+
+
+def test_no_map_is_selected_at_first():
+
+    # a new map list has no selected map
+    assert MapList().get_selected_map() is None
+
+
+def test_removing_the_selected_map_selects_the_most_recent_one(map_list):
+
+    # the most recently selected of the remaining maps is selected next
+    maps = map_list.get_maps()
+    map_list.set_selected_map(maps[0])
+    map_list.remove_map(maps[0])
+    assert map_list.get_selected_map() is maps[2]
+    map_list.remove_map(maps[1])
+    assert map_list.get_selected_map() is maps[2]
+
+    # removing the last map clears the selection
+    map_list.remove_map(maps[2])
+    assert map_list.get_count() == 0
+    assert map_list.get_selected_map() is None
+
+
+def test_reset_clears_the_selection(map_list):
+
+    # a reset map list has no selected map like a new one
+    map_list.reset()
+    assert map_list.get_count() == 0
+    assert map_list.get_selected_map() is None
@@ -0,0 +1,60 @@
+# general imports
+import threading
+import pytest
+# map imports
+from maps import MapLock
+
+
+def test_writing_thread_can_read():
+
+    # reads and writes of the writing thread are nested and complete one write
+    lock = MapLock()
+    with lock.writing():
+        with lock.reading():
+            with lock.writing():
+                pass
+    assert lock.get_version() == 1
+
+
+def test_reading_thread_cannot_start_to_write():
+
+    # a reading thread which starts to write fails instead of waiting and keeps its read
+    lock = MapLock()
+    with lock.reading():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+        with lock.reading():
+            pass
+    with lock.writing():
+        pass
+    assert lock.get_version() == 1
+
+
+def test_two_reading_threads_do_not_deadlock():
+
+    # two threads which read at the same time and then try to write both fail instead of waiting for each other
+    lock = MapLock()
+    barrier = threading.Barrier(2, timeout=5)
+    errors = []
+
+    def read_and_write():
+        with lock.reading():
+            barrier.wait()
+            try:
+                lock.acquire_write()
+            except RuntimeError as error:
+                errors.append(error)
+            barrier.wait()
+
+    threads = [threading.Thread(target=read_and_write, daemon=True) for i_thread in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(errors) == 2
+
+    # the lock can be written afterwards
+    with lock.writing():
+        pass
+    assert lock.get_version() == 1
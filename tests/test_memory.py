@@ -0,0 +1,50 @@
+# general imports
+import os
+import numpy
+# map imports
+import maps
+
+
+def test_copied_spectra_are_read_into_memory_when_changed(map_2d, tmp_path):
+
+    # spectra mapped copy-on-write from a cache are not held in memory until they are changed
+    cache_name = str(tmp_path / 'cache.npy')
+    counts = map_2d.get_counts(numpy.ones(map_2d.get_size(), dtype=bool)).reshape(map_2d.get_size() + [-1])
+    numpy.save(cache_name, counts)
+    map_2d.replace_spectra(map_2d.get_energies(), numpy.load(cache_name, mmap_mode='c'))
+    footprint = map_2d.get_footprint()
+    assert isinstance(map_2d._spectra, numpy.memmap)
+
+    # the first change reads them into memory where they are counted, the cache itself is left unchanged
+    map_2d.set_spectra([[1, 2]], numpy.ones((1, map_2d.get_resolution())))
+    assert not isinstance(map_2d._spectra, numpy.memmap)
+    assert map_2d.get_footprint() >= footprint + counts.nbytes
+    assert numpy.array_equal(numpy.load(cache_name), counts)
+    map_2d.undo()
+    assert numpy.array_equal(map_2d.get_counts([[1, 2]])[0], counts[1, 2])
+
+
+def test_compacting_a_spilled_map_restores_it(map_2d):
+
+    # a spilled map which is compacted is held in memory afterwards and neither spilled nor stored on disk
+    map_2d.rotate('clockwise')
+    mask = numpy.ones(map_2d.get_size(), dtype=bool)
+    counts = map_2d.get_counts(mask).copy()
+    map_2d.spill()
+    spill_name = map_2d._spill_name
+    assert map_2d.is_spilled()
+    map_2d.compact()
+    assert not map_2d.is_spilled() and not map_2d.is_lazy()
+    assert not isinstance(map_2d._spectra, numpy.memmap)
+    assert not os.path.exists(spill_name)
+    assert numpy.array_equal(map_2d.get_counts(mask), counts)
+
+
+def test_memory_budget_follows_the_physical_memory(monkeypatch):
+
+    # the maps may take up half of the physical memory, which is unknown on systems without sysconf
+    physical_memory = maps.get_physical_memory()
+    if physical_memory is not None:
+        assert maps.MapList.memory_bytes == physical_memory // 2
+    monkeypatch.delattr(os, 'sysconf', raising=False)
+    assert maps.get_physical_memory() is None
@@ -0,0 +1,129 @@
+# general imports
+import numpy
+import pytest
+# map imports
+from maps import Map2D
+
+# the rotations and reflections of the map as they were applied to the arrays of the map before the orientation was
+# tracked, the x and y axes of the map are the first two axes
+transformations = {'clockwise': lambda array: numpy.rot90(array, -1),
+                   'anticlockwise': lambda array: numpy.rot90(array, 1),
+                   'horizontally': lambda array: numpy.flip(array, 0),
+                   'vertically': lambda array: numpy.flip(array, 1)}
+
+# sequences of operations which lead to each of the eight orientations and a longer one which combines all operations
+sequences = [[], ['clockwise'], ['clockwise', 'clockwise'], ['anticlockwise'], ['horizontally'], ['vertically'],
+             ['clockwise', 'horizontally'], ['clockwise', 'vertically']]
+combined_sequence = ['horizontally', 'anticlockwise', 'vertically', 'clockwise', 'clockwise']
+
+
+def apply_operations(map_handle, operations):
+
+    # rotate and flip the map
+    for operation in operations:
+        if operation in ['clockwise', 'anticlockwise']:
+            map_handle.rotate(operation)
+        else:
+            map_handle.flip(operation)
+
+
+def transform(array, operations, axes=(0, 1)):
+
+    # apply the operations to a copy of the array whose x and y axes are the given axes
+    array = numpy.moveaxis(array, axes, (0, 1))
+    for operation in operations:
+        array = transformations[operation](array)
+    return numpy.moveaxis(array, (0, 1), axes)
+
+
+def get_state(map_handle, micrograph_index):
+
+    # return all arrays of the map in the displayed orientation, the x and y axes are the first axes of all maps and
+    # the last axes of the micrograph, which has its rows along y
+    nx, ny = map_handle.get_size()
+    counts = map_handle.get_counts(numpy.ones((nx, ny), dtype=bool)).reshape((nx, ny, -1))
+    state = {'counts': counts, 'fit_functions': map_handle.get_fit_functions(),
+             'intensities': map_handle.get_fit_data(0, 0), 'sigma': map_handle.get_fit_data(0, 2),
+             'micrograph': numpy.swapaxes(map_handle.get_data(data_index=micrograph_index), 0, 1)}
+    for data_index in [1, 2, 3, 4, 5, 6, 7]:
+        state[data_index] = map_handle.get_data(data_index=data_index)
+    return {name: numpy.array(array) for name, array in state.items()}
+
+
+def assert_state(state, expected_state):
+
+    # all arrays have to be identical including their NaNs
+    for name, array in expected_state.items():
+        assert state[name].shape == array.shape, name
+        assert numpy.array_equal(state[name], array, equal_nan=True), name
+
+
+@pytest.fixture
+def prepared_map(map_2d):
+
+    # focus a pixel off the center, fit it and add a micrograph which is not square either
+    map_2d.set_focus([1, 2])
+    map_2d.set_fit(numpy.array([1, 0, 0, 0, 0, 0]), numpy.array([900., 1.9, 0.002]), numpy.array([1000., 1.9, 0.003]))
+    micrograph = numpy.arange(7 * 10 * 3).reshape((7, 10, 3))
+    micrograph_index = map_2d.add_micrograph('micrograph.png', micrograph)
+    assert numpy.array_equal(map_2d.get_data(data_index=micrograph_index), micrograph)
+    return map_2d, micrograph_index
+
+
+def test_sequences_cover_all_orientations():
+
+    # the sequences lead to eight different arrangements of the pixels of a map which is not square
+    arrangements = set()
+    for operations in sequences:
+        pixel_ids = transform(numpy.arange(6).reshape((2, 3)), operations)
+        arrangements.add((pixel_ids.shape, pixel_ids.tobytes()))
+    assert len(arrangements) == 8
+
+
+@pytest.mark.parametrize('operations', sequences + [combined_sequence],
+                         ids=['-'.join(operations) or 'none' for operations in sequences + [combined_sequence]])
+def test_orientation_matches_the_transformed_arrays(prepared_map, operations, tmp_path):
+
+    # the arrays in the displayed orientation are the transformed arrays of the original orientation
+    map_2d, micrograph_index = prepared_map
+    state = get_state(map_2d, micrograph_index)
+    apply_operations(map_2d, operations)
+    expected_state = {name: transform(array, operations) for name, array in state.items()}
+    assert_state(get_state(map_2d, micrograph_index), expected_state)
+    assert map_2d.get_size() == list(expected_state['counts'].shape[:2])
+
+    # the focus stays on the same pixel
+    pixel_ids = transform(numpy.arange(24).reshape((6, 4)), operations)
+    assert list(map_2d.get_focus()) == [int(i) for i in numpy.argwhere(pixel_ids == 1 * 4 + 2)[0]]
+    assert numpy.array_equal(map_2d.get_spectrum()[:, 1], state['counts'][1, 2])
+    assert map_2d.get_fit_functions(pixel=-2)[0] == 1
+
+    # changes of a displayed pixel end up at the same pixel of the displayed arrays
+    spectrum = numpy.linspace(0., 100., map_2d.get_resolution())
+    map_2d.set_spectra([[0, 1]], spectrum[numpy.newaxis])
+    map_2d.set_fit(numpy.array([1, 0, 0, 0, 0, 0]), numpy.array([10., 2., 0.001]), numpy.array([20., 2., 0.004]),
+                   pixel=[0, 1])
+    expected_state = get_state(map_2d, micrograph_index)
+    assert numpy.array_equal(expected_state['counts'][0, 1], spectrum)
+    assert expected_state['sigma'][0, 1] == pytest.approx(4.)
+
+    # a micrograph which is added now is aligned to the displayed map
+    micrograph = numpy.arange(5 * 9).reshape((5, 9))
+    second_index = map_2d.add_micrograph('second.png', micrograph)
+    assert numpy.array_equal(map_2d.get_data(data_index=second_index), micrograph)
+
+    # a saved project is reloaded in the same orientation
+    file_name = str(tmp_path / 'map.py2ds')
+    map_2d.save_project(file_name)
+    reloaded_map = Map2D(1, file_name)
+    assert_state(get_state(reloaded_map, micrograph_index), expected_state)
+    assert numpy.array_equal(reloaded_map.get_data(data_index=second_index), micrograph)
+    assert reloaded_map.get_focus() == map_2d.get_focus()
+    assert reloaded_map.get_size() == map_2d.get_size()
+
+    # and is rotated further from there
+    reloaded_map.rotate('clockwise')
+    expected_state = {name: transform(array, ['clockwise']) for name, array in expected_state.items()}
+    assert_state(get_state(reloaded_map, micrograph_index), expected_state)
+    assert numpy.array_equal(reloaded_map.get_data(data_index=second_index),
+                             transform(micrograph, ['clockwise'], (1, 0)))
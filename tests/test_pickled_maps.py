@@ -0,0 +1,47 @@
+# general imports
+import pickle
+import numpy
+# map imports
+from maps import Map2D
+
+
+def test_pickled_maps_keep_their_state(map_2d):
+
+    # a pickled map is restored in its orientation with its selected data and fits
+    map_2d.set_fit(numpy.array([1, 0, 0, 0, 0, 0]), numpy.array([900., 1.9, 0.002]), numpy.array([1000., 1.9, 0.003]),
+                   pixel=[1, 2])
+    map_2d.rotate('clockwise')
+    map_2d.set_selected_data(4)
+    restored_map = pickle.loads(pickle.dumps(map_2d))
+    mask = numpy.ones(map_2d.get_size(), dtype=bool)
+    assert restored_map.get_size() == map_2d.get_size()
+    assert restored_map.get_selected_data() == 4
+    assert numpy.array_equal(restored_map.get_counts(mask), map_2d.get_counts(mask))
+    assert numpy.array_equal(restored_map.get_fit_data(0, 2), map_2d.get_fit_data(0, 2), equal_nan=True)
+
+
+def test_released_pickles_are_converted(map_2d):
+
+    # maps pickled by the released versions store the energies in the last axis of the spectra, the parameters of all
+    # fits and their data entries right after the maximum energies
+    spectra = map_2d._spectra
+    fit_functions = numpy.zeros(map_2d.get_size() + [6])
+    fit_functions[1, 2, 0] = 1
+    fit_parameters = numpy.full(map_2d.get_size() + [6, 4], numpy.nan)
+    fit_parameters[1, 2, 0, :3] = [1000., 1.9, 0.003]
+    state = {'_app': None, '_data_names': {}, '_dimension': 2, '_focus': [1, 2], '_id': 0, '_interval': [0, 31],
+             '_map_name': 'map', '_resolution': 32, '_selected_data': 5, '_nx': 6, '_ny': 4,
+             '_spectra': numpy.stack((numpy.broadcast_to(map_2d.get_energies(), spectra.shape), spectra), axis=-1),
+             '_data': numpy.zeros((1, 6, 4)), '_int_counts': map_2d._int_counts,
+             '_mean_energies': map_2d._mean_energies, '_max_energies': map_2d.get_data(data_index=3),
+             '_fit_functions': fit_functions,
+             '_fit_initial_parameters': fit_parameters, '_fit_optimized_parameters': fit_parameters,
+             '_micrographs': {}, '_micrograph_names': {}}
+    restored_map = Map2D.__new__(Map2D)
+    restored_map.__setstate__(state)
+    mask = numpy.ones(map_2d.get_size(), dtype=bool)
+    assert restored_map.get_selected_data() == 6
+    assert numpy.array_equal(restored_map.get_energies(), map_2d.get_energies())
+    assert numpy.array_equal(restored_map.get_counts(mask), map_2d.get_counts(mask))
+    assert restored_map.get_fit_data(0, 2)[1, 2] == 3.
+    assert numpy.sum(restored_map.get_fit_functions() != 0) == 1
@@ -0,0 +1,135 @@
+# general imports
+import json
+import os
+import subprocess
+import sys
+import zipfile
+import numpy
+import pytest
+# datatype imports
+from datatypes import project
+
+
+@pytest.fixture
+def arrays():
+
+    # arrays of two groups which are split into several chunks
+    rng = numpy.random.default_rng(0)
+    return {'spectra': {'spectra': rng.random((40, 8, 16)), 'energies': numpy.linspace(1.7, 2.1, 16)},
+            'fits': {'fit_functions': rng.integers(0, 4, (40, 8, 6)).astype('int8')}}
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+
+    # chunks of a few rows so that every array is split
+    monkeypatch.setattr(project, 'chunk_bytes', 4096)
+
+
+def check_arrays(loaded_arrays, arrays):
+
+    # the loaded arrays are named without their group and keep their shape, dtype and values
+    for group_arrays in arrays.values():
+        for name, array in group_arrays.items():
+            assert loaded_arrays[name].dtype == array.dtype
+            assert numpy.array_equal(loaded_arrays[name], array)
+
+
+def test_save_and_load(tmp_path, arrays):
+
+    # a full save writes the first generation, which is loaded completely or by groups
+    file_name = str(tmp_path / 'map.py2ds')
+    project.save_project(file_name, {'map_name': 'map'}, arrays)
+    assert project.is_project(file_name)
+    assert not os.path.exists(file_name + '.tmp')
+    metadata, loaded_arrays = project.load_project(file_name)
+    assert metadata == {'map_name': 'map'}
+    check_arrays(loaded_arrays, arrays)
+    metadata, loaded_arrays = project.load_project(file_name, groups=['fits'])
+    assert list(loaded_arrays.keys()) == ['fit_functions']
+    assert len(project.load_manifest(file_name)['groups']['spectra']['spectra']['chunks']) > 1
+
+
+def test_append_writes_a_new_generation(tmp_path, arrays):
+
+    # appending writes the changed groups and a new manifest, the unchanged groups keep their chunks
+    file_name = str(tmp_path / 'map.py2ds')
+    project.save_project(file_name, {'selected_data': 0}, arrays)
+    spectra_chunks = project.load_manifest(file_name)['groups']['spectra']['spectra']['chunks']
+    arrays['fits']['fit_functions'][:5] = 0
+    project.save_project(file_name, {'selected_data': 2}, {'fits': arrays['fits']}, append=True)
+
+    # both manifests stay in the project, the one of the highest generation is the current one
+    with zipfile.ZipFile(file_name) as project_file:
+        manifest_names = sorted(name for name in project_file.namelist() if name.startswith('manifest.'))
+        first_manifest = json.loads(project_file.read('manifest.0.json').decode('utf-8'))
+    assert manifest_names == ['manifest.0.json', 'manifest.1.json']
+    assert first_manifest['metadata'] == {'selected_data': 0}
+    manifest = project.load_manifest(file_name)
+    assert manifest['generation'] == 1
+    assert manifest['stale_bytes'] > 0
+    assert manifest['groups']['spectra']['spectra']['chunks'] == spectra_chunks
+    assert all(name.startswith('fits/fit_functions/1/')
+               for name in manifest['groups']['fits']['fit_functions']['chunks'])
+    metadata, loaded_arrays = project.load_project(file_name)
+    assert metadata == {'selected_data': 2}
+    check_arrays(loaded_arrays, arrays)
+
+
+def test_compaction(tmp_path, arrays, monkeypatch):
+
+    # without compaction every append makes the project grow by the changed groups
+    file_name = str(tmp_path / 'map.py2ds')
+    monkeypatch.setattr(project, 'compaction_fraction', 1.)
+    project.save_project(file_name, {}, arrays)
+    size = os.path.getsize(file_name)
+    for i_save in range(3):
+        project.save_project(file_name, {}, {'spectra': arrays['spectra']}, append=True)
+    assert os.path.getsize(file_name) > 3 * size
+
+    # once the superseded chunks take up more than the compaction fraction, only the current chunks are kept
+    monkeypatch.setattr(project, 'compaction_fraction', 0.5)
+    arrays['spectra']['spectra'] *= 2
+    project.save_project(file_name, {}, {'spectra': arrays['spectra']}, append=True)
+    with zipfile.ZipFile(file_name) as project_file:
+        manifest_names = [name for name in project_file.namelist() if name.startswith('manifest.')]
+    assert manifest_names == ['manifest.4.json']
+    assert project.load_manifest(file_name)['stale_bytes'] == 0
+    assert os.path.getsize(file_name) < 1.1 * size
+    check_arrays(project.load_project(file_name)[1], arrays)
+
+
+def test_newer_versions_are_rejected(tmp_path, arrays):
+
+    # projects written by a newer version cannot be read
+    file_name = str(tmp_path / 'map.py2ds')
+    project.save_project(file_name, {}, arrays)
+    manifest = project.load_manifest(file_name)
+    manifest['generation'] += 1
+    manifest['version'] = project.project_version + 1
+    with zipfile.ZipFile(file_name, 'a') as project_file:
+        project_file.writestr('manifest.1.json', json.dumps(manifest).encode('utf-8'))
+    with pytest.raises(ValueError, match='newer version'):
+        project.load_project(file_name)
+
+
+def test_interrupted_append_keeps_the_previous_generation(tmp_path, arrays):
+
+    # a process which dies after it appended the chunks of a group but before the manifest leaves the previous
+    # generation readable
+    file_name = str(tmp_path / 'map.py2ds')
+    project.save_project(file_name, {'generation': 0}, arrays)
+    size = os.path.getsize(file_name)
+    script = '\n'.join([
+        'import os, numpy',
+        'from datatypes import project',
+        'project.chunk_bytes = 4096',
+        'project.json.dumps = lambda manifest: os._exit(1)',
+        'fit_functions = numpy.random.randint(0, 128, (80, 8, 64)).astype("int8")',
+        'project.save_project(%r, {}, {"fits": {"fit_functions": fit_functions}}, append=True)' % file_name])
+    result = subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.dirname(__file__)))
+    assert result.returncode == 1
+    assert os.path.getsize(file_name) == size
+    metadata, loaded_arrays = project.load_project(file_name)
+    assert metadata == {'generation': 0}
+    check_arrays(loaded_arrays, arrays)
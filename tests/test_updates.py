@@ -0,0 +1,102 @@
+# general imports
+import numpy
+import pytest
+# map imports
+from maps import Map2D
+
+
+@pytest.fixture
+def map_pair(map_file):
+
+    # two maps of the same export whose derived data are summed over the same interval, one of them is changed pixel
+    # by pixel and the other one by bulk updates
+    map_pair = [Map2D(0, map_file), Map2D(1, map_file)]
+    for map_handle in map_pair:
+        map_handle.set_interval('left', 3)
+        map_handle.set_interval('right', map_handle.get_resolution() - 5)
+    return map_pair
+
+
+def record_events(map_handle):
+
+    # collect the events of the map as tuples of the event and the region
+    events = []
+    map_handle.set_event_sink(lambda event, map_id, region=None: events.append((event, region)))
+    return events
+
+
+def get_pixels():
+
+    # a few scattered pixels given in an unsorted order
+    return [[4, 1], [1, 3], [2, 0], [4, 2]]
+
+
+def test_bulk_spectra_emit_one_event(map_pair):
+
+    # all changed spectra are announced by one event whose region is the bounding box of the pixels
+    map_2d = map_pair[0]
+    events = record_events(map_2d)
+    counts = numpy.random.default_rng(0).random((4, map_2d.get_resolution())) * 1000
+    map_2d.set_spectra(get_pixels(), counts)
+    assert [event for event in events if event[0] == 'spectrum_changed'] == [('spectrum_changed', [[1, 5], [0, 4]])]
+
+    # a boolean mask is announced in the same way, updates which are not emitted are not announced at all
+    mask = numpy.zeros(map_2d.get_size(), dtype=bool)
+    mask[2:4, 1] = True
+    del events[:]
+    map_2d.set_spectra(mask, counts[:2])
+    assert [event for event in events if event[0] == 'spectrum_changed'] == [('spectrum_changed', [[2, 4], [1, 2]])]
+    del events[:]
+    map_2d.set_spectra(mask, counts[2:], emit=False)
+    assert [event for event in events if event[0] == 'spectrum_changed'] == []
+
+
+def test_bulk_spectra_match_single_updates(map_pair):
+
+    # the spectra and the derived data after one bulk update equal those after updating the pixels one by one
+    counts = numpy.random.default_rng(0).random((4, map_pair[0].get_resolution())) * 1000
+    map_pair[0].set_spectra(get_pixels(), counts)
+    for pixel, spectrum in zip(get_pixels(), counts):
+        map_pair[1].set_spectra([pixel], spectrum[numpy.newaxis])
+    mask = numpy.ones(map_pair[0].get_size(), dtype=bool)
+    assert numpy.array_equal(map_pair[0].get_counts(mask), map_pair[1].get_counts(mask))
+    for data_index in [1, 2, 3, 4]:
+        assert numpy.array_equal(map_pair[0].get_data(data_index=data_index),
+                                 map_pair[1].get_data(data_index=data_index), equal_nan=True)
+
+
+def test_bulk_fits_emit_one_event(map_pair):
+
+    # all changed fits are announced by one event whose region is the bounding box of the pixels
+    map_2d = map_pair[0]
+    events = record_events(map_2d)
+    parameters = numpy.full((4, 6, 4), 1.)
+    map_2d.set_fits(get_pixels(), numpy.array([1, 0, 0, 0, 0, 0]), parameters, parameters)
+    assert events == [('fit_changed', [[1, 5], [0, 4]])]
+
+    # the region is given in the displayed orientation of the map
+    map_2d.rotate('clockwise')
+    del events[:]
+    map_2d.clear_fits([[0, 0], [1, 0]])
+    assert events == [('fit_changed', [[0, 2], [0, 1]])]
+
+
+def test_bulk_fits_match_single_updates(map_pair):
+
+    # the fits and the fitted data after one bulk update equal those after fitting the pixels one by one
+    rng = numpy.random.default_rng(0)
+    fit_functions = rng.integers(0, 4, (4, 6))
+    initial_parameters = rng.random((4, 6, 4))
+    optimized_parameters = rng.random((4, 6, 4))
+    map_pair[0].set_fits(get_pixels(), fit_functions, initial_parameters, optimized_parameters)
+    for pixel, functions, initial, optimized in zip(get_pixels(), fit_functions, initial_parameters,
+                                                    optimized_parameters):
+        map_pair[1].set_fits([pixel], functions, initial, optimized)
+    assert numpy.array_equal(map_pair[0].get_fit_functions(), map_pair[1].get_fit_functions())
+    assert map_pair[0].get_fit_catalog() == map_pair[1].get_fit_catalog()
+    for pixel in get_pixels():
+        for fit, other_fit in zip(map_pair[0].get_fit(pixel=pixel), map_pair[1].get_fit(pixel=pixel)):
+            assert numpy.array_equal(fit, other_fit)
+    for i_peak, quantity in map_pair[0].get_fit_catalog():
+        assert numpy.array_equal(map_pair[0].get_fit_data(i_peak, quantity), map_pair[1].get_fit_data(i_peak, quantity),
+                                 equal_nan=True)